@@ -0,0 +1,319 @@
+"""
+    counting_log 보관 (hot/cold 계층)
+    - 닫힌 달(현재 달을 포함한 최근 ARCHIVE_KEEP_MONTHS개월 이전)의 행을
+      ARCHIVE_DIR/counting_log/YYYY-MM.parquet (zstd 압축, 컬럼 형식)로 옮기고 DB에서 삭제
+      → 수집/대시보드가 쓰는 counting_log 테이블은 최근 몇 달치만 유지
+    - 집계 테이블(counting_rollup_*)은 보관할 때 건드리지 않으므로 /api/reports/summary는 그대로
+      (scripts/rebuild_rollups.py도 보관 파일을 함께 읽어 재계산)
+    - /api/reports, /api/reports/export는 조회 기간이 보관된 달에 걸치면 Parquet 파일도 함께 읽음
+    - 보관된 달에 늦게 들어온 행은 다음 실행 때 기존 파일과 합쳐 다시 씀
+    - 임시 파일에 끝까지 쓰고 교체한 뒤에만 DB 행을 삭제 (중간에 멈춰도 유실 없음, 다시 실행하면 event_key 기준으로 중복 제거)
+    - 삭제하는 행의 event_key는 같은 트랜잭션에서 archived_event_key에 남김
+      → 보관된 달의 결과 파일이 다시 들어와도 수집 경로가 건너뜀 (집계 이중 반영 방지)
+    - DB와 보관본의 중복 판단은 event_key 기준 (삭제 후 id가 재사용될 수 있음), 키가 없는 옛 행만 id 기준
+    pyarrow가 없으면 보관과 보관본 조회를 건너뜀
+"""
+import os
+import re
+import time
+from datetime import date, datetime, time as dtime, timedelta
+from sqlalchemy import delete, func, select
+from app.config import (
+    ARCHIVE_DIR, ARCHIVE_KEEP_MONTHS, ARCHIVE_INTERVAL, BULK_CHUNK_SIZE, DEFAULT_STATION, EXPORT_CHUNK_SIZE,
+)
+from app.database import SessionLocal
+from app.models import CountingLog, ArchivedEventKey
+from app.utils.bulk import insert_ignore_statement
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+ARCHIVE_TABLE_DIR = os.path.join(ARCHIVE_DIR, "counting_log")
+MONTH_FILE = re.compile(r"^(\d{4})-(\d{2})\.parquet$")
+ARCHIVE_COLUMNS = list(CountingLog.__table__.columns)
+
+
+def archive_row_key(event_key: str, log_id: int):
+    # 보관본과 DB 행이 같은 행인지 판단하는 키 (event_key가 없는 옛 행만 id)
+    return event_key or ("id", log_id)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def previous_month(month: date) -> date:
+    return date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+
+
+def month_range(month: date) -> tuple:
+    return datetime.combine(month, dtime.min), datetime.combine(next_month(month), dtime.min)
+
+
+def archive_path(month: date) -> str:
+    return os.path.join(ARCHIVE_TABLE_DIR, f"{month:%Y-%m}.parquet")
+
+
+def archive_schema():
+    # counting_log 컬럼 전체 (다시 DB로 복원할 수 있도록)
+    return pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.string()),
+        ("counted_at", pa.timestamp("us")),
+        ("drug_name", pa.string()),
+        ("drug_standard_code", pa.string()),
+        ("drug_refer_code", pa.string()),
+        ("count_quantity", pa.int64()),
+        ("source_filename", pa.string()),
+        ("station_id", pa.string()),
+        ("event_key", pa.string()),
+    ])
+
+
+# ------------------ 조회 ------------------ #
+def archive_files(date_from: date = None, date_to: date = None) -> list:
+    # 보관 파일이 있는 달 중 조회 기간과 겹치는 달 (오래된 순, pyarrow 유무와 관계없이)
+    if not os.path.isdir(ARCHIVE_TABLE_DIR):
+        return []
+    months = []
+    for name in os.listdir(ARCHIVE_TABLE_DIR):
+        match = MONTH_FILE.match(name)
+        if not match:
+            continue
+        month = date(int(match[1]), int(match[2]), 1)
+        if (date_from and next_month(month) <= date_from) or (date_to and month > date_to):
+            continue
+        months.append(month)
+    return sorted(months)
+
+
+def archived_months(date_from: date = None, date_to: date = None) -> list:
+    # 조회에 함께 읽을 보관 달 (pyarrow가 없으면 읽을 수 없으므로 없음)
+    if pa is None:
+        return []
+    return archive_files(date_from, date_to)
+
+
+def archive_filter(date_from: date = None, date_to: date = None, drug_code: str = None, station: str = None, cursor: tuple = None):
+    # routers/reports.report_filters와 같은 조건을 pyarrow 식으로 (+ 키셋 커서)
+    counted_at = pc.field("counted_at")
+    expr = counted_at.is_valid()
+    if date_from:
+        expr = expr & (counted_at >= datetime.combine(date_from, dtime.min))
+    if date_to:
+        expr = expr & (counted_at < datetime.combine(date_to + timedelta(days=1), dtime.min))
+    if drug_code:
+        expr = expr & (pc.field("drug_standard_code") == drug_code)
+    if station:
+        if station == DEFAULT_STATION:
+            expr = expr & ((pc.field("station_id") == station) | pc.field("station_id").is_null())
+        else:
+            expr = expr & (pc.field("station_id") == station)
+    if cursor:
+        cursor_at, cursor_id = cursor
+        expr = expr & ((counted_at < cursor_at) | ((counted_at == cursor_at) & (pc.field("id") < cursor_id)))
+    return expr
+
+
+def read_archive_page(month: date, expr, limit: int) -> list:
+    # 한 달 파일에서 (counted_at, id) 내림차순 상위 limit건 (row group 통계로 범위 밖은 건너뜀)
+    table = ds.dataset(archive_path(month), format="parquet").to_table(filter=expr)
+    table = table.sort_by([("counted_at", "descending"), ("id", "descending")]).slice(0, limit)
+    return table.to_pylist()
+
+
+def merge_archived_page(rows: list, limit: int, months: list, expr) -> list:
+    # DB에서 가져온 limit+1건에 보관본을 최신 달부터 합침
+    # 이미 limit+1건이 모였고 가장 오래된 행이 그 달보다 늦으면 더 오래된 달은 읽지 않음
+    wanted = limit + 1
+    for month in reversed(months):
+        if len(rows) >= wanted and rows[-1]["counted_at"] >= month_range(month)[1]:
+            break
+        # 보관 중 DB 삭제가 끝나기 전이면 같은 행이 양쪽에 있을 수 있으므로 event_key로 중복 제거
+        merged = {archive_row_key(row["event_key"], row["id"]): row for row in read_archive_page(month, expr, wanted)}
+        merged.update((archive_row_key(row["event_key"], row["id"]), row) for row in rows)
+        rows = sorted(merged.values(), key=lambda row: (row["counted_at"], row["id"]), reverse=True)[:wanted]
+    return rows
+
+
+def iter_archive_chunks(months: list, expr, columns: list, chunk: int = EXPORT_CHUNK_SIZE):
+    # 내보내기용: 달 순서대로 chunk행씩 튜플 목록 (파일은 counted_at, id 순으로 저장됨)
+    for month in months:
+        dataset = ds.dataset(archive_path(month), format="parquet")
+        for batch in dataset.to_batches(columns=columns, filter=expr, batch_size=chunk):
+            if batch.num_rows:
+                yield list(zip(*(batch.column(name).to_pylist() for name in columns)))
+
+
+class ArchivedKeys:
+    # 보관된 달의 행 키(archive_row_key): 보관 후 DB 삭제가 끝나기 전에는 같은 행이 양쪽에 있으므로 DB 쪽을 건너뛰는 데 사용
+    # DB 행을 counted_at 순으로 읽는다는 전제로 한 달치 키만 기억
+    def __init__(self, months: list):
+        self.months = set(months)
+        self.month = None
+        self.keys = set()
+
+    def contains(self, event_key: str, log_id: int, counted_at: datetime) -> bool:
+        if counted_at is None:
+            return False
+        month = counted_at.date().replace(day=1)
+        if month not in self.months:
+            return False
+        if month != self.month:
+            self.month = month
+            table = pq.read_table(archive_path(month), columns=["id", "event_key"])
+            self.keys = {
+                archive_row_key(key, log_id)
+                for log_id, key in zip(table.column("id").to_pylist(), table.column("event_key").to_pylist())
+            }
+        return archive_row_key(event_key, log_id) in self.keys
+
+
+# ------------------ 보관 ------------------ #
+def iter_month_rows(db, month: date, chunk: int = EXPORT_CHUNK_SIZE):
+    start, end = month_range(month)
+    query = (
+        db.query(*ARCHIVE_COLUMNS)
+        .filter(CountingLog.counted_at >= start, CountingLog.counted_at < end)
+        .order_by(CountingLog.counted_at, CountingLog.id)
+        .yield_per(chunk)
+    )
+    rows = []
+    for row in query:
+        rows.append(row)
+        if len(rows) >= chunk:
+            yield rows
+            rows = []
+    if rows:
+        yield rows
+
+
+def archive_month(month: date) -> int:
+    # 한 달치를 보관 파일로 옮기고 DB에서 삭제: 옮긴 행 수
+    path = archive_path(month)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(ARCHIVE_TABLE_DIR, exist_ok=True)
+    schema = archive_schema()
+    archived = set()  # 파일에 이미 있는 행의 archive_row_key
+    moved = []  # DB에서 지울 (id, event_key)
+
+    db = SessionLocal()
+    try:
+        writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+        try:
+            # 이미 보관된 행을 먼저 옮겨 적고
+            if os.path.exists(path):
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=EXPORT_CHUNK_SIZE):
+                    writer.write_table(pa.Table.from_batches([batch], schema=schema))
+                    archived.update(map(archive_row_key, batch.column("event_key").to_pylist(), batch.column("id").to_pylist()))
+            # DB에 남은 행을 이어서 기록 (이전 실행이 삭제 전에 멈춘 행은 파일에 이미 있음)
+            for rows in iter_month_rows(db, month):
+                moved.extend((row.id, row.event_key) for row in rows)
+                rows = [row for row in rows if archive_row_key(row.event_key, row.id) not in archived]
+                if not rows:
+                    continue
+                columns = list(zip(*rows))
+                writer.write_table(pa.Table.from_arrays(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+        finally:
+            writer.close()
+
+        if not moved:
+            os.remove(tmp)
+            return 0
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        # 파일 교체가 끝난 뒤에만 삭제 (청크마다 커밋 → 수집 쓰기를 오래 막지 않음)
+        # 지우는 행의 event_key를 같은 트랜잭션에서 남김 → 유니크 제약이 사라져도 다시 들어온 파일을 건너뜀
+        for i in range(0, len(moved), BULK_CHUNK_SIZE):
+            chunk = moved[i:i + BULK_CHUNK_SIZE]
+            keys = [{"event_key": key} for _, key in chunk if key]
+            if keys:
+                db.execute(insert_ignore_statement(db.bind, ArchivedEventKey.__table__, keys))
+            db.execute(delete(CountingLog).where(CountingLog.id.in_([log_id for log_id, _ in chunk])))
+            db.commit()
+        return len(moved)
+    except Exception:
+        db.rollback()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        db.close()
+
+
+def closed_months(today: date = None) -> list:
+    # DB에 남길 기간 이전이면서 counting_log에 행이 있는 달 (오래된 순)
+    cutoff = date.today().replace(day=1) if today is None else today.replace(day=1)
+    for _ in range(ARCHIVE_KEEP_MONTHS - 1):
+        cutoff = previous_month(cutoff)
+
+    db = SessionLocal()
+    try:
+        oldest = db.query(func.min(CountingLog.counted_at)).filter(
+            CountingLog.counted_at < datetime.combine(cutoff, dtime.min)
+        ).scalar()
+    finally:
+        db.close()
+
+    months = []
+    month = oldest.date().replace(day=1) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def register_archived_keys() -> int:
+    # archived_event_key가 생기기 전에 보관한 파일의 키를 채움 (테이블이 비어 있고 보관 파일이 있을 때만)
+    months = archive_files()
+    db = SessionLocal()
+    try:
+        if not months or db.execute(select(ArchivedEventKey.event_key).limit(1)).first() is not None:
+            return 0
+        registered = 0
+        for month in months:
+            for batch in pq.ParquetFile(archive_path(month)).iter_batches(batch_size=BULK_CHUNK_SIZE, columns=["event_key"]):
+                keys = [{"event_key": key} for key in batch.column("event_key").to_pylist() if key]
+                if keys:
+                    db.execute(insert_ignore_statement(db.bind, ArchivedEventKey.__table__, keys))
+                    registered += len(keys)
+            db.commit()
+        return registered
+    finally:
+        db.close()
+
+
+def archive_closed_months() -> int:
+    if pa is None:
+        print("⚠️ pyarrow가 없어 counting_log 보관을 건너뜁니다")
+        return 0
+    registered = register_archived_keys()
+    if registered:
+        print(f"🗄️ 기존 보관 파일의 event_key 등록: {registered}건")
+    total = 0
+    for month in closed_months():
+        moved = archive_month(month)
+        if moved:
+            print(f"🗄️ counting_log {month:%Y-%m} 보관: {moved}건 → {archive_path(month)}")
+        total += moved
+    return total
+
+
+def run_archiver(interval: float = ARCHIVE_INTERVAL):
+    # 보관 잠금을 잡은 워커 하나에서 주기적으로 실행
+    while True:
+        try:
+            archive_closed_months()
+        except Exception as e:
+            print("❌ counting_log 보관 실패:", e)
+        time.sleep(interval)
@@ -0,0 +1,249 @@
+"""
+    브로드캐스트 중계(backplane)
+    - uvicorn 워커가 여러 개일 때 한 워커에서 발생한 이벤트를 모든 워커의 WebSocket 클라이언트에 전달
+    - publish(message) → 모든 워커에서 deliver(message) 호출 (자기 자신 포함, 한 번씩)
+    - BACKPLANE_URL로 선택
+        (빈 값)        InProcessBackplane: 워커 하나일 때, 바로 deliver
+        sqlite:///경로  SQLiteBackplane: 같은 서버의 워커끼리 공유 SQLite 파일로 중계
+                       (PRAGMA data_version으로 다른 연결의 커밋만 감지 후 조회)
+        redis://...    RedisBackplane: Redis 프로토콜(RESP) PUBLISH/SUBSCRIBE (TLS 미지원)
+                       (redis-py 없이 asyncio 스트림으로 직접 구현, RESP 호환 서버면 사용 가능)
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, unquote
+from app.config import BACKPLANE_URL, BACKPLANE_CHANNEL, BACKPLANE_POLL_INTERVAL, BACKPLANE_RETENTION
+from app.utils.logs import get_logger, log_event
+
+logger = get_logger(__name__)
+
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class InProcessBackplane:
+    def __init__(self):
+        self.deliver = None
+
+    async def start(self, deliver):
+        self.deliver = deliver
+
+    async def stop(self):
+        pass
+
+    async def publish(self, message: dict):
+        self.deliver(message)
+
+
+class SQLiteBackplane:
+    def __init__(self, path: str, poll_interval: float = BACKPLANE_POLL_INTERVAL, retention: int = BACKPLANE_RETENTION):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.deliver = None
+        self.loop = None
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._published = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    async def start(self, deliver):
+        self.deliver = deliver
+        self.loop = asyncio.get_running_loop()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._writer = self._connect()
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS backplane_events (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)"
+        )
+        # 시작 이후 메시지만 전달 (이전 메시지는 다시 보내지 않음)
+        last_id = self._writer.execute("SELECT COALESCE(MAX(id), 0) FROM backplane_events").fetchone()[0]
+        self._thread = threading.Thread(target=self._poll_loop, args=(last_id,), daemon=True, name="backplane-sqlite")
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._thread.join, 2)
+        if self._writer is not None:
+            self._writer.close()
+
+    def _insert(self, payload: str):
+        with self._write_lock:
+            cursor = self._writer.execute("INSERT INTO backplane_events (payload) VALUES (?)", (payload,))
+            self._published += 1
+            # 오래된 메시지 정리 (모든 워커가 이미 읽은 뒤)
+            if self._published % 1000 == 0:
+                self._writer.execute("DELETE FROM backplane_events WHERE id <= ?", (cursor.lastrowid - self.retention,))
+
+    async def publish(self, message: dict):
+        await self.loop.run_in_executor(None, self._insert, encode(message))
+
+    def _poll_loop(self, last_id: int):
+        conn = self._connect()
+        version = None
+        try:
+            while not self._stopped.is_set():
+                try:
+                    # data_version은 다른 연결이 커밋했을 때만 바뀜 → 바뀔 때만 조회
+                    current = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if current == version:
+                        time.sleep(self.poll_interval)
+                        continue
+                    version = current
+                    while True:
+                        rows = conn.execute(
+                            "SELECT id, payload FROM backplane_events WHERE id > ? ORDER BY id LIMIT 500", (last_id,)
+                        ).fetchall()
+                        if not rows:
+                            break
+                        last_id = rows[-1][0]
+                        messages = [json.loads(payload) for _, payload in rows]
+                        self.loop.call_soon_threadsafe(self._deliver_all, messages)
+                except sqlite3.Error as e:
+                    log_event(logger, "backplane_poll_failed", logging.ERROR, backend="sqlite", error=repr(e))
+                    time.sleep(1)
+        finally:
+            conn.close()
+
+    def _deliver_all(self, messages: list):
+        for message in messages:
+            self.deliver(message)
+
+
+# ------------------ Redis 프로토콜 (RESP) ------------------ #
+class RespError(Exception):
+    pass
+
+
+def resp_command(*args) -> bytes:
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def resp_read(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Redis 연결이 끊어졌습니다.")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode()
+    if prefix == b"-":
+        raise RespError(body.decode())
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await resp_read(reader) for _ in range(length)]
+    raise RespError(f"알 수 없는 RESP 응답: {line!r}")
+
+
+class RedisBackplane:
+    def __init__(self, url: str, channel: str = BACKPLANE_CHANNEL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.channel = channel
+        self.deliver = None
+        self._pub = None  # (reader, writer)
+        self._pub_lock = asyncio.Lock()
+        self._task = None
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            args = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+            writer.write(resp_command(*args))
+            await resp_read(reader)
+        return reader, writer
+
+    async def start(self, deliver):
+        self.deliver = deliver
+        self._pub = await self._open()  # PUBLISH/SUBSCRIBE 채널은 DB 번호와 무관
+        self._task = asyncio.create_task(self._subscribe_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        if self._pub is not None:
+            self._pub[1].close()
+
+    async def publish(self, message: dict):
+        async with self._pub_lock:
+            for attempt in range(2):
+                try:
+                    if self._pub is None:
+                        self._pub = await self._open()
+                    reader, writer = self._pub
+                    writer.write(resp_command("PUBLISH", self.channel, encode(message)))
+                    await writer.drain()
+                    await resp_read(reader)
+                    return
+                except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                    self._pub = None
+                    if attempt:
+                        raise
+                    log_event(logger, "backplane_reconnect", logging.WARNING, backend="redis", error=repr(e))
+
+    async def _subscribe_loop(self):
+        # 연결이 끊기면 다시 구독 (끊긴 동안의 메시지는 재연결 복구(replay)로 보완)
+        delay = 0.5
+        while True:
+            try:
+                reader, writer = await self._open()
+                try:
+                    writer.write(resp_command("SUBSCRIBE", self.channel))
+                    await writer.drain()
+                    delay = 0.5
+                    while True:
+                        reply = await resp_read(reader)
+                        if isinstance(reply, list) and reply and reply[0] == b"message":
+                            self.deliver(json.loads(reply[2]))
+                finally:
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_event(logger, "backplane_subscribe_failed", logging.ERROR, backend="redis", error=repr(e))
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10)
+
+
+def create_backplane(url: str = BACKPLANE_URL):
+    if not url:
+        return InProcessBackplane()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackplane(url[len("sqlite:///"):])
+    if url.startswith("redis://"):
+        return RedisBackplane(url)
+    raise ValueError(f"지원하지 않는 BACKPLANE_URL: {url}")
+
+
+backplane = create_backplane()
@@ -0,0 +1,114 @@
+# 환경 변수 기반 설정값 모음
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # backend/
+
+# 매칭 인덱스 등 캐시 파일 저장 경로
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# 배치 퍼지 매칭 설정 (-1 이면 사용 가능한 모든 코어 사용)
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", "-1"))
+# 한 번에 점수 행렬을 계산할 입력 약품명 수 (메모리 = chunk x 카탈로그 크기 x 8 bytes)
+MATCH_CHUNK_SIZE = int(os.getenv("MATCH_CHUNK_SIZE", "128"))
+# bigram 역색인으로 좁힐 퍼지 비교 후보 수 (후보 점수가 기준 미만이면 전체 스캔)
+MATCH_CANDIDATE_LIMIT = int(os.getenv("MATCH_CANDIDATE_LIMIT", "200"))
+
+# NDJSON 스트리밍 응답: 한 번에 읽고 매칭해서 내보낼 행 수
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "200"))
+# 업로드 파일을 메모리에 두는 최대 크기 (초과 시 임시 파일로 전환)
+UPLOAD_SPOOL_MAX_SIZE = int(os.getenv("UPLOAD_SPOOL_MAX_SIZE", str(8 * 1024 * 1024)))
+
+# 업로드 매칭 백그라운드 작업
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", str(os.cpu_count() or 1)))  # 프로세스 풀 크기
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))  # 동시에 실행할 작업 수
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "20"))  # 대기열이 차면 429 응답
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))  # 완료된 작업 결과 보관 시간
+JOB_DIR = os.getenv("JOB_DIR", os.path.join(CACHE_DIR, "jobs"))
+
+# PDF 페이지 병렬 추출
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGE_BATCH = int(os.getenv("PDF_PAGE_BATCH", "8"))  # 작업 하나가 추출할 페이지 수
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))  # 이보다 적으면 현재 프로세스에서 추출
+
+# 업로드 결과 캐시 (파일 SHA-256 + 약품 카탈로그 버전 기준)
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", os.path.join(CACHE_DIR, "results"))
+RESULT_CACHE_MEMORY_MB = int(os.getenv("RESULT_CACHE_MEMORY_MB", "64"))
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "512"))
+# 행 단위 매칭 결과 메모 (정규화된 이름 + 코드 기준) 최대 개수
+ROW_MEMO_SIZE = int(os.getenv("ROW_MEMO_SIZE", "100000"))
+
+# 대량 INSERT/UPSERT 시 한 문장에 넣을 행 수
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+# 카운팅 결과 수집 파이프라인
+INGEST_DEBOUNCE = float(os.getenv("INGEST_DEBOUNCE", "0.5"))  # 같은 파일의 생성/수정 이벤트를 합치는 대기 시간(초)
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))  # 한 번에 커밋할 최대 행 수
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.5"))  # 배치가 덜 차도 커밋하는 주기(초)
+INGEST_RECENT_FILES = int(os.getenv("INGEST_RECENT_FILES", "10000"))  # 메모리에 기억할 최근 처리 파일 수
+INGEST_WRITE_RETRIES = int(os.getenv("INGEST_WRITE_RETRIES", "5"))  # 배치 저장 실패 시 다시 시도할 횟수
+INGEST_WRITE_BACKOFF = float(os.getenv("INGEST_WRITE_BACKOFF", "1.0"))  # 첫 재시도 대기(초), 시도마다 두 배 (최대 30초)
+
+# 카운팅 사진 썸네일/WebP 변환 (원본 SHA-256 기준으로 디스크에 캐시)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))  # 이미지 변환 프로세스 풀 크기
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(CACHE_DIR, "images"))
+IMAGE_THUMB_SIZE = int(os.getenv("IMAGE_THUMB_SIZE", "320"))  # 썸네일 긴 변(px)
+IMAGE_WEBP_SIZE = int(os.getenv("IMAGE_WEBP_SIZE", "1280"))  # 상세 보기용 WebP 긴 변(px)
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", str(365 * 24 * 3600)))  # 해시 주소 응답의 Cache-Control max-age
+# 파일명 주소 → 해시 주소 리디렉트를 브라우저가 캐시하는 시간(초)
+# (같은 파일명으로 사진을 다시 저장하면 최대 이 시간 동안 이전 사진이 보일 수 있음)
+IMAGE_REDIRECT_MAX_AGE = int(os.getenv("IMAGE_REDIRECT_MAX_AGE", "300"))
+
+# 카운팅 결과 감시 폴더
+# WATCH_SOURCES가 비어 있으면 WATCH_DIR 하나를 기본 스테이션으로 감시
+# 여러 스테이션: station1=D:\counting1;station2=\\nas\counting2|poll (|poll: 폴링 감시, UNC 경로는 자동)
+WATCH_DIR = os.getenv("WATCH_DIR", "C:\\Users\\EX_Mila\\Desktop\\counting_results")
+WATCH_SOURCES = os.getenv("WATCH_SOURCES", "")
+DEFAULT_STATION = "default"  # WATCH_SOURCES 없이 WATCH_DIR 하나만 감시할 때의 스테이션 id
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "2.0"))  # 폴링 감시 주기(초)
+
+# 로그 (수집 경로는 key=value 형식의 구조화 로그)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# WebSocket 브로드캐스트 (클라이언트별 송신 대기열)
+WS_CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "256"))  # 넘치면 느린 클라이언트로 보고 연결 종료
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5.0"))  # 메시지 하나 전송 제한 시간(초)
+WS_BATCH_WINDOW = float(os.getenv("WS_BATCH_WINDOW_MS", "50")) / 1000  # 이 시간 동안 모인 이벤트를 한 프레임으로 (0이면 즉시 전송)
+WS_REPLAY_BUFFER = int(os.getenv("WS_REPLAY_BUFFER", "1000"))  # 재연결 시 다시 보내줄 최근 카운팅 이벤트 수
+
+# 여러 uvicorn 워커 간 브로드캐스트 중계 (비우면 프로세스 내부 전달)
+#   sqlite:///C:/exion/bus.db  → 같은 서버의 워커끼리 SQLite 파일로 중계
+#   redis://localhost:6379/0   → Redis 프로토콜 서버로 PUBLISH/SUBSCRIBE
+BACKPLANE_URL = os.getenv("BACKPLANE_URL", "")
+BACKPLANE_CHANNEL = os.getenv("BACKPLANE_CHANNEL", "exion:events")
+BACKPLANE_POLL_INTERVAL = float(os.getenv("BACKPLANE_POLL_INTERVAL", "0.02"))  # SQLite 중계 확인 주기(초)
+BACKPLANE_RETENTION = int(os.getenv("BACKPLANE_RETENTION", "10000"))  # SQLite 중계 테이블에 남길 최근 메시지 수
+# 감시(watcher)는 워커 중 하나만 실행: 이 파일 잠금을 잡은 워커가 리더
+WATCHER_LOCK_FILE = os.getenv("WATCHER_LOCK_FILE", os.path.join(CACHE_DIR, "watcher.lock"))
+WATCHER_LEADER_RETRY = float(os.getenv("WATCHER_LEADER_RETRY", "5.0"))  # 리더가 아닐 때 잠금 재시도 주기(초)
+
+# /api/reports 페이지 크기 (커서 기반)
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", "100"))
+REPORT_PAGE_MAX = int(os.getenv("REPORT_PAGE_MAX", "1000"))
+
+# /inventory 페이지 크기 (offset 기반, 선반 화면은 한 번에 한 선반 정도)
+INVENTORY_PAGE_SIZE = int(os.getenv("INVENTORY_PAGE_SIZE", "500"))
+INVENTORY_PAGE_MAX = int(os.getenv("INVENTORY_PAGE_MAX", "2000"))
+
+# counting_log.counted_at 채우기 (시작 시 백그라운드에서 청크 단위로 실행)
+COUNTED_AT_MIGRATION_CHUNK = int(os.getenv("COUNTED_AT_MIGRATION_CHUNK", "5000"))
+COUNTED_AT_MIGRATION_PAUSE = float(os.getenv("COUNTED_AT_MIGRATION_PAUSE", "0.05"))  # 청크 사이 쉬는 시간(초), 수집 쓰기에 양보
+COUNTED_AT_MIGRATION_LOCK = os.getenv("COUNTED_AT_MIGRATION_LOCK", os.path.join(CACHE_DIR, "counted_at.lock"))
+COUNTED_AT_MIGRATION_RETRY = float(os.getenv("COUNTED_AT_MIGRATION_RETRY", "5.0"))  # 다른 워커가 채우는 중일 때 잠금 재시도 간격(초)
+
+# /api/reports/export: DB 서버 측 커서에서 한 번에 가져와 파일에 쓰는 행 수 (메모리 사용량 기준)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+# counting_log 보관 (닫힌 달을 ARCHIVE_DIR/counting_log/YYYY-MM.parquet 로 옮기고 DB에서 삭제)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(BASE_DIR, "archive"))
+ARCHIVE_KEEP_MONTHS = int(os.getenv("ARCHIVE_KEEP_MONTHS", "3"))  # 현재 달을 포함해 DB에 남길 달 수
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", "86400"))  # 자동 보관 주기(초), 0이면 scripts/archive_counting_log.py로만
+ARCHIVE_LOCK_FILE = os.getenv("ARCHIVE_LOCK_FILE", os.path.join(CACHE_DIR, "archive.lock"))
@@ -0,0 +1,178 @@
+"""
+    카운팅 이력 내보내기 (/api/reports/export)
+    - DB 서버 측 커서(yield_per)에서 EXPORT_CHUNK_SIZE 행씩 읽어 바로 파일 형식으로 변환해 내보냄
+      → 행 수와 관계없이 메모리 사용량 일정
+    - csv: 조각마다 바로 전송 (Excel에서 한글이 깨지지 않도록 UTF-8 BOM)
+    - parquet: 조각마다 row group 하나씩 기록하고 쌓인 바이트를 바로 전송 (pyarrow 필요)
+    - xlsx: zip 형식이라 끝까지 써야 완성됨 → 스트리밍이 아님: openpyxl write_only로 임시 파일에 모두 쓴 뒤 전송 시작
+      (메모리는 일정하지만 첫 바이트까지 전체 조회 시간이 걸림, 시트당 행 상한을 넘으면 다음 시트로 나눔)
+"""
+import csv
+import io
+import os
+import tempfile
+from openpyxl import Workbook
+from app.config import EXPORT_CHUNK_SIZE
+from app.database import SessionLocal
+from app.models import CountingLog
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# 내보낼 컬럼 (순서대로)
+EXPORT_COLUMNS = [
+    CountingLog.id,
+    CountingLog.counted_at,
+    CountingLog.timestamp,
+    CountingLog.station_id,
+    CountingLog.drug_standard_code,
+    CountingLog.drug_refer_code,
+    CountingLog.drug_name,
+    CountingLog.count_quantity,
+    CountingLog.event_key,  # 내용 기준 중복 방지 키 (보관본과 DB 행의 중복 제거에도 사용)
+]
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+FILE_CHUNK = 64 * 1024
+XLSX_MAX_ROWS = 1048576  # Excel 시트당 최대 행 수 (머리글 포함)
+
+
+def iter_log_chunks(conditions: list, chunk: int = EXPORT_CHUNK_SIZE):
+    # 응답 스트리밍 중에는 요청 세션이 닫힐 수 있으므로 생성기 안에서 세션을 직접 염
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(*EXPORT_COLUMNS)
+            .filter(*conditions)
+            .order_by(CountingLog.counted_at, CountingLog.id)
+            .yield_per(chunk)
+        )
+        rows = []
+        for row in query:
+            rows.append(tuple(row))
+            if len(rows) >= chunk:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+    finally:
+        db.close()
+
+
+def csv_stream(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(EXPORT_HEADER)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class ByteSink:
+    # ParquetWriter 출력 대상: 쓰인 바이트를 모아 두었다가 drain()으로 꺼냄
+    # (꺼낸 뒤에도 tell()은 누적 위치를 반환해야 footer의 오프셋이 맞음)
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def parquet_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("counted_at", pa.timestamp("s")),
+        ("timestamp", pa.string()),
+        ("station_id", pa.string()),
+        ("drug_standard_code", pa.string()),
+        ("drug_refer_code", pa.string()),
+        ("drug_name", pa.string()),
+        ("count_quantity", pa.int64()),
+        ("event_key", pa.string()),
+    ])
+
+
+def parquet_stream(chunks):
+    schema = parquet_schema()
+    sink = ByteSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in chunks:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def xlsx_stream(chunks):
+    # 버퍼링 후 전송: 모든 행을 임시 파일에 쓴 다음에야 첫 바이트를 보냄
+    workbook = Workbook(write_only=True)  # 행을 메모리에 쌓지 않고 임시 파일로 바로 씀
+    sheets = 0
+    written = XLSX_MAX_ROWS
+    for rows in chunks:
+        for row in rows:
+            if written >= XLSX_MAX_ROWS:
+                # 시트 행 상한에 닿으면 머리글과 함께 다음 시트 (counting_log, counting_log_2, ...)
+                sheets += 1
+                sheet = workbook.create_sheet("counting_log" if sheets == 1 else f"counting_log_{sheets}")
+                sheet.append(EXPORT_HEADER)
+                written = 1
+            sheet.append(row)
+            written += 1
+    if not sheets:
+        workbook.create_sheet("counting_log").append(EXPORT_HEADER)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(FILE_CHUNK)
+                if not data:
+                    break
+                yield data
+    finally:
+        os.remove(path)
+
+
+# 형식 → (Content-Type, 확장자, 변환 함수)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv", csv_stream),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx", xlsx_stream),
+    "parquet": ("application/vnd.apache.parquet", "parquet", parquet_stream),
+}
@@ -0,0 +1,143 @@
+"""
+    카운팅 사진 변환 파이프라인
+    1. watcher가 이미지 생성/수정 이벤트를 넣으면 DebouncedQueue에서 파일별로 합침
+    2. 디스패처 스레드가 프로세스 풀에 넘겨 썸네일 + 압축 WebP 생성 (이벤트 루프/observer를 막지 않음)
+       (풀은 spawn으로 시작: 스레드가 도는 서버 프로세스를 fork하면 잠금/DB 커넥션을 물려받음)
+    3. 결과는 원본 SHA-256 기준 디렉토리(IMAGE_CACHE_DIR/ab/abcd…/thumb.webp)에 저장
+       → 같은 사진은 한 번만 변환, 파일명이 바뀌어도 재사용
+    4. 아직 변환되지 않은 사진을 요청하면 그 자리에서 변환 (lookup)
+    Pillow가 없으면 변환 없이 원본만 제공
+"""
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from app.config import (
+    IMAGE_WORKERS, IMAGE_CACHE_DIR, IMAGE_THUMB_SIZE, IMAGE_WEBP_SIZE, IMAGE_WEBP_QUALITY, INGEST_RECENT_FILES,
+)
+from app.ingest import DebouncedQueue
+from scripts.result_cache import sha256_path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# 변환 종류 → 긴 변 최대 크기(px)
+VARIANTS = {"thumb": IMAGE_THUMB_SIZE, "webp": IMAGE_WEBP_SIZE}
+
+
+def variant_path(digest: str, variant: str, cache_dir: str = IMAGE_CACHE_DIR) -> str:
+    return os.path.join(cache_dir, digest[:2], digest, f"{variant}.webp")
+
+
+# ------------------ 프로세스 풀에서 실행되는 함수 ------------------ #
+def render_variants(path: str, cache_dir: str = IMAGE_CACHE_DIR, variants: dict = None, quality: int = IMAGE_WEBP_QUALITY) -> str:
+    # 원본 해시를 계산하고 없는 변환본만 만들어 저장: 해시 반환
+    variants = variants or VARIANTS
+    digest = sha256_path(path)
+    missing = [
+        (name, size) for name, size in variants.items()
+        if not os.path.exists(variant_path(digest, name, cache_dir))
+    ]
+    if not missing or Image is None:
+        return digest
+
+    os.makedirs(os.path.dirname(variant_path(digest, "thumb", cache_dir)), exist_ok=True)
+    with Image.open(path) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        # 큰 크기부터 줄여 나가면 다음 변환의 입력이 작아짐
+        for name, size in sorted(missing, key=lambda v: -v[1]):
+            img.thumbnail((size, size), Image.LANCZOS)
+            target = variant_path(digest, name, cache_dir)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            img.save(tmp, "WEBP", quality=quality, method=4)
+            os.replace(tmp, target)  # 읽는 쪽에는 완성된 파일만 보이도록
+    return digest
+
+
+# ------------------ 파이프라인 ------------------ #
+class ImagePipeline:
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self.events = DebouncedQueue()
+        self.pool = None
+        self.digests = OrderedDict()  # 파일 경로 → (mtime_ns, size, 해시), 크기 제한
+        self.lock = threading.Lock()
+        self.dispatcher = None
+
+    def start(self):
+        if Image is None:
+            print("⚠️ Pillow가 없어 이미지 썸네일/WebP 변환을 건너뜁니다 (원본만 제공)")
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True, name="image-dispatcher")
+        self.dispatcher.start()
+
+    def stop(self):
+        self.events.close()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def submit(self, path: str):
+        # observer 스레드에서는 경로만 넣고 바로 반환
+        self.events.put(path)
+
+    def _cached(self, path: str, stat) -> str:
+        with self.lock:
+            entry = self.digests.get(path)
+            if entry and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self.digests.move_to_end(path)
+                return entry[2]
+        return None
+
+    def _remember(self, path: str, stat, digest: str):
+        with self.lock:
+            self.digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            self.digests.move_to_end(path)
+            while len(self.digests) > INGEST_RECENT_FILES:
+                self.digests.popitem(last=False)
+
+    def _dispatch_loop(self):
+        while True:
+            path = self.events.get()
+            if path is None:
+                return
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if self._cached(path, stat):
+                continue
+            future = self.pool.submit(render_variants, path)
+            future.add_done_callback(lambda f, path=path, stat=stat: self._done(path, stat, f))
+
+    def _done(self, path: str, stat, future):
+        try:
+            digest = future.result()
+        except Exception as e:
+            print("❌ 이미지 변환 실패:", os.path.basename(path), e)
+            return
+        self._remember(path, stat, digest)
+        print(f"🖼️ 이미지 변환 완료: {os.path.basename(path)}")
+
+    def lookup(self, path: str) -> str:
+        # 원본 해시 반환 (변환본이 없으면 지금 만들어 둠), 원본이 없으면 FileNotFoundError
+        stat = os.stat(path)
+        digest = self._cached(path, stat)
+        if digest:
+            return digest
+        if self.pool is not None:
+            digest = self.pool.submit(render_variants, path).result()
+        else:
+            digest = render_variants(path)
+        self._remember(path, stat, digest)
+        return digest
+
+
+image_pipeline = ImagePipeline()
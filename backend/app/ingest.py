@@ -0,0 +1,589 @@
+"""
+    카운팅 결과(JSON) 수집 파이프라인
+    1. 감시 소스(WATCH_SOURCES)마다 DebouncedQueue + 파싱 워커 하나
+       → 파일별 생성/수정 이벤트를 INGEST_DEBOUNCE 동안 합치고, 스테이션 안에서는 이벤트 순서대로 처리
+       → 스테이션이 늘면 파싱 워커도 함께 늘어남
+    2. CountingLogWriter: INGEST_BATCH_SIZE / INGEST_FLUSH_INTERVAL 단위로 모아
+       한 문장의 INSERT-or-ignore + 커밋 (중복은 event_key 유니크 제약이 차단, 실패 시 간격을 늘려 재시도)
+       → 실제로 새로 들어간 행만 WebSocket으로 브로드캐스트
+    3. ingest_ledger: 처리한 파일(이름 + 수정 시각 + 크기)을 같은 트랜잭션에 기록
+       → 재시작 시 reconcile()이 바뀐 파일만 다시 넣음 (실시간 감시와 동시에 실행)
+       → 업그레이드 직후 ledger가 비어 있으면 seed_ledger()가 기존 행과 맞는 파일로 먼저 채움
+    단계별 소요 시간 / 처리량 / 중복률 / 오류 수는 app.metrics (/metrics)와 구조화 로그로 남김
+"""
+import hashlib
+import heapq
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime
+from app.config import (
+    DEFAULT_STATION, INGEST_DEBOUNCE, INGEST_BATCH_SIZE, INGEST_FLUSH_INTERVAL, INGEST_RECENT_FILES,
+    INGEST_WRITE_RETRIES, INGEST_WRITE_BACKOFF,
+)
+from sqlalchemy import select, func, update, bindparam
+from app.database import SessionLocal
+from app.metrics import (
+    INGEST_STAGE_SECONDS, INGEST_END_TO_END_SECONDS, INGEST_FILES, INGEST_ROWS, INGEST_ERRORS,
+    INGEST_QUEUE_DEPTH, INGEST_BATCH_ROWS,
+)
+from app.models import CountingLog, IngestLedger, ArchivedEventKey, Drug, Inventory
+from app.rollups import apply_rollups
+from app.utils.bulk import upsert_statement, insert_ignore_statement
+from app.utils.logs import get_logger, log_event
+from app.utils.timestamps import parse_counting_timestamp
+from app.websocket_manager import broadcast
+
+logger = get_logger(__name__)
+
+PARSE_RETRIES = 3  # 쓰는 중인 파일(JSON 깨짐)을 다시 시도할 횟수
+LEDGER_SEED_CHUNK = 1000  # seed_ledger()가 한 번에 DB와 비교할 파일 수
+
+
+class WatchSource(namedtuple("WatchSource", "station_id path polling")):
+    @property
+    def image_dir(self) -> str:
+        return os.path.join(self.path, "images")
+
+
+def parse_watch_sources(spec: str, default_dir: str) -> list:
+    # station1=D:\a;station2=\\nas\b|poll → [WatchSource, ...]
+    if not spec.strip():
+        return [WatchSource(DEFAULT_STATION, default_dir, default_dir.startswith(("\\\\", "//")))]
+
+    sources = []
+    for entry in filter(None, (e.strip() for e in spec.split(";"))):
+        station_id, sep, path = entry.partition("=")
+        if not sep or not station_id.strip() or not path.strip():
+            raise ValueError(f"WATCH_SOURCES 형식 오류: {entry!r} (station=경로[|poll])")
+        path, _, mode = path.partition("|")
+        path = path.strip()
+        polling = mode.strip().lower() == "poll" or path.startswith(("\\\\", "//"))
+        sources.append(WatchSource(station_id.strip(), path, polling))
+
+    station_ids = [s.station_id for s in sources]
+    if len(set(station_ids)) != len(station_ids):
+        raise ValueError(f"WATCH_SOURCES에 중복된 스테이션 id가 있습니다: {station_ids}")
+    return sources
+
+
+def source_key(station_id: str, filename: str) -> str:
+    # 기본 스테이션은 기존 기록과 맞도록 파일명 그대로, 나머지는 스테이션별로 구분
+    return filename if station_id == DEFAULT_STATION else f"{station_id}/{filename}"
+
+
+class DebouncedQueue:
+    def __init__(self, delay: float = INGEST_DEBOUNCE):
+        self.delay = delay
+        self._due = {}  # path → 처리 예정 시각
+        self._heap = []  # (처리 예정 시각, path), _due와 다르면 오래된 항목
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, path: str, delay: float = None):
+        # 같은 경로가 이미 대기 중이면 처리 시각만 뒤로 미룸
+        due = time.monotonic() + (self.delay if delay is None else delay)
+        with self._cond:
+            self._due[path] = due
+            heapq.heappush(self._heap, (due, path))
+            self._cond.notify()
+
+    def get(self):
+        # 처리 시각이 된 경로 하나를 반환 (close 후에는 None)
+        with self._cond:
+            while not self._closed:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, path = self._heap[0]
+                if self._due.get(path) != due:
+                    heapq.heappop(self._heap)
+                    continue
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                del self._due[path]
+                return path
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._due)
+
+
+def file_state(path: str, station_id: str = DEFAULT_STATION, stat=None) -> dict:
+    # ingest_ledger에 기록할 파일 상태
+    stat = stat or os.stat(path)
+    return {
+        "source_filename": source_key(station_id, os.path.basename(path)),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+
+
+def parse_counting_file(path: str, station_id: str = DEFAULT_STATION) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    row = {
+        "timestamp": data.get("timestamp"),
+        "drug_name": data.get("drug_name").strip(),
+        "drug_standard_code": data.get("drug_standard_code").strip(),
+        "drug_refer_code": data.get("drug_refer_code"),
+        "count_quantity": int(data.get("count_quantity")),
+        "source_filename": source_key(station_id, os.path.basename(path)),
+        "station_id": station_id,
+    }
+    row["counted_at"] = parse_counting_timestamp(row["timestamp"])
+    row["event_key"] = event_key(row)
+    return row
+
+
+def event_key(row: dict) -> str:
+    # 같은 카운팅 결과(시각, 표준코드, 약품명, 수량)는 같은 키 → DB 유니크 제약으로 중복 차단
+    # 기본 외 스테이션은 스테이션 id도 포함 (다른 기계의 같은 시각/같은 수량 결과를 구분)
+    raw = "|".join(str(row[c]) for c in ("timestamp", "drug_standard_code", "drug_name", "count_quantity"))
+    station_id = row.get("station_id") or DEFAULT_STATION
+    if station_id != DEFAULT_STATION:
+        raw = f"{station_id}|{raw}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def insert_counting_logs(db, rows: list) -> dict:
+    # 한 문장의 INSERT-or-ignore로 저장하고 실제로 새로 들어간 행만 {event_key: id}로 반환
+    if not rows:
+        return {}
+    table = CountingLog.__table__
+    stmt = insert_ignore_statement(db.bind, table, rows)
+
+    if db.bind.dialect.insert_returning:
+        result = db.execute(stmt.returning(table.c.id, table.c.event_key))
+        return {key: log_id for log_id, key in result}
+
+    # RETURNING 미지원(MySQL): 삽입 전 최대 id 이후에 생긴 행만 새 행으로 판단 (writer는 하나)
+    max_id = db.execute(select(func.max(table.c.id))).scalar() or 0
+    db.execute(stmt)
+    result = db.execute(
+        select(table.c.id, table.c.event_key).where(
+            table.c.event_key.in_([row["event_key"] for row in rows]),
+            table.c.id > max_id,
+        )
+    )
+    return {key: log_id for log_id, key in result}
+
+
+def archived_event_keys(db, keys) -> set:
+    # 보관(app/archive.py)으로 counting_log에서 지운 행의 키 → 유니크 제약이 없으므로 따로 확인
+    keys = list(keys)
+    if not keys:
+        return set()
+    return set(db.execute(select(ArchivedEventKey.event_key).where(ArchivedEventKey.event_key.in_(keys))).scalars())
+
+
+def cabinets_by_code(db, codes: set) -> dict:
+    # 표준코드 → 그 약품이 보관된 캐비넷 목록 (WebSocket 캐비넷 구독용)
+    if not codes:
+        return {}
+    result = {}
+    for code, cabinet in db.execute(
+        select(Drug.standard_code, Inventory.cabinet)
+        .join(Inventory, Inventory.drug_id == Drug.id)
+        .where(Drug.standard_code.in_(codes), Inventory.cabinet.isnot(None))
+        .distinct()
+    ):
+        result.setdefault(code, []).append(cabinet)
+    return result
+
+
+def seed_ledger(sources: list, chunk: int = LEDGER_SEED_CHUNK) -> int:
+    # 업그레이드 직후(ledger가 비어 있고 counting_log에 기존 행이 있음) 폴더의 파일을 기존 행과 맞춰 ledger를 채움
+    # → 첫 reconcile()이 이미 저장된 과거 파일 전체를 다시 넣지 않음 (DB에 없는 파일만 대기열로)
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        if db.query(IngestLedger.id).first() is not None or db.query(CountingLog.id).first() is None:
+            return 0
+
+        now = datetime.now()
+        seeded = 0
+        pending = []
+        for source in sources:
+            if not os.path.isdir(source.path):
+                continue
+            with os.scandir(source.path) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    try:
+                        state = file_state(entry.path, source.station_id, entry.stat())
+                        row = parse_counting_file(entry.path, source.station_id)
+                    except Exception:
+                        continue  # reconcile()이 다시 읽어 오류를 기록
+                    pending.append((state, row))
+                    if len(pending) >= chunk:
+                        seeded += _seed_ledger_chunk(db, pending, now)
+                        pending = []
+        seeded += _seed_ledger_chunk(db, pending, now)
+    finally:
+        db.close()
+
+    log_event(logger, "ledger_seeded", files=seeded, seconds=time.monotonic() - started)
+    return seeded
+
+
+def _seed_ledger_chunk(db, pending: list, now: datetime) -> int:
+    # 이미 저장(또는 보관)된 내용(event_key)의 파일만 ledger에 ok로 기록 + 파일명이 비어 있는 기존 행에 파일명 채움
+    if not pending:
+        return 0
+    table = CountingLog.__table__
+    keys = {row["event_key"] for _, row in pending}
+    stored = dict(db.execute(
+        select(table.c.event_key, table.c.source_filename).where(table.c.event_key.in_(list(keys)))
+    ).all())
+    archived = archived_event_keys(db, keys - set(stored))
+    if not stored and not archived:
+        return 0
+
+    names = {}  # event_key → 파일명 (같은 내용의 파일이 여럿이면 첫 파일)
+    for state, row in pending:
+        if row["event_key"] in stored and stored[row["event_key"]] is None:
+            names.setdefault(row["event_key"], state["source_filename"])
+    if names:
+        # 다른 행이 이미 쓰는 파일명은 제외 (source_filename 유니크 제약)
+        taken = set(db.execute(
+            select(table.c.source_filename).where(table.c.source_filename.in_(list(names.values())))
+        ).scalars())
+        params = [{"log_key": key, "name": name} for key, name in names.items() if name not in taken]
+        if params:
+            db.execute(
+                update(table).where(table.c.event_key == bindparam("log_key")).values(source_filename=bindparam("name")),
+                params,
+            )
+
+    ledger = {
+        state["source_filename"]: {**state, "status": "ok", "processed_at": now}
+        for state, row in pending
+        if row["event_key"] in stored or row["event_key"] in archived
+    }
+    db.execute(upsert_statement(
+        db.bind,
+        IngestLedger.__table__,
+        list(ledger.values()),
+        key_columns=["source_filename"],
+        update_columns=["mtime_ns", "size", "status", "processed_at"],
+    ))
+    db.commit()
+    return len(ledger)
+
+
+class CountingLogWriter(threading.Thread):
+    def __init__(self, loop, batch_size: int = INGEST_BATCH_SIZE, flush_interval: float = INGEST_FLUSH_INTERVAL):
+        super().__init__(daemon=True, name="counting-log-writer")
+        self.loop = loop
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.recent = OrderedDict()  # 최근 처리한 파일 → (mtime_ns, size), 크기 제한
+        self.recent_lock = threading.Lock()
+
+    def put(self, row, state: dict, observed: float = None):
+        # row가 None이면 파싱 실패 파일 (ledger에만 error로 기록)
+        # observed: 실시간 이벤트로 들어온 파일이면 감지 시각 (종단 간 지연 측정용)
+        self.queue.put((row, state, observed))
+
+    def is_processed(self, state: dict) -> bool:
+        with self.recent_lock:
+            return self.recent.get(state["source_filename"]) == (state["mtime_ns"], state["size"])
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self.write_with_retry(batch)
+
+    def write_with_retry(self, batch: list):
+        # DB 일시 장애(연결 끊김/잠금 대기 초과 등)는 같은 배치를 간격을 늘려 가며 다시 시도
+        # ledger/최근 처리 기록은 커밋이 성공해야 남으므로, 끝내 실패한 파일은 다음 reconcile()이 다시 넣음
+        # (이미 커밋된 배치를 다시 써도 event_key 유니크 제약이 막아 집계가 두 번 반영되지 않음)
+        delay = INGEST_WRITE_BACKOFF
+        for attempt in range(INGEST_WRITE_RETRIES + 1):
+            try:
+                self.write(batch)
+                return
+            except Exception as e:
+                INGEST_ERRORS.inc(stage="db_write")
+                if attempt == INGEST_WRITE_RETRIES:
+                    log_event(logger, "db_write_dropped", logging.ERROR, files=len(batch), attempts=attempt + 1, error=repr(e))
+                    return
+                log_event(
+                    logger, "db_write_failed", logging.WARNING,
+                    files=len(batch), attempt=attempt + 1, retry_in=delay, error=repr(e),
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def write(self, batch: list):
+        # 파일명 → 행 (같은 파일이 여러 번 오면 마지막 내용), ledger 상태
+        now = datetime.now()
+        files = {}
+        ledger = {}
+        written_at = {}  # event_key → 파일이 쓰인 시각 (실시간 이벤트만)
+        for row, state, observed in batch:
+            name = state["source_filename"]
+            ledger[name] = {**state, "status": "ok" if row else "error", "processed_at": now}
+            if row:
+                files[name] = row
+                if observed is not None:
+                    written_at[row["event_key"]] = state["mtime_ns"] / 1e9
+
+        # 배치 안 중복을 먼저 합치고, DB 중복은 유니크 제약(event_key, source_filename)으로 무시
+        rows = {}
+        for row in files.values():
+            rows.setdefault(row["event_key"], row)
+
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            # 보관된 달의 행은 counting_log에 없으므로 보관 키로 중복 판단
+            archived = archived_event_keys(db, rows)
+            inserted = insert_counting_logs(db, [row for key, row in rows.items() if key not in archived])
+            # 새로 들어간 행만 집계 테이블에 반영 (같은 트랜잭션 → 원본과 집계가 항상 일치)
+            apply_rollups(db, [rows[key] for key in inserted])
+            db.execute(upsert_statement(
+                db.bind,
+                IngestLedger.__table__,
+                list(ledger.values()),
+                key_columns=["source_filename"],
+                update_columns=["mtime_ns", "size", "status", "processed_at"],
+            ))
+            db.commit()
+            elapsed = time.perf_counter() - started
+            try:
+                cabinets = cabinets_by_code(db, {rows[key]["drug_standard_code"] for key in inserted})
+            except Exception as e:
+                # 이미 커밋됨: 캐비넷 정보 없이 브로드캐스트
+                cabinets = {}
+                log_event(logger, "cabinet_lookup_failed", logging.WARNING, error=repr(e))
+        finally:
+            db.close()
+
+        duplicates = len(files) - len(inserted)
+        INGEST_STAGE_SECONDS.observe(elapsed, stage="db_write")
+        INGEST_BATCH_ROWS.observe(len(batch))
+        INGEST_ROWS.inc(len(inserted), result="inserted")
+        INGEST_ROWS.inc(duplicates, result="duplicate")
+
+        messages = sorted(
+            (
+                {
+                    "type": "counting",
+                    "id": log_id,
+                    "timestamp": rows[key]["timestamp"],
+                    "drug_name": rows[key]["drug_name"],
+                    "drug_standard_code": rows[key]["drug_standard_code"],
+                    "count_quantity": rows[key]["count_quantity"],
+                    "station_id": rows[key]["station_id"],
+                    "cabinets": sorted(cabinets.get(rows[key]["drug_standard_code"], [])),
+                }
+                for key, log_id in inserted.items()
+            ),
+            key=lambda m: m["id"],
+        )
+
+        with self.recent_lock:
+            for state in ledger.values():
+                self.recent[state["source_filename"]] = (state["mtime_ns"], state["size"])
+                self.recent.move_to_end(state["source_filename"])
+            while len(self.recent) > INGEST_RECENT_FILES:
+                self.recent.popitem(last=False)
+
+        log_event(
+            logger, "db_write",
+            files=len(batch), rows=len(files), inserted=len(inserted), duplicate=duplicates,
+            errors=len(ledger) - len(files), seconds=elapsed,
+        )
+
+        if messages:
+            written = [written_at.get(key) for key in sorted(inserted, key=inserted.get)]
+            self.loop.call_soon_threadsafe(lambda: self.loop.create_task(self._broadcast(messages, written)))
+
+    async def _broadcast(self, messages: list, written: list):
+        started = time.perf_counter()
+        failed = 0
+        for message in messages:
+            try:
+                await broadcast(message)
+            except Exception as e:
+                failed += 1
+                INGEST_ERRORS.inc(stage="broadcast")
+                log_event(logger, "broadcast_failed", logging.WARNING, id=message["id"], error=repr(e))
+        elapsed = time.perf_counter() - started
+        INGEST_STAGE_SECONDS.observe(elapsed, stage="broadcast")
+
+        # 파일이 쓰인 시각 → 브로드캐스트 완료까지 (시작 시 동기화로 들어온 파일은 제외)
+        now = time.time()
+        for message, written_at in zip(messages, written):
+            if written_at is not None:
+                INGEST_END_TO_END_SECONDS.observe(max(now - written_at, 0.0), station=message["station_id"])
+        log_event(logger, "broadcast", messages=len(messages), failed=failed, seconds=elapsed)
+
+
+class SourceWorker(threading.Thread):
+    # 감시 소스 하나의 이벤트를 순서대로 파싱해 writer에 넘김
+    def __init__(self, source: WatchSource, writer: CountingLogWriter):
+        super().__init__(daemon=True, name=f"counting-parser-{source.station_id}")
+        self.source = source
+        self.writer = writer
+        self.events = DebouncedQueue()
+        self.retries = {}
+        self.observed = {}  # path → 첫 실시간 이벤트 감지 시각 (대기열에서 합쳐진 이벤트 중 가장 이른 것)
+        self.observed_lock = threading.Lock()
+
+    def submit(self, path: str, delay: float = None, live: bool = True):
+        # observer 스레드에서는 경로만 넣고 바로 반환
+        if live:
+            with self.observed_lock:
+                self.observed.setdefault(path, time.time())
+        self.events.put(path, delay)
+
+    def _record(self, result: str):
+        INGEST_FILES.inc(station=self.source.station_id, result=result)
+
+    def run(self):
+        station_id = self.source.station_id
+        while True:
+            path = self.events.get()
+            if path is None:
+                return
+            with self.observed_lock:
+                observed = self.observed.pop(path, None)
+            state = None
+            try:
+                state = file_state(path, station_id)
+                if self.writer.is_processed(state):
+                    self._record("skipped")
+                    continue
+                started = time.perf_counter()
+                row = parse_counting_file(path, station_id)
+                parse_seconds = time.perf_counter() - started
+            except FileNotFoundError:
+                continue
+            except json.JSONDecodeError:
+                # 아직 쓰는 중인 파일일 수 있으므로 몇 번 더 시도
+                count = self.retries.get(path, 0) + 1
+                if count < PARSE_RETRIES:
+                    self.retries[path] = count
+                    self.events.put(path)
+                else:
+                    self.retries.pop(path, None)
+                    self._record("error")
+                    INGEST_ERRORS.inc(stage="parse")
+                    log_event(logger, "parse_failed", logging.ERROR, station=station_id, path=path, error="invalid json")
+                    self.writer.put(None, state)
+                continue
+            except Exception as e:
+                self._record("error")
+                INGEST_ERRORS.inc(stage="parse")
+                log_event(logger, "parse_failed", logging.ERROR, station=station_id, path=path, error=repr(e))
+                if state:
+                    self.writer.put(None, state)
+                continue
+
+            self.retries.pop(path, None)
+            self._record("parsed")
+            INGEST_STAGE_SECONDS.observe(parse_seconds, stage="parse")
+            fields = {}
+            if observed is not None:
+                # file_event: 기계가 파일을 쓴 시각 → watcher 감지, queue: 감지 → 파싱 시작 (디바운스 포함)
+                file_event = max(observed - state["mtime_ns"] / 1e9, 0.0)
+                queued = max(time.time() - parse_seconds - observed, 0.0)
+                INGEST_STAGE_SECONDS.observe(file_event, stage="file_event")
+                INGEST_STAGE_SECONDS.observe(queued, stage="queue")
+                fields = {"file_event_seconds": file_event, "queue_seconds": queued}
+            log_event(
+                logger, "parsed", logging.DEBUG,
+                station=station_id, file=row["source_filename"], parse_seconds=parse_seconds, **fields,
+            )
+            self.writer.put(row, state, observed)
+
+    def reconcile(self, ledger: dict) -> tuple:
+        # ledger와 폴더를 비교해 새 파일/바뀐 파일만 대기열에 넣음: (전체 수, 대기열에 넣은 수)
+        total = 0
+        queued = 0
+        with os.scandir(self.source.path) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                total += 1
+                stat = entry.stat()
+                if ledger.get(source_key(self.source.station_id, entry.name)) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                self.submit(entry.path, delay=0, live=False)
+                queued += 1
+        return total, queued
+
+
+class IngestPipeline:
+    def __init__(self, loop, sources: list):
+        # DB 쓰기는 writer 하나가 모든 스테이션의 배치를 모아서 처리 (MySQL 신규 행 판별이 writer 하나를 전제)
+        self.writer = CountingLogWriter(loop)
+        self.workers = {source.station_id: SourceWorker(source, self.writer) for source in sources}
+
+    def start(self):
+        INGEST_QUEUE_DEPTH.set_function(self.queue_depths)
+        self.writer.start()
+        for worker in self.workers.values():
+            worker.start()
+
+    def queue_depths(self) -> dict:
+        depths = {(f"station:{station_id}",): len(worker.events) for station_id, worker in self.workers.items()}
+        depths[("writer",)] = self.writer.queue.qsize()
+        return depths
+
+    def submit(self, station_id: str, path: str, delay: float = None):
+        self.workers[station_id].submit(path, delay)
+
+    def reconcile(self):
+        # 재시작 시 ledger를 한 번만 읽어 모든 소스와 비교
+        started = time.monotonic()
+        db = SessionLocal()
+        try:
+            ledger = {
+                name: (mtime_ns, size)
+                for name, mtime_ns, size in db.query(
+                    IngestLedger.source_filename, IngestLedger.mtime_ns, IngestLedger.size
+                ).yield_per(10000)
+            }
+        finally:
+            db.close()
+
+        for station_id, worker in self.workers.items():
+            try:
+                total, queued = worker.reconcile(ledger)
+            except OSError as e:
+                INGEST_ERRORS.inc(stage="reconcile")
+                log_event(logger, "reconcile_failed", logging.ERROR, station=station_id, error=repr(e))
+                continue
+            log_event(
+                logger, "reconcile",
+                station=station_id, files=total, queued=queued, seconds=time.monotonic() - started,
+            )
@@ -0,0 +1,256 @@
+"""
+    업로드 매칭 백그라운드 작업 큐
+    - 업로드 파일은 JOB_DIR에 저장하고 작업 id를 바로 반환
+    - 파싱/매칭은 프로세스 풀에서 실행 (이벤트 루프와 /ws 브로드캐스트를 막지 않음)
+    - 조각 단위 매칭이 끝날 때마다 진행률 + 부분 결과를 WebSocket으로 전송
+      → 그 작업을 구독한 클라이언트에게만 ({"action": "subscribe", "job_ids": ["<job_id>"]})
+    - 작업 상태/결과는 JOB_DIR/<job_id>.state.json에도 저장 → 워커가 여러 개여도 어느 워커에서나 조회
+    - 대기열 크기(JOB_QUEUE_SIZE)와 동시 실행 수(JOB_CONCURRENCY) 제한
+    - 프로세스 풀은 spawn으로 시작 (부모의 DB 커넥션/스레드/잠금을 물려받지 않음)
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from app.config import (
+    JOB_WORKERS, JOB_CONCURRENCY, JOB_QUEUE_SIZE, JOB_TTL_SECONDS, JOB_DIR, STREAM_CHUNK_SIZE,
+)
+from app.database import SessionLocal
+from app.websocket_manager import broadcast
+from scripts.file_mapping import iter_excel_chunks, match_dataframe, jsonable_row
+from scripts.match_index import get_match_index
+from scripts.pdf_ingest import iter_pdf_rows
+from scripts.pdf_parser import PdfRowParser
+
+JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+STATE_FILE = re.compile(r"^[0-9a-f]{32}\.state\.json$")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def job_state_path(job_id: str) -> str:
+    return os.path.join(JOB_DIR, f"{job_id}.state.json")
+
+
+class Job:
+    def __init__(self, kind: str, path: str, filename: str, job_id: str = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.path = path
+        self.filename = filename
+        self.status = "queued"  # queued → running → done / failed
+        self.processed = 0
+        self.total = None
+        self.results = []
+        self.errors = []
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "processed": self.processed,
+            "total": self.total,
+            "errors": self.errors,
+        }
+
+    def save(self):
+        # 다른 워커의 조회를 위해 상태 파일로 저장 (임시 파일 → 교체, 결과는 끝난 뒤에만)
+        state = {
+            **self.summary(),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "results": self.results if self.status == "done" else [],
+        }
+        path = job_state_path(self.id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, job_id: str):
+        # 상태 파일에서 작업 복원 (없거나 읽을 수 없으면 None)
+        try:
+            with open(job_state_path(job_id), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = cls(state["kind"], None, state["filename"], job_id=state["job_id"])
+        job.status = state["status"]
+        job.processed = state["processed"]
+        job.total = state["total"]
+        job.errors = state["errors"]
+        job.results = state["results"]
+        job.created_at = state["created_at"]
+        job.finished_at = state["finished_at"]
+        return job
+
+
+# ------------------ 프로세스 풀에서 실행되는 함수 ------------------ #
+def parse_job_file(kind: str, path: str, chunk_size: int):
+    # 업로드 파일을 입력 행 조각 리스트로 변환: (조각 리스트, 파싱 오류)
+    if kind == "pdf":
+        # 작업 자체가 풀 워커에서 돌고 있으므로 페이지 추출은 이 프로세스에서 순서대로
+        parser = PdfRowParser()
+        rows = list(iter_pdf_rows(path, parser, workers=1))
+        chunks = [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+        return chunks, parser.errors
+
+    with open(path, "rb") as f:
+        chunks = [[jsonable_row(row) for row in df.to_dict(orient="records")] for df in iter_excel_chunks(f, chunk_size)]
+    return chunks, []
+
+
+def match_job_rows(rows: list) -> list:
+    # 워커 프로세스마다 매칭 인덱스는 메모리/캐시 파일에서 한 번만 로드됨
+    db = SessionLocal()
+    try:
+        index = get_match_index(db)
+    finally:
+        db.close()
+    return [jsonable_row(row) for row in match_dataframe(pd.DataFrame(rows), index)]
+
+
+# ------------------ 작업 관리 ------------------ #
+async def notify(job: Job, **extra):
+    # 상태 파일을 먼저 갱신한 뒤 구독 클라이언트에게 전송
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, job.save)
+    except OSError as e:
+        print("⚠️ 작업 상태 저장 실패:", e)
+    try:
+        await broadcast({"type": "job_progress", **job.summary(), **extra})
+    except Exception as e:
+        print("⚠️ 작업 진행률 전송 실패:", e)
+
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS, concurrency: int = JOB_CONCURRENCY, queue_size: int = JOB_QUEUE_SIZE):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.jobs = {}
+        self.queue = None
+        self.pool = None
+        self.tasks = []
+
+    def start(self):
+        os.makedirs(JOB_DIR, exist_ok=True)
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._expire_files()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.tasks = [asyncio.create_task(self._runner()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def submit(self, kind: str, path: str, filename: str) -> Job:
+        self._expire()
+        job = Job(kind, path, filename)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("작업 대기열이 가득 찼습니다.")
+        self.jobs[job.id] = job
+        try:
+            job.save()
+        except OSError as e:
+            print("⚠️ 작업 상태 저장 실패:", e)
+        return job
+
+    def get(self, job_id: str):
+        # 이 워커가 실행 중인 작업은 메모리에서, 다른 워커의 작업은 상태 파일에서
+        self._expire()
+        if not JOB_ID.match(job_id):
+            return None
+        job = self.jobs.get(job_id) or Job.load(job_id)
+        if job and job.finished_at and time.time() - job.finished_at > JOB_TTL_SECONDS:
+            return None
+        return job
+
+    def _expire(self):
+        # 보관 시간이 지난 완료 작업 정리
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at and now - job.finished_at > JOB_TTL_SECONDS
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+            try:
+                os.remove(job_state_path(job_id))
+            except OSError:
+                pass
+
+    def _expire_files(self):
+        # 재시작 등으로 메모리에서 사라진 작업의 오래된 상태 파일 정리
+        now = time.time()
+        for entry in os.scandir(JOB_DIR):
+            if not STATE_FILE.match(entry.name):
+                continue
+            try:
+                if now - entry.stat().st_mtime > JOB_TTL_SECONDS:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    async def _runner(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        loop = asyncio.get_running_loop()
+        job.status = "running"
+        await notify(job)
+
+        futures = []
+        try:
+            chunks, job.errors = await loop.run_in_executor(
+                self.pool, parse_job_file, job.kind, job.path, STREAM_CHUNK_SIZE
+            )
+            job.total = sum(len(c) for c in chunks)
+
+            # 조각들은 풀에서 병렬로 매칭하고, 결과는 원래 순서대로 모음
+            futures = [loop.run_in_executor(self.pool, match_job_rows, rows) for rows in chunks]
+            for rows, future in zip(chunks, futures):
+                matched = await future
+                job.results.extend(matched)
+                job.processed += len(rows)
+                await notify(job, rows=matched)
+
+            job.status = "done"
+        except Exception as e:
+            for future in futures:
+                future.cancel()
+            print("❌ 매칭 작업 실패:", job.id, e)
+            job.status = "failed"
+            job.errors.append(str(e))
+        finally:
+            job.finished_at = time.time()
+            if os.path.exists(job.path):
+                os.remove(job.path)
+
+        await notify(job)
+
+
+job_manager = JobManager()
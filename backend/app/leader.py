@@ -0,0 +1,75 @@
+"""
+    워커 간 리더 선출 (파일 잠금)
+    - uvicorn 워커 여러 개 중 WATCHER_LOCK_FILE 잠금을 잡은 하나만 감시(watcher)를 실행
+    - 리더 프로세스가 죽으면 OS가 잠금을 풀고, 다른 워커가 WATCHER_LEADER_RETRY 안에 이어받음
+    - 같은 서버의 워커끼리만 유효 (잠금 파일은 로컬 디스크에 둘 것)
+"""
+import os
+import threading
+import time
+from app.config import WATCHER_LOCK_FILE, WATCHER_LEADER_RETRY
+from app.utils.logs import get_logger, log_event
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = get_logger(__name__)
+
+
+class FileLock:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        # 기다리지 않고 시도: 잡으면 True (프로세스가 끝날 때까지 유지)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def run_when_leader(
+    target, *args, lock_path: str = WATCHER_LOCK_FILE, retry: float = WATCHER_LEADER_RETRY, name: str = "watcher",
+):
+    # 잠금을 잡을 때까지 재시도하다가 리더가 되면 target(*args) 실행 (백그라운드 스레드)
+    # name: 로그 이벤트({name}_leader_elected)와 스레드 이름에 쓰는 역할 이름
+    def wait_and_run():
+        lock = FileLock(lock_path)
+        while not lock.acquire():
+            time.sleep(retry)
+        log_event(logger, f"{name}_leader_elected", pid=os.getpid(), lock=lock_path)
+        target(*args)
+
+    thread = threading.Thread(target=wait_and_run, daemon=True, name=f"{name}-leader")
+    thread.start()
+    return thread
@@ -2,24 +2,32 @@ from fastapi.staticfiles import StaticFiles
 from fastapi import FastAPI, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import Base, engine
+from app.migrations import run_migrations, backfill_counted_at
 from app.routers import drug, inventory, upload
 from app.routers import barcode
-from app.websocket_manager import connect, disconnect
-from app.watchdog_runner import start_watchdog
+from app.websocket_manager import connect, disconnect, handle_message, deliver
+from app.watchdog_runner import start_watchdog, SOURCES
 import asyncio
 import threading
 from app.routers import reports
-import os
+from app.routers import jobs
+from app.jobs import job_manager
+from app.routers import images
+from app.routers import metrics
+from app.image_pipeline import image_pipeline
+from app.backplane import backplane
+from app.leader import run_when_leader
+from scripts.pdf_ingest import shutdown_pool as shutdown_pdf_pool
+from app.archive import run_archiver
+from app.config import ARCHIVE_INTERVAL, ARCHIVE_LOCK_FILE
 
 # 데이터베이스 초기화
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 # FastAPI 인스턴스 생성
 app = FastAPI()
 
-# 메인 이벤트 루프 획득
-loop = asyncio.get_event_loop()
-
 # CORS 설정 (프론트엔드와 연동 허용)
 app.add_middleware(
     CORSMiddleware,
@@ -28,34 +36,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Backfill-Pending", "X-Total-Count"],  # /api/reports 다음 페이지 커서/채우기 진행 중, /inventory 전체 건수
 )
 
-# 백그라운드 스레드에서 watchdog 감시 시작
-threading.Thread(target=lambda: start_watchdog(loop), daemon=True).start()
-
-# 이미지 디렉토리 경로 (watchdog_runner.py와 동일하게 유지)
-WATCH_DIR = "C:\\Users\\EX_Mila\\Desktop\\counting_results"
-IMAGE_DIR = os.path.join(WATCH_DIR, "images")
-
 # WebSocket 엔드포인트 정의
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await connect(websocket)
     try:
         while True:
-            await websocket.receive_text()  # 연결 유지용
+            # 구독/구독 해제 메시지 처리 (아무것도 보내지 않는 클라이언트는 전체 수신)
+            handle_message(websocket, await websocket.receive_text())
     except:
         disconnect(websocket)
 
+# 업로드 매칭 작업 큐 / 이미지 변환 파이프라인 / 브로드캐스트 중계 시작/종료
+@app.on_event("startup")
+async def start_job_manager():
+    job_manager.start()
+    image_pipeline.start()
+    await backplane.start(deliver)
+
+    # 워커가 여러 개여도 watchdog 감시는 리더 워커 하나만 (나머지는 중계로 이벤트 수신)
+    run_when_leader(start_watchdog, asyncio.get_running_loop())
+
+    # 기존 행의 counted_at 채우기 (청크 단위 백그라운드 실행, 잠금을 잡은 워커부터 차례로)
+    threading.Thread(target=backfill_counted_at, args=(engine,), daemon=True, name="counted-at-backfill").start()
+
+    # 닫힌 달 counting_log 보관 (보관 잠금을 잡은 워커 하나만 주기적으로)
+    if ARCHIVE_INTERVAL > 0:
+        run_when_leader(run_archiver, lock_path=ARCHIVE_LOCK_FILE, name="archiver")
+
+@app.on_event("shutdown")
+async def stop_job_manager():
+    await job_manager.stop()
+    image_pipeline.stop()
+    shutdown_pdf_pool()
+    await backplane.stop()
+
 # 라우터 등록
 app.include_router(inventory.router)
 app.include_router(drug.router)
 app.include_router(upload.router)
 app.include_router(reports.router)
+app.include_router(jobs.router)
+app.include_router(images.router)
+app.include_router(metrics.router)
 app.include_router(barcode.router, prefix="/api/barcode")
 
-# 정적 파일 라우트 추가
-app.mount("/images", StaticFiles(directory=IMAGE_DIR), name="images")
+# 정적 파일 라우트 추가 (기존 주소 호환: 첫 번째 감시 소스의 이미지 폴더)
+app.mount("/images", StaticFiles(directory=SOURCES[0].image_dir), name="images")
 
 # 외부에서 데이터를 받아 클라이언트에게 실시간 브로드캐스트
 @app.post("/send")
@@ -0,0 +1,210 @@
+"""
+    Prometheus 텍스트 형식 지표 (/metrics)
+    - Counter / Gauge / Histogram 최소 구현 (스레드 안전, 라벨 지원)
+    - 수집 경로(감시 → 파싱 → DB 저장 → 브로드캐스트) 단계별 소요 시간과 처리량, 중복률, 오류 수
+    - files/sec 등 비율은 카운터에 rate() 적용: rate(ingest_files_total[1m])
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# 초 단위 기본 구간 (파일 감지 ~ 대시보드 수신 SLO 기준)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 라벨 {self.labelnames} 필요, 받은 값 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        # 수집 시점에 값을 계산: function() → {라벨 값 튜플: 값}
+        self._function = function
+
+    def samples(self) -> list:
+        if self._function is not None:
+            values = self._function()
+            with self._lock:
+                self._values = {tuple(str(v) for v in key): value for key, value in values.items()}
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric: Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # 게이지 계산 실패가 /metrics 전체를 막지 않도록
+                lines.append(f"# {metric.name} 수집 실패: {e}")
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# ------------------ 수집 경로 지표 ------------------ #
+INGEST_STAGE_SECONDS = Histogram(
+    "ingest_stage_seconds",
+    "Time spent per ingestion stage (file_event: file mtime to watcher event, queue: event to parse start, parse, db_write, broadcast)",
+    ["stage"],
+)
+INGEST_END_TO_END_SECONDS = Histogram(
+    "ingest_end_to_end_seconds",
+    "Time from the counting machine writing the JSON file to the WebSocket broadcast finishing",
+    ["station"],
+)
+INGEST_FILES = Counter(
+    "ingest_files_total",
+    "Counting result files handled by the parser (result: parsed, skipped, error)",
+    ["station", "result"],
+)
+INGEST_ROWS = Counter(
+    "ingest_rows_total",
+    "Counting rows offered to the DB writer (result: inserted, duplicate)",
+    ["result"],
+)
+INGEST_ERRORS = Counter(
+    "ingest_errors_total",
+    "Ingestion errors by stage (parse, db_write, broadcast, reconcile)",
+    ["stage"],
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "ingest_queue_depth",
+    "Files or rows waiting per ingestion queue (station debounce queues and the DB writer)",
+    ["queue"],
+)
+INGEST_BATCH_ROWS = Histogram(
+    "ingest_batch_rows",
+    "Files per DB writer batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+
+# ------------------ WebSocket 지표 ------------------ #
+WS_CLIENTS = Gauge("ws_clients", "Connected WebSocket clients")
+WS_BROADCAST_SECONDS = Histogram(
+    "ws_broadcast_seconds",
+    "Time to route, serialize and enqueue one coalesced batch of events for every client",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+WS_DROPPED = Counter(
+    "ws_dropped_clients_total",
+    "WebSocket clients disconnected by the server (reason: queue_full, send_timeout, send_error)",
+    ["reason"],
+)
+WS_FRAMES = Counter(
+    "ws_frames_total",
+    "WebSocket frames queued to clients (kind: batch, single, replay, control)",
+    ["kind"],
+)
+WS_EVENTS = Counter("ws_events_total", "Events published through broadcast()")
@@ -0,0 +1,172 @@
+# create_all()이 기존 테이블에는 적용하지 않는 스키마 변경을 시작 시 보완
+import time
+from sqlalchemy import inspect, text, select, update, bindparam
+from app.config import (
+    COUNTED_AT_MIGRATION_CHUNK, COUNTED_AT_MIGRATION_PAUSE, COUNTED_AT_MIGRATION_LOCK, COUNTED_AT_MIGRATION_RETRY,
+)
+from app.database import Base
+from app import models  # noqa: F401 (테이블 메타데이터 등록)
+from app.ingest import event_key
+from app.leader import FileLock
+from app.utils.timestamps import parse_counting_timestamp
+
+# 다른 인덱스로 대체된 인덱스 (남겨 두면 INSERT마다 유지 비용만 듦)
+SUPERSEDED_INDEXES = {
+    # timestamp 문자열 키셋 → counted_at 키셋 (ix_counting_log_*counted_at_id)
+    "counting_log": [
+        "ix_counting_log_timestamp_id",
+        "ix_counting_log_code_timestamp_id",
+        "ix_counting_log_station_timestamp_id",
+    ],
+}
+
+# 이 워커 기준 데이터 채우기 상태: pending(시작 전) → running → done / error(실패, 다음 시작 때 남은 행부터 다시)
+backfill_status = {"counted_at": "pending"}
+
+
+def ensure_columns(engine, table):
+    # 모델에 추가됐지만 DB에 없는 컬럼을 NULL 허용 컬럼으로 추가
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return
+    existing = {column["name"] for column in inspector.get_columns(table.name)}
+    quote = engine.dialect.identifier_preparer.quote
+
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=engine.dialect)
+        print(f"🛠️ 컬럼 추가: {table.name}.{column.name} {column_type}")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+
+
+def ensure_indexes(engine, table):
+    # 모델에 선언됐지만 DB에 없는 인덱스 생성 (이름 기준)
+    inspector = inspect(engine)
+    if not inspector.has_table(table.name):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table.name)}
+    existing |= {c["name"] for c in inspector.get_unique_constraints(table.name)}
+
+    for index in table.indexes:
+        if index.name not in existing:
+            print(f"🛠️ 인덱스 생성: {table.name}.{index.name}")
+            index.create(bind=engine)
+
+
+def drop_indexes(engine, table, names):
+    # 더 이상 쓰지 않는 인덱스 삭제 (DB에 있을 때만)
+    inspector = inspect(engine)
+    if not names or not inspector.has_table(table.name):
+        return
+    existing = {index["name"] for index in inspector.get_indexes(table.name)}
+    quote = engine.dialect.identifier_preparer.quote
+
+    for name in names:
+        if name not in existing:
+            continue
+        print(f"🛠️ 인덱스 삭제: {table.name}.{name}")
+        # MySQL만 테이블 이름이 필요
+        on_table = f" ON {quote(table.name)}" if engine.dialect.name == "mysql" else ""
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX {quote(name)}{on_table}"))
+
+
+def run_migrations(engine):
+    for table in Base.metadata.sorted_tables:
+        ensure_columns(engine, table)
+        ensure_indexes(engine, table)
+        drop_indexes(engine, table, SUPERSEDED_INDEXES.get(table.name))
+
+
+def backfill_counted_at(engine, chunk: int = COUNTED_AT_MIGRATION_CHUNK, pause: float = COUNTED_AT_MIGRATION_PAUSE):
+    # counted_at이 비어 있는 기존 행을 id 순서로 chunk개씩 채움 (청크마다 커밋 → 테이블을 오래 잠그지 않음)
+    # 워커가 여러 개면 잠금을 잡은 하나씩 실행 (먼저 잡은 워커가 채우고, 나머지는 끝난 뒤 남은 행만 확인)
+    # 해석할 수 없는 timestamp는 NULL로 남김 (/api/reports에서는 시각 있는 행 뒤에 id 순으로)
+    backfill_status["counted_at"] = "running"
+    lock = FileLock(COUNTED_AT_MIGRATION_LOCK)
+    table = models.CountingLog.__table__
+    last_id = 0
+    filled = 0
+    try:
+        while not lock.acquire():
+            time.sleep(COUNTED_AT_MIGRATION_RETRY)
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(
+                    select(table.c.id, table.c.timestamp)
+                    .where(table.c.counted_at.is_(None), table.c.id > last_id)
+                    .order_by(table.c.id)
+                    .limit(chunk)
+                ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                params = [
+                    {"log_id": row.id, "value": value}
+                    for row in rows
+                    if (value := parse_counting_timestamp(row.timestamp)) is not None
+                ]
+                if params:
+                    conn.execute(
+                        update(table).where(table.c.id == bindparam("log_id")).values(counted_at=bindparam("value")),
+                        params,
+                    )
+            filled += len(params)
+            time.sleep(pause)
+    except Exception as e:
+        # 실패 상태를 남겨 running으로 멈춰 있지 않게 함 (채운 청크는 이미 커밋됨)
+        backfill_status["counted_at"] = "error"
+        print("❌ counting_log.counted_at 채우기 실패:", e)
+        raise
+    finally:
+        lock.release()
+
+    backfill_status["counted_at"] = "done"
+    if filled:
+        print(f"🛠️ counting_log.counted_at 채움: {filled}건")
+
+
+def backfill_event_keys(engine, chunk: int = COUNTED_AT_MIGRATION_CHUNK):
+    # event_key가 비어 있는 기존 행(업그레이드 전 수집분)에 키를 채움 → 같은 파일이 다시 들어와도 유니크 제약이 차단
+    # id 순서로 청크 단위 갱신, 청크마다 커밋 (감시 시작 전에 리더 워커가 실행)
+    # 같은 내용의 중복 행은 가장 먼저 저장된 행만 키를 갖고 나머지는 NULL로 남김
+    table = models.CountingLog.__table__
+    last_id = 0
+    filled = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(table.c.id, table.c.timestamp, table.c.drug_standard_code, table.c.drug_name, table.c.count_quantity)
+                .where(table.c.event_key.is_(None), table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(chunk)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            keys = {}
+            for row in rows:
+                key = event_key({
+                    "timestamp": row.timestamp,
+                    "drug_standard_code": (row.drug_standard_code or "").strip(),
+                    "drug_name": (row.drug_name or "").strip(),
+                    "count_quantity": row.count_quantity,
+                })
+                keys.setdefault(key, row.id)
+
+            # 이미 키를 가진 행과 겹치면 건너뜀
+            taken = set(conn.execute(select(table.c.event_key).where(table.c.event_key.in_(list(keys)))).scalars())
+            params = [{"log_id": log_id, "key": key} for key, log_id in keys.items() if key not in taken]
+            if params:
+                conn.execute(
+                    update(table).where(table.c.id == bindparam("log_id")).values(event_key=bindparam("key")),
+                    params,
+                )
+        filled += len(params)
+
+    if filled:
+        print(f"🛠️ counting_log.event_key 채움: {filled}건")
+    return filled
@@ -1,6 +1,6 @@
 # DB 테이블 구조를 정의하는 SQLAlchemy ORM 클래스들
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, ForeignKey, Index, event, update, insert
+from sqlalchemy.orm import relationship, Session
 from app.database import Base  # Base = declarative_base()
 
 # ------------------ Drug Table ------------------ #
@@ -16,6 +16,33 @@ class Drug(Base):
 
     inventory_items = relationship("Inventory", back_populates="drug")
 
+# ------------------ Drug Catalog Version ------------------ #
+# drug 테이블이 바뀔 때마다 증가하는 버전 (매칭 인덱스 캐시 무효화용, 단일 row)
+class DrugCatalogVersion(Base):
+    __tablename__ = "drug_catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+def bump_catalog_version(conn):
+    # pandas to_sql 등 ORM을 거치지 않는 삽입 후에는 직접 호출해야 함
+    result = conn.execute(
+        update(DrugCatalogVersion)
+        .where(DrugCatalogVersion.id == 1)
+        .values(version=DrugCatalogVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(insert(DrugCatalogVersion).values(id=1, version=1))
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_drug_change(session, flush_context):
+    # ORM으로 Drug가 추가/수정/삭제되면 같은 트랜잭션 안에서 버전 증가
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, Drug) for obj in changed):
+        bump_catalog_version(session.connection())
+
 #------------------ Inventory Table ------------------ #
 class Inventory(Base):
     __tablename__ = "inventory"
@@ -32,6 +59,20 @@ class Inventory(Base):
 
     drug = relationship("Drug", back_populates="inventory_items")
 
+    # /inventory 필터 + 선반 위치 순 정렬
+    __table_args__ = (
+        Index("ix_inventory_cabinet_row_position", "cabinet", "row", "position"),
+    )
+
+    # 응답 스키마(InventoryOut)용: drug을 함께 불러온 경우에만 추가 쿼리 없음 (joinedload)
+    @property
+    def drug_name(self):
+        return self.drug.drug_name if self.drug else None
+
+    @property
+    def standard_code(self):
+        return self.drug.standard_code if self.drug else None
+
 # update: Drug 테이블과 관계형 데이터베이스 구조로 재설계
 # class Inventory(Base):
 #     __tablename__ = "inventory"
@@ -67,9 +108,74 @@ class CountingLog(Base):
     __tablename__ = "counting_log"
 
     id = Column(Integer, primary_key=True, index=True)
-    timestamp = Column(String(50))  # 예: 2025-06-04-10-30-00
+    timestamp = Column(String(50))  # 예: 2025-06-04-10-30-00 (기계가 보낸 원본 문자열, 사진 파일명과 같음)
+    counted_at = Column(DateTime)  # timestamp를 수집 시 한 번 해석한 값 (정렬/기간 조회용)
     drug_name = Column(String(255))
     drug_standard_code = Column(String(50), index=True)
     drug_refer_code = Column(String(50))
     count_quantity = Column(Integer)
-    source_filename = Column(String(255))  # 파일 중복 처리 방지
\ No newline at end of file
+    source_filename = Column(String(255), unique=True, index=True)  # 파일 중복 처리 방지 (기본 외 스테이션은 "스테이션/파일명")
+    station_id = Column(String(50))  # 결과를 보낸 카운팅 스테이션 (WATCH_SOURCES)
+    # 내용 기준 중복 방지 키: sha256(timestamp|표준코드|약품명|수량)
+    event_key = Column(String(64), unique=True, index=True)
+
+    # /api/reports 키셋 페이지네이션 (counted_at, id 내림차순) + 필터별 복합 인덱스
+    __table_args__ = (
+        Index("ix_counting_log_counted_at_id", "counted_at", "id"),
+        Index("ix_counting_log_code_counted_at_id", "drug_standard_code", "counted_at", "id"),
+        Index("ix_counting_log_station_counted_at_id", "station_id", "counted_at", "id"),
+    )
+
+
+# 카운팅 집계 (시간/일 단위 약품 표준코드 x 스테이션별 건수/수량)
+# 수집 경로가 counting_log INSERT와 같은 트랜잭션에서 증분 갱신, scripts/rebuild_rollups.py로 재계산
+class CountingRollupHourly(Base):
+    __tablename__ = "counting_rollup_hourly"
+
+    id = Column(Integer, primary_key=True)
+    bucket = Column(DateTime, nullable=False)  # 시간 시작 시각 (예: 2025-06-04 10:00:00)
+    drug_standard_code = Column(String(50), nullable=False)
+    station_id = Column(String(50), nullable=False)
+    event_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_counting_rollup_hourly_key", "bucket", "drug_standard_code", "station_id", unique=True),
+        Index("ix_counting_rollup_hourly_code_bucket", "drug_standard_code", "bucket"),
+    )
+
+
+class CountingRollupDaily(Base):
+    __tablename__ = "counting_rollup_daily"
+
+    id = Column(Integer, primary_key=True)
+    bucket = Column(Date, nullable=False)
+    drug_standard_code = Column(String(50), nullable=False)
+    station_id = Column(String(50), nullable=False)
+    event_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ux_counting_rollup_daily_key", "bucket", "drug_standard_code", "station_id", unique=True),
+        Index("ix_counting_rollup_daily_code_bucket", "drug_standard_code", "bucket"),
+    )
+
+
+# 카운팅 결과 파일 수집 기록 (재시작 시 이미 처리한 파일은 건너뜀)
+class IngestLedger(Base):
+    __tablename__ = "ingest_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source_filename = Column(String(255), unique=True, index=True)
+    mtime_ns = Column(BigInteger)  # 파일이 바뀌었는지 판단 (수정 시각 + 크기)
+    size = Column(BigInteger)
+    status = Column(String(20), default="ok")  # ok / error (파싱 실패 파일도 다시 읽지 않음)
+    processed_at = Column(DateTime)
+
+
+# 보관(Parquet 파일)으로 옮기며 counting_log에서 지운 행의 event_key
+# → 보관된 달의 결과 파일이 다시 들어와도 유니크 제약 대신 이 테이블로 중복을 막음 (app/archive.py)
+class ArchivedEventKey(Base):
+    __tablename__ = "archived_event_key"
+
+    event_key = Column(String(64), primary_key=True)
@@ -0,0 +1,51 @@
+"""
+    카운팅 집계 테이블 (counting_rollup_hourly / counting_rollup_daily)
+    - 수집 경로: 새로 들어간 counting_log 행만 모아 같은 트랜잭션에서 한 문장씩 증분 UPSERT
+    - 조회: /api/reports/summary 가 원본 로그 대신 집계 테이블만 읽음
+    - 재계산: scripts/rebuild_rollups.py (원본 로그를 id 순서로 읽어 다시 집계)
+"""
+from collections import defaultdict
+from app.config import DEFAULT_STATION
+from app.models import CountingRollupHourly, CountingRollupDaily
+from app.utils.bulk import increment_statement
+from app.utils.timestamps import parse_counting_timestamp
+
+ROLLUP_KEY = ["bucket", "drug_standard_code", "station_id"]
+ROLLUP_SUMS = ["event_count", "total_quantity"]
+
+
+def aggregate_rows(rows) -> tuple:
+    # counting_log 행(dict) → (시간 단위 집계 행 목록, 일 단위 집계 행 목록)
+    hourly = defaultdict(lambda: [0, 0])
+    daily = defaultdict(lambda: [0, 0])
+    for row in rows:
+        counted_at = row.get("counted_at") or parse_counting_timestamp(row["timestamp"])
+        if counted_at is None:
+            continue  # 시각을 알 수 없는 행은 집계 불가
+        code = row["drug_standard_code"] or ""
+        station = row.get("station_id") or DEFAULT_STATION
+        quantity = row["count_quantity"] or 0
+        for totals, bucket in (
+            (hourly, counted_at.replace(minute=0, second=0, microsecond=0)),
+            (daily, counted_at.date()),
+        ):
+            entry = totals[(bucket, code, station)]
+            entry[0] += 1
+            entry[1] += quantity
+
+    def to_rows(totals):
+        return [
+            {"bucket": bucket, "drug_standard_code": code, "station_id": station,
+             "event_count": count, "total_quantity": quantity}
+            for (bucket, code, station), (count, quantity) in totals.items()
+        ]
+
+    return to_rows(hourly), to_rows(daily)
+
+
+def apply_rollups(db, rows):
+    # 호출한 쪽의 트랜잭션 안에서 집계 테이블에 더함 (커밋은 호출한 쪽)
+    hourly, daily = aggregate_rows(rows)
+    for table, values in ((CountingRollupHourly.__table__, hourly), (CountingRollupDaily.__table__, daily)):
+        if values:
+            db.execute(increment_statement(db.bind, table, values, ROLLUP_KEY, ROLLUP_SUMS))
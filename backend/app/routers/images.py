@@ -0,0 +1,86 @@
+import mimetypes
+import os
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, RedirectResponse
+from app.config import IMAGE_CACHE_MAX_AGE, IMAGE_REDIRECT_MAX_AGE
+from app.image_pipeline import image_pipeline, variant_path, VARIANTS
+from app.watchdog_runner import SOURCES
+
+router = APIRouter()
+
+# 파일명 주소: 같은 이름으로 사진이 다시 저장될 수 있으므로 매번 ETag로 재검증 (원본)
+REVALIDATE = "public, no-cache"
+# 파일명 주소 → 해시 주소 리디렉트: 짧게 캐시 (캐시된 동안은 서버에 묻지 않고 해시 주소의 캐시 사용)
+REDIRECT = f"public, max-age={IMAGE_REDIRECT_MAX_AGE}"
+# 해시 주소: 내용이 바뀌면 주소도 바뀌므로 오래 캐시
+IMMUTABLE = f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable"
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
+
+
+def image_response(request: Request, path: str, etag: str, cache_control: str, media_type: str):
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+def source_path(filename: str, station: str = None) -> str:
+    # 경로 조작 방지: 이미지 폴더 바로 아래 파일명만 허용
+    if os.path.basename(filename) != filename or not filename.lower().endswith((".jpg", ".jpeg", ".png")):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+
+    # 스테이션을 지정하지 않으면 감시 소스 순서대로 찾음
+    sources = [s for s in SOURCES if station is None or s.station_id == station]
+    for source in sources:
+        path = os.path.join(source.image_dir, filename)
+        if os.path.exists(path):
+            return path
+    raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+
+
+# 카운팅 사진 조회 (variant: thumb=썸네일, webp=압축본, original=원본)
+# 변환본은 /api/images/by-hash/... 로 리디렉트, 원본은 ETag 재검증
+@router.get("/api/images/{filename}")
+async def get_image(request: Request, filename: str, variant: str = Query("webp"), station: str = None):
+    if variant != "original" and variant not in VARIANTS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 variant: {variant}")
+
+    path = source_path(filename, station)
+    try:
+        digest = await run_in_threadpool(image_pipeline.lookup, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+    except Exception as e:
+        # 변환 실패(손상된 파일 등) 시 원본으로 대체
+        print("⚠️ 이미지 변환 실패, 원본 제공:", filename, e)
+        digest, variant = None, "original"
+
+    if variant != "original":
+        # 변환본은 내용 기준 해시 주소로 보냄 → 브라우저가 변환본을 재검증 없이 캐시
+        if os.path.exists(variant_path(digest, variant)):
+            url = request.app.url_path_for("get_image_by_hash", digest=digest, variant=variant)
+            return RedirectResponse(str(url), status_code=307, headers={"Cache-Control": REDIRECT})
+
+    # 원본 요청 또는 Pillow 없음/변환 실패 → 원본 그대로
+    etag = f'"{digest}-original"' if digest else None
+    media_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if etag is None:
+        return FileResponse(path, media_type=media_type, headers={"Cache-Control": "no-store"})
+    return image_response(request, path, etag, REVALIDATE, media_type)
+
+
+# 해시 주소로 변환본 조회 (내용 기준 주소라 브라우저가 재검증 없이 캐시)
+@router.get("/api/images/by-hash/{digest}/{variant}.webp")
+async def get_image_by_hash(request: Request, digest: str, variant: str):
+    if variant not in VARIANTS or len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+
+    target = variant_path(digest, variant)
+    if not os.path.exists(target):
+        raise HTTPException(status_code=404, detail="이미지를 찾을 수 없습니다.")
+    return image_response(request, target, f'"{digest}-{variant}"', IMMUTABLE, "image/webp")
@@ -1,11 +1,52 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session, joinedload
+from app.config import INVENTORY_PAGE_SIZE, INVENTORY_PAGE_MAX
 from app.database import get_db
 from app.models import Inventory, Drug
 from app.schemas import InventoryOut
 
 router = APIRouter()
 
+# 필터 조건에 맞는 전체 건수 (페이지 수 계산용)
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+# 재고 목록 (선반 → 줄 → 칸 순, offset 페이지네이션)
+# 약품명/표준코드는 Drug를 같은 쿼리에서 조인해 채움 (행마다 추가 조회 없음)
+# expires_from / expires_to: 유효기간 범위 (둘 다 포함)
 @router.get("/inventory", response_model=list[InventoryOut])
-def get_inventory(db: Session = Depends(get_db)):
-    return db.query(Inventory).all()
\ No newline at end of file
+def get_inventory(
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(INVENTORY_PAGE_SIZE, ge=1, le=INVENTORY_PAGE_MAX),
+    cabinet: str = None,
+    row: int = None,
+    status: str = None,
+    expires_from: date = None,
+    expires_to: date = None,
+    db: Session = Depends(get_db),
+):
+    if expires_from and expires_to and expires_from > expires_to:
+        raise HTTPException(status_code=400, detail="expires_from이 expires_to보다 늦습니다.")
+
+    query = db.query(Inventory)
+    if cabinet:
+        query = query.filter(Inventory.cabinet == cabinet)
+    if row is not None:
+        query = query.filter(Inventory.row == row)
+    if status:
+        query = query.filter(Inventory.status == status)
+    if expires_from:
+        query = query.filter(Inventory.expiration_date >= expires_from)
+    if expires_to:
+        query = query.filter(Inventory.expiration_date <= expires_to)
+
+    response.headers[TOTAL_COUNT_HEADER] = str(query.count())
+    return (
+        query.options(joinedload(Inventory.drug, innerjoin=True))
+        .order_by(Inventory.cabinet, Inventory.row, Inventory.position, Inventory.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
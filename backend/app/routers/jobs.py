@@ -0,0 +1,41 @@
+import os
+from fastapi import APIRouter, File, UploadFile, HTTPException
+from app.config import JOB_DIR
+from app.jobs import job_manager, QueueFullError
+from app.utils.uploads import save_upload
+
+router = APIRouter()
+
+# 업로드 파일을 작업 디렉토리에 저장하고 작업 등록
+async def submit_upload(kind: str, file: UploadFile):
+    path = await save_upload(file, JOB_DIR)
+
+    try:
+        job = job_manager.submit(kind, path, file.filename)
+    except QueueFullError as e:
+        os.remove(path)
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "10"})
+
+    return job.summary()
+
+# EXCEL 매칭 작업 등록
+@router.post("/jobs/match-json", status_code=202)
+async def submit_match_json(file: UploadFile = File(...)):
+    return await submit_upload("excel", file)
+
+# PDF 매칭 작업 등록
+@router.post("/jobs/match-pdf", status_code=202)
+async def submit_match_pdf(file: UploadFile = File(...)):
+    return await submit_upload("pdf", file)
+
+# 작업 상태 및 최종 결과 조회
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="해당 작업을 찾을 수 없습니다.")
+
+    result = job.summary()
+    if job.status == "done":
+        result["results"] = job.results
+    return result
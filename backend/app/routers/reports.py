@@ -1,10 +1,236 @@
-from fastapi import APIRouter, Depends
+import base64
+import binascii
+import itertools
+import json
+from datetime import date, datetime, time, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import Session
+from app.config import DEFAULT_STATION, REPORT_PAGE_SIZE, REPORT_PAGE_MAX
+from app.archive import ArchivedKeys, archived_months, archive_filter, merge_archived_page, iter_archive_chunks
 from app.database import get_db
-from app.models import CountingLog
+from app.exports import EXPORT_FORMATS, EXPORT_HEADER, iter_log_chunks, pa
+from app.migrations import backfill_status
+from app.models import CountingLog, CountingRollupHourly, CountingRollupDaily
 
 router = APIRouter()
 
+# 집계 단위 → 집계 구간 시작값으로 묶는 함수 (hour/day는 테이블 값 그대로)
+SUMMARY_PERIODS = {
+    "hour": lambda bucket: bucket,
+    "day": lambda bucket: bucket,
+    "week": lambda bucket: bucket - timedelta(days=bucket.weekday()),  # 월요일 시작
+    "month": lambda bucket: bucket.replace(day=1),
+    "total": lambda bucket: None,
+}
+SUMMARY_GROUPS = {"drug": "drug_standard_code", "station": "station_id"}
+
+# 다음 페이지 커서를 담는 응답 헤더 (응답 본문은 기존처럼 배열)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# counted_at 채우기가 끝나지 않았으면(또는 실패) 값이 NULL인 과거 행이 목록 맨 뒤로 밀리고 기간 조회에서 빠져 있음을 알림
+BACKFILL_HEADER = "X-Backfill-Pending"
+
+
+def backfill_headers() -> dict:
+    return {} if backfill_status["counted_at"] == "done" else {BACKFILL_HEADER: "counted_at"}
+
+
+def encode_cursor(counted_at: datetime, log_id: int) -> str:
+    # counted_at이 없으면 시각을 해석할 수 없는 행 구간의 커서 (id만 사용)
+    raw = json.dumps([counted_at.isoformat() if counted_at else None, log_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        counted_at, log_id = json.loads(raw)
+        if not isinstance(counted_at, (str, type(None))) or not isinstance(log_id, int):
+            raise ValueError
+        return (datetime.fromisoformat(counted_at) if counted_at else None), log_id
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+def report_filters(date_from: date = None, date_to: date = None, drug_code: str = None, station: str = None) -> list:
+    # 목록/내보내기가 함께 쓰는 필터 조건 (기간 조건이 있으면 시각을 해석할 수 없는 행은 빠짐)
+    conditions = []
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from이 date_to보다 늦습니다.")
+    if date_from:
+        conditions.append(CountingLog.counted_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        conditions.append(CountingLog.counted_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    if drug_code:
+        conditions.append(CountingLog.drug_standard_code == drug_code)
+    if station:
+        # 스테이션 컬럼 추가 전 행은 기본 스테이션으로 봄
+        if station == DEFAULT_STATION:
+            conditions.append(or_(CountingLog.station_id == station, CountingLog.station_id.is_(None)))
+        else:
+            conditions.append(CountingLog.station_id == station)
+    return conditions
+
+
+# 카운팅 이력 조회 (최신순, 커서 기반 페이지네이션)
+# 다음 페이지가 있으면 X-Next-Cursor 헤더 값을 cursor로 다시 요청
+# 시각을 해석할 수 없는 행(counted_at NULL)은 기간 조건이 없을 때 시각 있는 행을 모두 보여준 뒤 id 내림차순으로
 @router.get("/api/reports")
-def get_all_logs(db: Session = Depends(get_db)):
-    return db.query(CountingLog).order_by(CountingLog.timestamp.desc()).all()
+def get_all_logs(
+    response: Response,
+    cursor: str = None,
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_PAGE_MAX),
+    date_from: date = None,
+    date_to: date = None,
+    drug_code: str = None,
+    station: str = None,
+    db: Session = Depends(get_db),
+):
+    conditions = report_filters(date_from, date_to, drug_code, station)
+    response.headers.update(backfill_headers())
+    position = decode_cursor(cursor) if cursor else None
+    rows = []
+
+    # ORM 객체 대신 컬럼 값만 조회, 다음 페이지 여부 확인용으로 1건 더
+    if position is None or position[0] is not None:
+        timed = conditions + [CountingLog.counted_at.isnot(None)]
+        if position:
+            counted_at, log_id = position
+            timed.append(or_(
+                CountingLog.counted_at < counted_at,
+                and_(CountingLog.counted_at == counted_at, CountingLog.id < log_id),
+            ))
+        rows = [dict(row) for row in db.execute(
+            select(*CountingLog.__table__.columns)
+            .where(*timed)
+            .order_by(CountingLog.counted_at.desc(), CountingLog.id.desc())
+            .limit(limit + 1)
+        ).mappings()]
+
+        # 조회 기간이 보관된 달에 걸치면 보관 파일에서도 읽어 합침 (같은 정렬이라 커서는 그대로 사용)
+        months = archived_months(date_from, date_to)
+        if months:
+            expr = archive_filter(date_from, date_to, drug_code, station, position)
+            rows = merge_archived_page(rows, limit, months, expr)
+
+    # 시각 있는 행이 끝났으면 남은 자리를 시각을 해석할 수 없는 행으로 채움 (보관본에는 없음)
+    if len(rows) <= limit and not (date_from or date_to):
+        untimed = conditions + [CountingLog.counted_at.is_(None)]
+        if position and position[0] is None:
+            untimed.append(CountingLog.id < position[1])
+        rows += [dict(row) for row in db.execute(
+            select(*CountingLog.__table__.columns)
+            .where(*untimed)
+            .order_by(CountingLog.id.desc())
+            .limit(limit + 1 - len(rows))
+        ).mappings()]
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1]["counted_at"], rows[-1]["id"])
+    return rows
+
+
+# 카운팅 이력 내보내기 (csv / xlsx / parquet, 목록과 같은 필터)
+# 행을 모두 읽기 전에 전송을 시작하므로 수백만 건도 메모리 사용량 일정
+# (xlsx만 예외: 임시 파일에 모두 쓴 뒤 전송, 시트당 행 상한을 넘으면 여러 시트로 나눔)
+# 순서: 보관된 달의 행(달 순서대로, 달 안에서는 보관 파일에 쓰인 순서) 다음 DB 행((counted_at, id) 오름차순)
+#   → 보관된 달에 늦게 들어와 아직 DB에 있는 행은 보관 행들 뒤에 나옴 (전체 (counted_at, id) 정렬은 보장하지 않음)
+#   → 각 행은 한 번만 나옴 (보관 직후 DB 삭제가 끝나기 전이면 보관 파일에 있는 event_key의 DB 행은 건너뜀)
+#   → 기간 조건이 없으면 시각을 해석할 수 없는 행(counted_at NULL)을 맨 뒤에 id 순서로
+@router.get("/api/reports/export")
+def export_logs(
+    format: str = Query("csv", pattern="^(csv|xlsx|parquet)$"),
+    date_from: date = None,
+    date_to: date = None,
+    drug_code: str = None,
+    station: str = None,
+):
+    if format == "parquet" and pa is None:
+        raise HTTPException(status_code=501, detail="pyarrow가 설치되지 않아 Parquet 내보내기를 사용할 수 없습니다.")
+    conditions = report_filters(date_from, date_to, drug_code, station)
+    chunks = iter_log_chunks(conditions + [CountingLog.counted_at.isnot(None)])
+    months = archived_months(date_from, date_to)
+    if months:
+        expr = archive_filter(date_from, date_to, drug_code, station)
+        archived = ArchivedKeys(months)
+        db_chunks = (
+            [row for row in rows if not archived.contains(row[-1], row[0], row[1])]  # (id, counted_at, ..., event_key)
+            for rows in chunks
+        )
+        chunks = itertools.chain(iter_archive_chunks(months, expr, EXPORT_HEADER), db_chunks)
+    if not (date_from or date_to):
+        chunks = itertools.chain(chunks, iter_log_chunks(conditions + [CountingLog.counted_at.is_(None)]))
+
+    media_type, extension, stream = EXPORT_FORMATS[format]
+    name = "_".join(["counting_log"] + [d.isoformat() for d in (date_from, date_to) if d])
+    return StreamingResponse(
+        stream(chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{extension}"', **backfill_headers()},
+    )
+
+
+# 기간별 카운팅 집계 (원본 로그 대신 집계 테이블 조회)
+# granularity: hour / day / week / month / total, group_by: drug, station 중 쉼표로 (빈 값이면 전체 합계만)
+@router.get("/api/reports/summary")
+def get_summary(
+    date_from: date,
+    date_to: date,
+    granularity: str = Query("day", pattern="^(hour|day|week|month|total)$"),
+    group_by: str = "drug,station",
+    drug_code: str = None,
+    station: str = None,
+    db: Session = Depends(get_db),
+):
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from이 date_to보다 늦습니다.")
+    groups = [g.strip() for g in group_by.split(",") if g.strip()]
+    if any(g not in SUMMARY_GROUPS for g in groups):
+        raise HTTPException(status_code=400, detail=f"group_by는 {', '.join(SUMMARY_GROUPS)} 중에서 선택하세요.")
+
+    # 시간 단위만 시간 집계 테이블, 나머지는 일 집계 테이블을 읽어 묶음
+    if granularity == "hour":
+        table = CountingRollupHourly
+        start, end = datetime.combine(date_from, time.min), datetime.combine(date_to + timedelta(days=1), time.min)
+    else:
+        table = CountingRollupDaily
+        start, end = date_from, date_to + timedelta(days=1)
+
+    dimensions = [getattr(table, SUMMARY_GROUPS[g]) for g in groups]
+    query = (
+        select(table.bucket, *dimensions, func.sum(table.event_count), func.sum(table.total_quantity))
+        .where(table.bucket >= start, table.bucket < end)
+        .group_by(table.bucket, *dimensions)
+    )
+    if drug_code:
+        query = query.where(table.drug_standard_code == drug_code)
+    if station:
+        query = query.where(table.station_id == station)
+
+    period = SUMMARY_PERIODS[granularity]
+    totals = {}
+    for bucket, *values in db.execute(query):
+        *keys, count, quantity = values
+        entry = totals.setdefault((period(bucket), *keys), [0, 0])
+        entry[0] += int(count or 0)
+        entry[1] += int(quantity or 0)
+
+    rows = []
+    for (bucket, *keys), (count, quantity) in sorted(totals.items(), key=lambda item: [str(k) for k in item[0]]):
+        row = {"bucket": bucket} if granularity != "total" else {}
+        row.update({SUMMARY_GROUPS[g]: key for g, key in zip(groups, keys)})
+        row.update({"event_count": count, "total_quantity": quantity})
+        rows.append(row)
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "granularity": granularity,
+        "rows": rows,
+        "totals": {
+            "event_count": sum(r["event_count"] for r in rows),
+            "total_quantity": sum(r["total_quantity"] for r in rows),
+        },
+    }
@@ -3,19 +3,61 @@ from app.models import Drug
 from fastapi import APIRouter, File, UploadFile, Depends
 from sqlalchemy.orm import Session
 from ..database import get_db
-from scripts.file_mapping import match_uploaded_file
+from scripts.file_mapping import match_uploaded_file, iter_excel_chunks, iter_matched_chunks, iter_row_chunks, jsonable_row
+from scripts.match_index import get_match_index, get_catalog_version
+from scripts.result_cache import result_cache, cache_key, sha256_file, sha256_path
 from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from io import BytesIO
-import pdfplumber, io
+import os
+import json
+import hashlib
+from app.utils.uploads import spool_upload, save_upload
+from app.utils.bulk import upsert_statement
+from app.config import BULK_CHUNK_SIZE
 from difflib import SequenceMatcher
 from ..database import get_db
-from scripts.pdf_parser import parse_pdf_text_to_rows
+from scripts.pdf_parser import PdfRowParser
+from scripts.pdf_ingest import iter_pdf_rows
 from typing import List as TypingList
 from app.schemas import MappedDrugUpdate
 from app.models import List
 
 router = APIRouter()
 
+# 매칭된 조각이 나올 때마다 NDJSON 줄로 내보냄 (on_close: 스트리밍 종료 후 정리 작업)
+def ndjson_response(chunks, on_close=None):
+    def generate():
+        try:
+            for rows in chunks:
+                yield "".join(
+                    json.dumps(jsonable_row(row), ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+        finally:
+            if on_close is not None:
+                on_close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+# 결과 캐시를 거치는 NDJSON 응답 (끝까지 스트리밍된 결과만 캐시에 저장)
+def cached_ndjson_response(key: str, chunks, on_close=None):
+    cached = result_cache.get(key)
+    if cached is not None:
+        if on_close is not None:
+            on_close()
+        return ndjson_response([cached])
+
+    def collecting():
+        collected = []
+        for rows in chunks:
+            rows = [jsonable_row(row) for row in rows]
+            collected.extend(rows)
+            yield rows
+        result_cache.put(key, collected)
+
+    return ndjson_response(collecting(), on_close)
+
 # 파일 다운로드용 API (백엔드 처리)
 # @router.post("/upload")
 # async def upload_and_match(file: UploadFile = File(...), db: Session = Depends(get_db)):
@@ -41,13 +83,30 @@ router = APIRouter()
 
 # EXCEL 처리
 @router.post("/match-json")
-async def match_json(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def match_json(file: UploadFile = File(...), stream: bool = False, db: Session = Depends(get_db)):
+    if stream:
+        # 응답 스트리밍 중에는 DB 세션이 닫힐 수 있으므로 인덱스를 먼저 확보
+        index = await run_in_threadpool(get_match_index, db)
+        source = await spool_upload(file)
+        key = cache_key("excel-stream", index.version, await run_in_threadpool(sha256_file, source))
+        return cached_ndjson_response(key, iter_matched_chunks(iter_excel_chunks(source), index), source.close)
+
     contents = await file.read()
+
+    # 같은 파일 + 같은 카탈로그 버전이면 캐시된 결과 반환
+    key = cache_key("excel", await run_in_threadpool(get_catalog_version, db), hashlib.sha256(contents).hexdigest())
+    cached = await run_in_threadpool(result_cache.get, key)
+    if cached is not None:
+        return cached
+
     excel_file = BytesIO(contents)
 
-    result_df = match_uploaded_file(excel_file, db)
-    
-    return result_df.to_dict(orient="records") # 결과를 JSON으로 반환환
+    # 이벤트 루프를 막지 않도록 스레드풀에서 매칭
+    result_df = await run_in_threadpool(match_uploaded_file, excel_file, db)
+
+    result = [jsonable_row(row) for row in result_df.to_dict(orient="records")] # 결과를 JSON으로 반환
+    await run_in_threadpool(result_cache.put, key, result)
+    return result
 
 
 @router.post("/save-matched-row")
@@ -57,49 +116,86 @@ async def save_matched_row(item: dict):
 
 # PDF 처리
 @router.post("/match-pdf")
-async def extract_drugs(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    contents = await file.read()
-    with pdfplumber.open(io.BytesIO(contents)) as pdf:
-        text = "\n".join([p.extract_text() for p in pdf.pages if p.extract_text()])
+async def extract_drugs(file: UploadFile = File(...), stream: bool = False, db: Session = Depends(get_db)):
+    # 페이지 병렬 추출을 위해 디스크에 저장 (워커 프로세스가 경로로 열어 사용)
+    path = await save_upload(file)
+    parser = PdfRowParser()
+    digest = await run_in_threadpool(sha256_path, path)
+
+    if stream:
+        index = await run_in_threadpool(get_match_index, db)
+        chunks = iter_row_chunks(iter_pdf_rows(path, parser))
+        key = cache_key("pdf-stream", index.version, digest)
+        return cached_ndjson_response(key, iter_matched_chunks(chunks, index), lambda: os.remove(path))
+
+    key = cache_key("pdf", await run_in_threadpool(get_catalog_version, db), digest)
+    cached = await run_in_threadpool(result_cache.get, key)
+    if cached is not None:
+        os.remove(path)
+        return cached
+
+    try:
+        rows = await run_in_threadpool(lambda: list(iter_pdf_rows(path, parser)))
+    finally:
+        os.remove(path)
 
-    rows, errors = parse_pdf_text_to_rows(text)
-    
     print("✅ PDF 파싱 성공 row 수:", len(rows))
     print("❌ 파싱 실패 로그:")
-    for err in errors:
+    for err in parser.errors:
         print(err)
 
     if not rows:
         return []  # 프론트에서는 data.length === 0 처리됨
 
     df = pd.DataFrame(rows)
-    matched_df = match_uploaded_file(df, db, is_dataframe=True)
-    return matched_df.to_dict(orient="records")
+    matched_df = await run_in_threadpool(match_uploaded_file, df, db, is_dataframe=True)
+
+    result = [jsonable_row(row) for row in matched_df.to_dict(orient="records")]
+    await run_in_threadpool(result_cache.put, key, result)
+    return result
 
 @router.post("/save-approved")
 def save_approved_drugs(drugs: TypingList[MappedDrugUpdate], db: Session = Depends(get_db)):
-    updated_count = 0
-
+    # 같은 표준코드가 여러 번 오면 마지막 항목 기준
+    entries = {}
     for item in drugs:
-        # 표준코드를 기준으로 기존 항목이 존재하는지 확인
-        existing = db.query(List).filter(List.standard_code == item.표준코드).first()
-        
-        if existing:
-            existing.drug_name = item.입력_약품명
-            existing.mapped_name = item.매핑_약품명
-            existing.manufacturer = item.제조사
-        else:
-            new_entry = List(
-                drug_name=item.입력_약품명,
-                mapped_name=item.매핑_약품명,
-                standard_code=item.표준코드,
-                manufacturer=item.제조사,
-                product_code="",
-                image_url="",
+        entries[item.표준코드] = {
+            "drug_name": item.입력_약품명,
+            "mapped_name": item.매핑_약품명,
+            "standard_code": item.표준코드,
+            "manufacturer": item.제조사,
+            "product_code": "",
+            "image_url": "",
+        }
+    codes = list(entries)
+
+    inserted_count = 0
+    updated_count = 0
+    try:
+        for start in range(0, len(codes), BULK_CHUNK_SIZE):
+            chunk = codes[start:start + BULK_CHUNK_SIZE]
+
+            # 기존 항목은 한 번의 IN 조회로 확인 (신규/갱신 건수 구분용)
+            existing = {
+                code for (code,) in
+                db.query(List.standard_code).filter(List.standard_code.in_(chunk))
+            }
+            updated_count += len(existing)
+            inserted_count += len(chunk) - len(existing)
+
+            # 기존 항목은 약품명/매핑명/제조사만 갱신
+            stmt = upsert_statement(
+                db.bind,
+                List.__table__,
+                [entries[code] for code in chunk],
+                key_columns=["standard_code"],
+                update_columns=["drug_name", "mapped_name", "manufacturer"],
             )
-            db.add(new_entry)
+            db.execute(stmt)
 
-        updated_count += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    db.commit()
-    return {"message": "최종 승인 약품 저장 완료", "updated": updated_count}
\ No newline at end of file
+    return {"message": "최종 승인 약품 저장 완료", "inserted": inserted_count, "updated": updated_count}
@@ -5,6 +5,9 @@ from typing import Optional, Union, List
 
 class InventoryOut(BaseModel):
     id: int
+    drug_id: int
+    drug_name: Optional[str]  # Drug 조인 값
+    standard_code: Optional[str]
     quantity: int
     unit: str
     expiration_date: Optional[date]
@@ -0,0 +1,52 @@
+# DB 종류(dialect)별 대량 INSERT / UPSERT 문 생성
+from sqlalchemy import Table
+
+
+def dialect_insert(bind):
+    # ON CONFLICT / ON DUPLICATE KEY 를 지원하는 dialect 전용 insert 반환
+    name = bind.dialect.name
+    if name == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    elif name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"지원하지 않는 DB입니다: {name}")
+    return insert
+
+
+def upsert_statement(bind, table: Table, rows: list, key_columns: list, update_columns: list):
+    # rows를 한 문장으로 INSERT 하고, 키가 겹치면 update_columns만 갱신
+    insert = dialect_insert(bind)
+    stmt = insert(table).values(rows)
+
+    if bind.dialect.name == "mysql":
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={c: stmt.excluded[c] for c in update_columns},
+    )
+
+
+def insert_ignore_statement(bind, table: Table, rows: list):
+    # 유니크 키가 겹치는 행은 오류 없이 건너뛰는 INSERT
+    insert = dialect_insert(bind)
+    stmt = insert(table).values(rows)
+
+    if bind.dialect.name == "mysql":
+        return stmt.prefix_with("IGNORE")
+    return stmt.on_conflict_do_nothing()
+
+
+def increment_statement(bind, table: Table, rows: list, key_columns: list, sum_columns: list):
+    # rows를 한 문장으로 INSERT 하고, 키가 겹치면 sum_columns에 새 값을 더함 (집계 테이블 증분 갱신)
+    insert = dialect_insert(bind)
+    stmt = insert(table).values(rows)
+
+    if bind.dialect.name == "mysql":
+        return stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in sum_columns})
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={c: table.c[c] + stmt.excluded[c] for c in sum_columns},
+    )
@@ -0,0 +1,37 @@
+"""
+    구조화 로그: "이벤트 key=value ..." 한 줄 형식 (grep / 로그 수집기에서 바로 파싱)
+    예) 2025-06-04 10:30:00,123 INFO app.ingest db_write rows=12 inserted=10 duplicate=2 seconds=0.0142
+"""
+import logging
+import sys
+from app.config import LOG_LEVEL
+
+_configured = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    # uvicorn은 루트 로거를 설정하지 않으므로 app 로거에 직접 핸들러를 붙임
+    global _configured
+    if not _configured:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        root = logging.getLogger("app")
+        root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+        _configured = True
+    return logging.getLogger(name)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}"
+    text = str(value)
+    if not text or any(c in text for c in ' "='):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, " ".join([event] + [f"{k}={_format_value(v)}" for k, v in fields.items()]))
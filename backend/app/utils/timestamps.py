@@ -0,0 +1,15 @@
+# 카운팅 결과 timestamp 문자열 해석
+from datetime import datetime
+
+
+def parse_counting_timestamp(value):
+    # "2025-06-04-10-30-00" / "20250604_103000" 등 숫자 14자리(최소 날짜 8자리) → datetime, 해석 불가면 None
+    digits = "".join(c for c in str(value or "") if c.isdigit())
+    try:
+        if len(digits) >= 14:
+            return datetime.strptime(digits[:14], "%Y%m%d%H%M%S")
+        if len(digits) >= 8:
+            return datetime.strptime(digits[:8], "%Y%m%d")
+    except ValueError:
+        pass
+    return None
@@ -0,0 +1,28 @@
+# 업로드 파일 임시 저장 유틸
+import os
+import shutil
+import tempfile
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.config import UPLOAD_SPOOL_MAX_SIZE
+
+# 업로드 파일을 임시 파일로 옮김 (작은 파일은 메모리, 큰 파일은 디스크)
+async def spool_upload(file: UploadFile):
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_SIZE)
+    while True:
+        block = await file.read(1024 * 1024)
+        if not block:
+            break
+        spooled.write(block)
+    spooled.seek(0)
+    return spooled
+
+# 업로드 파일을 디스크에 저장하고 경로 반환 (다른 프로세스에서 열어야 하는 경우)
+async def save_upload(file: UploadFile, directory: str = None) -> str:
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    suffix = os.path.splitext(file.filename or "")[1]
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    with os.fdopen(fd, "wb") as out:
+        await run_in_threadpool(shutil.copyfileobj, file.file, out)
+    return path
@@ -1,124 +1,85 @@
 import time
-import json
 import os
-import asyncio
+import threading
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 from watchdog.events import FileSystemEventHandler
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
-from app.models import CountingLog
-from app.websocket_manager import broadcast
+from app.config import WATCH_DIR, WATCH_SOURCES, WATCH_POLL_INTERVAL
+from app.database import engine
+from app.migrations import backfill_event_keys
+from app.ingest import IngestPipeline, WatchSource, parse_watch_sources, seed_ledger
+from app.image_pipeline import image_pipeline, IMAGE_EXTENSIONS
+from app.utils.logs import get_logger, log_event
 
-# 공유 폴더 경로
-WATCH_DIR = "C:\\Users\\EX_Mila\\Desktop\\counting_results"
-processed_files = set()
+logger = get_logger(__name__)
 
-# 이미지 경로
-IMAGE_DIR = os.path.join(WATCH_DIR, "images")
+# 감시 소스 (스테이션 id, 폴더, 폴링 여부)
+SOURCES = parse_watch_sources(WATCH_SOURCES, WATCH_DIR)
 
 class JSONHandler(FileSystemEventHandler):
-    def __init__(self, loop):
+    def __init__(self, pipeline: IngestPipeline, source: WatchSource):
         super().__init__()
-        self.loop = loop
-
+        self.pipeline = pipeline
+        self.source = source
 
+    # JSON 파일은 해당 스테이션 대기열에 넣기만 함 (생성/수정 이벤트는 대기열에서 합쳐짐)
     def process_file(self, path):
-        filename = os.path.basename(path)
-        if filename in processed_files:
-            return
-        time.sleep(0.5)
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                print(f"📥 수신된 카운팅 파일: {filename}")
-
-                db: Session = SessionLocal()
-                existing = db.query(CountingLog).filter_by(
-                    timestamp=data.get("timestamp"),
-                    drug_standard_code=data.get("drug_standard_code").strip(),
-                    drug_name=data.get("drug_name").strip(),
-                    count_quantity=int(data.get("count_quantity"))
-                ).first()
-
-                if existing:
-                    print("⚠️ 이미 DB에 저장된 데이터입니다.")
-                    db.close()
-                    processed_files.add(filename)
-                    return
-
-                # DB 저장
-                log = CountingLog(
-                    timestamp=data.get("timestamp"),
-                    drug_name=data.get("drug_name").strip(),
-                    drug_standard_code=data.get("drug_standard_code").strip(),
-                    drug_refer_code=data.get("drug_refer_code"),
-                    count_quantity=int(data.get("count_quantity"))
-                )
-                db.add(log)
-                db.commit() 
-                db.refresh(log) # 새로 저장된 log의 id 불러오기
-                print("✅ DB에 저장 완료")
-                
-                message = {
-                    "id": log.id,  # ✅ WebSocket 메시지에 id 추가
-                    "timestamp": log.timestamp,
-                    "drug_name": log.drug_name,
-                    "drug_standard_code": log.drug_standard_code,
-                    "count_quantity": log.count_quantity,
-                }
-                print("📦 내용:", message)
-                processed_files.add(filename)
-
-                self.loop.call_soon_threadsafe(
-                    lambda: self.loop.create_task(broadcast(message))
-                )
-
-                db.close()
-
-        except Exception as e:
-            print("❌ 오류 발생:", e)
-
-    # 이미지 파일 처리 함수
+        self.pipeline.submit(self.source.station_id, path)
+
+    # 이미지 파일은 썸네일/WebP 변환 대기열에 넣음
     def process_image(self, path):
-        filename = os.path.basename(path)
-        print(f"🟢 이미지 파일 감지됨: {filename}")
-        
+        image_pipeline.submit(path)
+
     def on_created(self, event):
         if not event.is_directory:
             if event.src_path.endswith(".json"):
                 self.process_file(event.src_path)
-            elif event.src_path.lower().endswith((".jpg", ".jpeg", ".png")):
+            elif event.src_path.lower().endswith(IMAGE_EXTENSIONS):
                 self.process_image(event.src_path)
 
     def on_modified(self, event):
         if not event.is_directory:
             if event.src_path.endswith(".json"):
                 self.process_file(event.src_path)
-            elif event.src_path.lower().endswith((".jpg", ".jpeg", ".png")):
+            elif event.src_path.lower().endswith(IMAGE_EXTENSIONS):
                 self.process_image(event.src_path)
 
 
+def make_observer(source: WatchSource):
+    # 네트워크 공유 폴더는 파일 시스템 이벤트가 오지 않을 수 있어 폴링으로 감시
+    if source.polling:
+        return PollingObserver(timeout=WATCH_POLL_INTERVAL)
+    return Observer()
+
 
 def start_watchdog(loop):
-    if not os.path.exists(WATCH_DIR):
-        os.makedirs(WATCH_DIR)
+    # 업그레이드 전 행에 event_key부터 채움 → 감시/재동기화로 같은 파일이 다시 들어와도 중복 저장되지 않음
+    backfill_event_keys(engine)
+    # ledger가 비어 있으면(업그레이드 직후) 기존 행과 맞는 파일로 먼저 채움 → 첫 재동기화가 과거 파일 전체를 다시 넣지 않음
+    seed_ledger(SOURCES)
+
+    pipeline = IngestPipeline(loop, SOURCES)
+    pipeline.start()
+
+    observers = []
+    for source in SOURCES:
+        if not os.path.exists(source.path):
+            os.makedirs(source.path)
 
-    # 기존 폴더 내 파일들 처리
-    handler = JSONHandler(loop)
-    for file in os.listdir(WATCH_DIR):
-        if file.endswith(".json"):
-            full_path = os.path.join(WATCH_DIR, file)
-            handler.process_file(full_path)
+        observer = make_observer(source)
+        observer.schedule(JSONHandler(pipeline, source), path=source.path, recursive=True) # 하위 폴더 감지
+        observer.start()
+        observers.append(observer)
+        log_event(logger, "watch_started", station=source.station_id, path=source.path, polling=source.polling)
 
-    observer = Observer()
-    observer.schedule(handler, path=WATCH_DIR, recursive=True) # 하위 폴더 감지
-    observer.start()
-    print(f"👀 JSON 감시 시작: {WATCH_DIR}")
+    # 기존 폴더 내 파일들은 ledger와 비교해 바뀐 것만 처리 (실시간 감시와 동시에 진행)
+    threading.Thread(target=pipeline.reconcile, daemon=True, name="counting-reconcile").start()
 
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+        for observer in observers:
+            observer.stop()
+    for observer in observers:
+        observer.join()
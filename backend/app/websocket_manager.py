@@ -1,15 +1,303 @@
+"""
+    WebSocket 브로드캐스트
+    - 메시지는 브로드캐스트마다 한 번만 JSON 직렬화
+    - 클라이언트마다 크기 제한 송신 대기열 + 전송 태스크 → 느린 클라이언트가 다른 화면을 막지 않음
+    - 대기열이 넘치거나(WS_CLIENT_QUEUE_SIZE) 전송이 WS_SEND_TIMEOUT을 넘기면 그 클라이언트만 연결 종료
+    - 구독: 클라이언트가 보낸 구독 메시지로 받을 이벤트를 서버에서 거름 (보내지 않으면 전체 수신)
+        {"action": "subscribe", "types": ["counting"], "drug_codes": ["8806..."], "cabinets": ["A"]}
+        {"action": "unsubscribe"}  → 다시 전체 수신
+      항목끼리는 AND, 항목 안의 값끼리는 OR, 생략한 항목은 전체
+      약품코드/캐비넷 조건은 그 값을 가진 이벤트에만 적용
+      job_progress(매칭 결과 포함)는 "job_ids"로 그 작업을 구독한 클라이언트에게만 (전체 수신 클라이언트 제외)
+    - 묶음 전송: WS_BATCH_WINDOW 동안 모인 이벤트를 한 번에 처리
+        구독 시 "batch": true → {"type": "batch", "events": [...]} 한 프레임
+        그 외(기존 클라이언트) → 이벤트마다 한 프레임 (순서 동일)
+    - 워커가 여러 개면 broadcast()는 app.backplane을 거쳐 모든 워커의 deliver()로 전달
+      (각 워커는 자기 클라이언트에게만 전송, 재연결 복구 버퍼도 워커마다 같은 내용)
+    - 재연결 복구: 최근 카운팅 이벤트를 CountingLog.id 순서로 WS_REPLAY_BUFFER개 보관
+        {"action": "resume", "last_id": 123} (또는 subscribe에 "last_id") →
+        {"type": "replay", "events": [id > 123, 구독 조건 적용], "complete": false면 버퍼보다 오래된 공백 → 전체 재조회 필요}
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
 from fastapi import WebSocket
+from app.backplane import backplane
+from app.config import WS_CLIENT_QUEUE_SIZE, WS_SEND_TIMEOUT, WS_BATCH_WINDOW, WS_REPLAY_BUFFER
+from app.metrics import WS_CLIENTS, WS_BROADCAST_SECONDS, WS_DROPPED, WS_FRAMES, WS_EVENTS
+from app.utils.logs import get_logger, log_event
+
+logger = get_logger(__name__)
+
+CLOSE_TRY_AGAIN_LATER = 1013  # 느린 클라이언트 종료 코드 (재연결 허용)
+DEFAULT_EVENT_TYPE = "counting"  # type이 없는 메시지는 카운팅 이벤트로 봄
+
+# 구독 항목 → 이벤트 메시지에서 값을 꺼내는 함수 (값이 여러 개일 수 있어 리스트로)
+DIMENSIONS = {
+    "types": lambda m: [m.get("type", DEFAULT_EVENT_TYPE)],
+    "drug_codes": lambda m: [m["drug_standard_code"]] if m.get("drug_standard_code") else None,
+    "cabinets": lambda m: m.get("cabinets"),
+    "job_ids": lambda m: [m["job_id"]] if m.get("type") == "job_progress" and m.get("job_id") else None,
+}
+# 값을 명시해 구독한 클라이언트만 받는 항목 (생략해도 전체 수신이 아님)
+PRIVATE_DIMENSIONS = {"job_ids"}
+
+
+class Client:
+    def __init__(self, websocket: WebSocket, queue_size: int = WS_CLIENT_QUEUE_SIZE):
+        self.websocket = websocket
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch = False  # 묶음 프레임 수신 여부 (구독 메시지로 설정)
+        self.task = asyncio.create_task(self._writer())
+
+    def send(self, text: str) -> bool:
+        # 대기열에 넣기만 함 (가득 차면 False)
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _writer(self):
+        while True:
+            text = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), WS_SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                drop(self.websocket, "send_timeout")
+                return
+            except Exception:
+                drop(self.websocket, "send_error")
+                return
+
+
+class SubscriptionIndex:
+    # 항목별 값 → 구독 클라이언트 역색인 + 항목을 거르지 않는 클라이언트 집합
+    def __init__(self):
+        self.by_value = {dim: {} for dim in DIMENSIONS}
+        self.any = {dim: set() for dim in DIMENSIONS}
+        self.filters = {}  # websocket → {항목: 값 집합 또는 None}
+
+    def set(self, websocket: WebSocket, filters: dict = None):
+        self.remove(websocket)
+        filters = {dim: (filters or {}).get(dim) for dim in DIMENSIONS}
+        self.filters[websocket] = filters
+        for dim, values in filters.items():
+            if values is None:
+                self.any[dim].add(websocket)
+            else:
+                for value in values:
+                    self.by_value[dim].setdefault(value, set()).add(websocket)
+
+    def remove(self, websocket: WebSocket):
+        filters = self.filters.pop(websocket, None)
+        if filters is None:
+            return
+        for dim, values in filters.items():
+            if values is None:
+                self.any[dim].discard(websocket)
+                continue
+            for value in values:
+                subscribers = self.by_value[dim].get(value)
+                if subscribers is not None:
+                    subscribers.discard(websocket)
+                    if not subscribers:
+                        del self.by_value[dim][value]
+
+    def accepts(self, websocket: WebSocket, message: dict) -> bool:
+        # 클라이언트 하나가 이 이벤트를 받는지 (재연결 복구용)
+        filters = self.filters.get(websocket)
+        if filters is None:
+            return False
+        for dim, extract in DIMENSIONS.items():
+            values = extract(message)
+            if values is None:
+                continue
+            if filters[dim] is None:
+                if dim in PRIVATE_DIMENSIONS:
+                    return False
+                continue
+            if not any(str(v) in filters[dim] for v in values):
+                return False
+        return True
+
+    def match(self, message: dict) -> set:
+        # 이벤트를 받을 클라이언트 집합
+        result = None
+        for dim, extract in DIMENSIONS.items():
+            values = extract(message)
+            if values is None:
+                continue  # 이벤트에 없는 항목은 거르지 않음
+            matched = set() if dim in PRIVATE_DIMENSIONS else set(self.any[dim])
+            for value in values:
+                matched |= self.by_value[dim].get(str(value), set())
+            result = matched if result is None else result & matched
+            if not result:
+                break
+        return set(self.filters) if result is None else result
+
+
+def parse_subscription(data: dict) -> dict:
+    # 구독 메시지 → {항목: 문자열 값 집합 또는 None}, 형식이 틀리면 ValueError
+    filters = {}
+    for dim in DIMENSIONS:
+        values = data.get(dim)
+        if values is None:
+            filters[dim] = None
+            continue
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(isinstance(v, (str, int)) for v in values):
+            raise ValueError(f"{dim}는 문자열 목록이어야 합니다.")
+        filters[dim] = frozenset(str(v) for v in values)
+    return filters
+
+
+def serialize(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+clients: dict[WebSocket, Client] = {}
+subscriptions = SubscriptionIndex()
+replay_buffer = deque(maxlen=WS_REPLAY_BUFFER)  # 최근 카운팅 이벤트 (id 오름차순)
+_pending = []  # 다음 묶음 전송을 기다리는 이벤트
+_flush_handle = None
+WS_CLIENTS.set_function(lambda: {(): len(clients)})
 
-clients: list[WebSocket] = []
 
 async def connect(websocket: WebSocket):
     await websocket.accept()
-    clients.append(websocket)
+    clients[websocket] = Client(websocket)
+    subscriptions.set(websocket)
 
 def disconnect(websocket: WebSocket):
-    if websocket in clients:
-        clients.remove(websocket)
+    subscriptions.remove(websocket)
+    client = clients.pop(websocket, None)
+    if client is not None and client.task is not asyncio.current_task():
+        client.task.cancel()
+
+def drop(websocket: WebSocket, reason: str):
+    # 서버 쪽에서 끊는 경우: 목록에서 빼고 소켓 종료는 따로 (종료 자체가 막혀도 브로드캐스트에 영향 없음)
+    client = clients.get(websocket)
+    if client is None:
+        return
+    disconnect(websocket)
+    WS_DROPPED.inc(reason=reason)
+    log_event(
+        logger, "ws_client_dropped", logging.WARNING,
+        reason=reason, client=_address(websocket), queued=client.queue.qsize(), clients=len(clients),
+    )
+    asyncio.create_task(_close(websocket))
+
+def _address(websocket: WebSocket) -> str:
+    peer = websocket.client
+    return f"{peer.host}:{peer.port}" if peer else "unknown"
+
+async def _close(websocket: WebSocket):
+    try:
+        await asyncio.wait_for(websocket.close(code=CLOSE_TRY_AGAIN_LATER), WS_SEND_TIMEOUT)
+    except Exception:
+        pass
+
+def send(websocket: WebSocket, message: dict):
+    # 클라이언트 하나에게만 보냄 (구독 응답/오류)
+    client = clients.get(websocket)
+    if client is None:
+        return
+    WS_FRAMES.inc(kind="replay" if message.get("type") == "replay" else "control")
+    if not client.send(serialize(message)):
+        drop(websocket, "queue_full")
+
+def replay(websocket: WebSocket, last_id: int):
+    # last_id 이후 이벤트 중 구독 조건에 맞는 것만 다시 보냄
+    # 버퍼가 비었거나 last_id 다음 이벤트가 이미 밀려났을 수 있으면 complete=false
+    events = [e for e in replay_buffer if e["id"] > last_id and subscriptions.accepts(websocket, e)]
+    complete = bool(replay_buffer) and last_id >= replay_buffer[0]["id"] - 1
+    send(websocket, {"type": "replay", "events": events, "complete": complete})
+
+def handle_message(websocket: WebSocket, text: str):
+    # 클라이언트가 보낸 제어 메시지 처리 (구독/구독 해제)
+    try:
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("JSON 객체여야 합니다.")
+        action = data.get("action")
+        if action not in ("subscribe", "unsubscribe", "resume"):
+            raise ValueError(f"지원하지 않는 action: {action}")
+        last_id = data.get("last_id")
+        if last_id is not None and (not isinstance(last_id, int) or isinstance(last_id, bool)):
+            raise ValueError("last_id는 정수여야 합니다.")
+        filters = parse_subscription(data) if action == "subscribe" else None
+    except ValueError as e:  # JSONDecodeError 포함
+        send(websocket, {"type": "error", "detail": str(e)})
+        return
+
+    client = clients.get(websocket)
+    if action != "resume":
+        subscriptions.set(websocket, filters)
+        if client is not None:
+            client.batch = action == "subscribe" and bool(data.get("batch"))
+        send(websocket, {
+            "type": "subscribed",
+            "filters": {dim: sorted(v) for dim, v in (filters or {}).items() if v is not None},
+            "batch": client is not None and client.batch,
+        })
+    if last_id is not None:
+        replay(websocket, last_id)
 
 async def broadcast(message: dict):
-    for client in clients:
-        await client.send_json(message)
+    # 모든 워커(자기 자신 포함)에 전달 → 각 워커의 deliver()
+    await backplane.publish(message)
+
+def deliver(message: dict):
+    # 이 워커의 클라이언트에게 보낼 이벤트
+    # 모아 두었다가 WS_BATCH_WINDOW 뒤 한 번에 전송 (창 안의 첫 이벤트가 타이머 시작)
+    global _flush_handle
+    WS_EVENTS.inc()
+    _pending.append(message)
+    if WS_BATCH_WINDOW <= 0:
+        _flush()
+    elif _flush_handle is None:
+        _flush_handle = asyncio.get_running_loop().call_later(WS_BATCH_WINDOW, _flush)
+
+def _flush():
+    # 구독 색인으로 이벤트별 수신 클라이언트를 고르고, 같은 내용의 프레임은 한 번만 직렬화
+    # 대기열에 넣기만 하므로 클라이언트 수와 관계없이 바로 끝남
+    global _pending, _flush_handle
+    events, _pending, _flush_handle = _pending, [], None
+    if not events:
+        return
+    started = time.perf_counter()
+
+    for event in events:
+        if event.get("type", DEFAULT_EVENT_TYPE) == DEFAULT_EVENT_TYPE and "id" in event:
+            replay_buffer.append(event)
+
+    received = {}  # websocket → 받을 이벤트 번호 목록
+    for i, event in enumerate(events):
+        for websocket in subscriptions.match(event):
+            received.setdefault(websocket, []).append(i)
+
+    singles = {}  # 이벤트 번호 → 직렬화된 프레임
+    batches = {}  # 이벤트 번호 묶음 → 직렬화된 묶음 프레임
+    for websocket, indexes in received.items():
+        client = clients.get(websocket)
+        if client is None:
+            continue
+        if client.batch:
+            key = tuple(indexes)
+            if key not in batches:
+                batches[key] = serialize({"type": "batch", "events": [events[i] for i in indexes]})
+            frames = [batches[key]]
+            WS_FRAMES.inc(kind="batch")
+        else:
+            for i in indexes:
+                if i not in singles:
+                    singles[i] = serialize(events[i])
+            frames = [singles[i] for i in indexes]
+            WS_FRAMES.inc(len(frames), kind="single")
+        if not all(client.send(frame) for frame in frames):
+            drop(websocket, "queue_full")
+    WS_BROADCAST_SECONDS.observe(time.perf_counter() - started)
@@ -0,0 +1,220 @@
+"""
+    업로드 매칭 벤치마크
+    사용법 (backend 디렉토리에서):
+        python -m benchmarks.bench_matching --sizes 1000 10000 100000 --rows 500
+        python -m benchmarks.bench_matching --sizes 10000 --modes batch --json after.json
+    - 로컬 SQLite DB에 합성 카탈로그(1k/10k/100k)를 넣고 엑셀/PDF 주문서를 매칭
+    - 결과: 처리량(rows/s), 단일 행 요청 지연 p50/p99, 최대 RSS, 매칭 정확도
+    - row: 기존 행 단위 extractOne, batch: 코드 조회 + 후보군 + 배치 점수 행렬
+    - --json 결과 파일을 변경 전/후로 남겨 성능과 매칭 품질을 나란히 비교
+    - 최대 RSS는 프로세스 전체 기간의 최댓값이므로 (카탈로그 크기, 모드) 조합마다 하위 프로세스에서 따로 실행
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from benchmarks.synthetic import generate_catalog, generate_orders, orders_to_excel, orders_to_pdf
+
+
+def peak_rss_mb():
+    # 프로세스 시작 이후 최대 RSS (MB): 케이스마다 하위 프로세스로 실행하므로 그 케이스의 최댓값
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 1024 / 1024, 1)
+    except ImportError:
+        return None
+
+
+def format_ms(value) -> str:
+    # 지연을 측정하지 않은 케이스(PDF)는 0 대신 n/a
+    return f"{value:>8.2f}ms" if value is not None else f"{'n/a':>10}"
+
+
+def percentiles(samples: list):
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else None
+        return value, value
+    cuts = statistics.quantiles(samples, n=100)
+    return statistics.median(samples) * 1000, cuts[98] * 1000
+
+
+def accuracy(matched_codes, truth_codes) -> float:
+    pairs = list(zip(matched_codes, truth_codes))
+    if not pairs:
+        return 0.0
+    return round(100 * sum(1 for m, t in pairs if m == t) / len(pairs), 2)
+
+
+def stage_counts(stages) -> dict:
+    counts = {}
+    for stage in stages:
+        counts[stage] = counts.get(stage, 0) + 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업로드 매칭 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rows", type=int, default=500, help="주문서 행 수")
+    parser.add_argument("--noise", type=float, default=0.3, help="약품명에 잡음을 넣을 비율")
+    parser.add_argument("--code-ratio", type=float, default=0.3, help="표준코드가 함께 오는 행 비율")
+    parser.add_argument("--modes", nargs="+", default=["row", "batch"], choices=["row", "batch"])
+    parser.add_argument("--latency-samples", type=int, default=100)
+    parser.add_argument("--skip-pdf", action="store_true")
+    parser.add_argument("--workdir", help="SQLite DB / 캐시 / 픽스처 저장 경로 (기본: 임시 디렉토리)")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)  # 하위 프로세스: 주어진 케이스만 실행
+    args = parser.parse_args()
+
+    if not args.single:
+        run_isolated(args)
+        return
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="exion-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    # app 모듈을 불러오기 전에 로컬 SQLite DB와 캐시 경로 지정
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+
+    import pandas as pd
+    from sqlalchemy import insert
+    from app.database import Base, engine, SessionLocal
+    from app.models import Drug, bump_catalog_version
+    from scripts.file_mapping import match_uploaded_file, match_dataframe
+    from scripts.match_engine import row_memo
+    from scripts.match_index import get_match_index
+    from scripts.pdf_ingest import iter_pdf_rows
+    from scripts.pdf_parser import PdfRowParser
+
+    Base.metadata.create_all(bind=engine)
+    results = []
+
+    def record(**row):
+        row["peak_rss_mb"] = peak_rss_mb()
+        results.append(row)
+        print(
+            f"{row['catalog']:>7} {row['fixture']:>5} {row['mode']:>5} "
+            f"{row['rows']:>6} rows {row['rows_per_sec']:>9.1f} rows/s "
+            f"p50 {format_ms(row['p50_ms'])} p99 {format_ms(row['p99_ms'])} "
+            f"acc {row['accuracy']:>6.2f}% rss {row['peak_rss_mb']}MB {row.get('stages', '')}"
+        )
+
+    for size in args.sizes:
+        catalog = generate_catalog(size)
+        orders = generate_orders(catalog, args.rows, args.noise, args.code_ratio)
+        truth = [t for _, _, _, t in orders]
+
+        db = SessionLocal()
+        try:
+            # 카탈로그 교체 후 인덱스 생성 시간 측정
+            db.query(Drug).delete()
+            db.execute(insert(Drug), catalog)
+            bump_catalog_version(db.connection())
+            db.commit()
+
+            started = time.perf_counter()
+            index = get_match_index(db)
+            print(f"📚 catalog {size}: 인덱스 생성 {time.perf_counter() - started:.2f}s")
+
+            xlsx = orders_to_excel(orders)
+            for mode in args.modes:
+                batch = mode == "batch"
+
+                # 처리량: 주문서 전체를 한 번에 매칭
+                row_memo.clear()
+                started = time.perf_counter()
+                df = match_uploaded_file(BytesIO(xlsx), db, batch=batch)
+                elapsed = time.perf_counter() - started
+
+                # 지연: 한 행짜리 요청을 하나씩 매칭 (행 메모 효과 제외)
+                latencies = []
+                for name, qty, code, _ in orders[:args.latency_samples]:
+                    row_memo.clear()
+                    one = pd.DataFrame([{"약품명": name, "수량": qty, "표준코드": code}])
+                    t = time.perf_counter()
+                    match_dataframe(one, index, batch=batch, verbose=False)  # 출력 시간이 지연에 섞이지 않도록
+                    latencies.append(time.perf_counter() - t)
+                p50, p99 = percentiles(latencies)
+
+                record(
+                    catalog=size, fixture="excel", mode=mode, rows=len(df),
+                    rows_per_sec=len(df) / elapsed, p50_ms=p50, p99_ms=p99,
+                    accuracy=accuracy(df["표준코드"], truth),
+                    stages=stage_counts(df["매칭 단계"]),
+                )
+
+            if args.skip_pdf:
+                continue
+
+            # PDF: 페이지 추출 + 파싱 + 배치 매칭 전체 시간
+            pdf_path = os.path.join(workdir, f"orders_{size}.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(orders_to_pdf(orders, catalog))
+            truth_by_name = {name: t for name, _, _, t in orders}
+
+            row_memo.clear()
+            started = time.perf_counter()
+            pdf_parser = PdfRowParser()
+            rows = list(iter_pdf_rows(pdf_path, pdf_parser))
+            matched = match_dataframe(pd.DataFrame(rows), index) if rows else []
+            elapsed = time.perf_counter() - started
+
+            record(
+                catalog=size, fixture="pdf", mode="batch", rows=len(matched),
+                rows_per_sec=len(matched) / elapsed if elapsed else 0.0, p50_ms=None, p99_ms=None,
+                accuracy=accuracy(
+                    [m["표준코드"] for m in matched],
+                    [truth_by_name.get(m["입력 약품명"]) for m in matched],
+                ),
+                stages=stage_counts(m["매칭 단계"] for m in matched),
+            )
+        finally:
+            db.close()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+
+
+def run_isolated(args):
+    # (카탈로그 크기, 모드)마다 새 프로세스에서 실행해 최대 RSS를 케이스별로 측정 (PDF는 마지막 모드와 함께)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="exion-bench-")
+    results = []
+    for size in args.sizes:
+        for mode in args.modes:
+            out = os.path.join(workdir, f"result_{size}_{mode}.json")
+            command = [
+                sys.executable, "-m", "benchmarks.bench_matching", "--single",
+                "--sizes", str(size), "--modes", mode, "--rows", str(args.rows),
+                "--noise", str(args.noise), "--code-ratio", str(args.code_ratio),
+                "--latency-samples", str(args.latency_samples),
+                "--workdir", os.path.join(workdir, f"{size}_{mode}"), "--json", out,
+            ]
+            if args.skip_pdf or mode != args.modes[-1]:
+                command.append("--skip-pdf")
+            subprocess.run(command, check=True)
+            with open(out, encoding="utf-8") as f:
+                results.extend(json.load(f))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
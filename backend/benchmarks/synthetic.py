@@ -0,0 +1,116 @@
+"""
+    벤치마크용 합성 데이터 생성
+    - 한국어 약품명 카탈로그 (성분/브랜드 음절 + 함량(mg, 밀리그램) + 제형(정, 캡슐 ...))
+    - 제조사 표기 ((주), (유)) 포함
+    - 카탈로그에서 뽑은 주문 행에 잡음(공백, 함량 표기, 오타 등)을 섞은 엑셀/PDF 주문서
+"""
+import random
+from io import BytesIO
+import pandas as pd
+
+SYLLABLES = list(
+    "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후"
+    "그느드르므브스으즈크트프흐기니디리미비시이지치키티피히렌론린민빈신틴핀졸놀롤렉틱톤탄살"
+)
+FORMS = ["정", "캡슐", "서방정", "필름코팅정", "연질캡슐", "시럽", "주"]
+DOSES = [1, 2.5, 5, 10, 20, 25, 40, 50, 80, 100, 125, 200, 250, 500, 1000]
+UNITS = ["mg", "밀리그램"]
+COMPANIES = [
+    "한미약품", "종근당", "대웅제약", "유한양행", "녹십자", "동아에스티", "보령", "일동제약",
+    "JW중외제약", "광동제약", "제일약품", "한국화이자", "한국노바티스", "삼진제약", "휴온스",
+]
+
+
+def _drug_name(rng: random.Random) -> str:
+    stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+    dose = rng.choice(DOSES)
+    dose = int(dose) if float(dose).is_integer() else dose
+    return f"{stem}{rng.choice(FORMS)}{dose}{rng.choice(UNITS)}"
+
+
+def _manufacturer(rng: random.Random) -> str:
+    company = rng.choice(COMPANIES)
+    marker = rng.choice(["(주)", "(유)"])
+    return f"{marker}{company}" if rng.random() < 0.5 else f"{company}{marker}"
+
+
+def generate_catalog(size: int, seed: int = 0) -> list:
+    # drug 테이블에 넣을 dict 리스트 (표준코드 880 + 10자리, 약품명 중복 없음)
+    rng = random.Random(seed)
+    names = set()
+    catalog = []
+    while len(catalog) < size:
+        name = _drug_name(rng)
+        if name in names:
+            continue
+        names.add(name)
+        n = len(catalog)
+        catalog.append({
+            "drug_name": name,
+            "standard_code": f"880{n:010d}",
+            "product_code": f"{200000000 + n}",
+            "manufacturer": _manufacturer(rng),
+            "image_url": "",
+        })
+    return catalog
+
+
+def add_noise(name: str, rng: random.Random) -> str:
+    # 실제 주문서에서 보이는 표기 차이를 하나 적용
+    op = rng.randrange(6)
+    if op == 0:
+        return name.replace("밀리그램", "mg") if "밀리그램" in name else name.replace("mg", "밀리그램")
+    if op == 1:
+        i = rng.randrange(1, len(name))
+        return name[:i] + " " + name[i:]  # 공백 섞기
+    if op == 2 and "정" in name:
+        return name.replace("정", "", 1)
+    if op == 3:
+        i = rng.randrange(len(name))
+        return name[:i] + rng.choice(SYLLABLES) + name[i + 1:]  # 오타
+    if op == 4:
+        return name + " (수출용)"
+    return name.upper()
+
+
+def generate_orders(catalog: list, rows: int, noise: float = 0.3, code_ratio: float = 0.3, seed: int = 1) -> list:
+    # (약품명, 수량, 표준코드 또는 None, 정답 표준코드) 튜플 리스트
+    rng = random.Random(seed)
+    orders = []
+    for _ in range(rows):
+        drug = rng.choice(catalog)
+        name = add_noise(drug["drug_name"], rng) if rng.random() < noise else drug["drug_name"]
+        code = drug["standard_code"] if rng.random() < code_ratio else None
+        orders.append((name, rng.randint(1, 300), code, drug["standard_code"]))
+    return orders
+
+
+def orders_to_excel(orders: list) -> bytes:
+    df = pd.DataFrame(
+        [(name, qty, code) for name, qty, code, _ in orders],
+        columns=["약품명", "수량", "표준코드"],
+    )
+    out = BytesIO()
+    df.to_excel(out, index=False)
+    return out.getvalue()
+
+
+def orders_to_pdf(orders: list, catalog: list, lines_per_page: int = 60) -> bytes:
+    # pdf_parser 형식: 헤더 5줄 뒤에 약품명 / 표준코드(또는 판매처) / 총수량 순서
+    import fitz  # PyMuPDF
+
+    manufacturers = {d["standard_code"]: d["manufacturer"] for d in catalog}
+    lines = ["상품명", "표준코드", "판매처", "규격", "총수량"]
+    for name, qty, code, truth in orders:
+        lines += [name, code or manufacturers[truth], str(qty)]
+
+    doc = fitz.open()
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        y = 40
+        for line in lines[start:start + lines_per_page]:
+            page.insert_text((40, y), line, fontname="korea", fontsize=9)
+            y += 12
+    data = doc.tobytes()
+    doc.close()
+    return data
@@ -0,0 +1,36 @@
+"""
+    닫힌 달 counting_log를 Parquet 보관 파일로 옮기기 (ARCHIVE_DIR/counting_log/YYYY-MM.parquet)
+    - 서버가 ARCHIVE_INTERVAL마다 자동으로 실행하므로 보통은 따로 실행할 필요 없음
+    - --month를 주면 그 달만 보관 (현재 달처럼 아직 수집 중인 달은 지정하지 말 것)
+    실행: python scripts/archive_counting_log.py [--month 2025-03]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import date
+from app.archive import archive_closed_months, archive_month, archive_path, pa
+
+
+def parse_month(value: str) -> date:
+    return date.fromisoformat(f"{value}-01")
+
+
+parser = argparse.ArgumentParser(description="counting_log 월별 보관")
+parser.add_argument("--month", type=parse_month, help="보관할 달 (YYYY-MM)")
+args = parser.parse_args()
+
+if pa is None:
+    print("❌ pyarrow가 설치되지 않았습니다: pip install pyarrow")
+    sys.exit(1)
+
+try:
+    if args.month:
+        moved = archive_month(args.month)
+        print(f"🎉 {args.month:%Y-%m} 보관 완료: {moved}건 → {archive_path(args.month)}")
+    else:
+        moved = archive_closed_months()
+        print(f"🎉 보관 완료: {moved}건")
+except Exception as e:
+    print("❌ 오류 발생:", e)
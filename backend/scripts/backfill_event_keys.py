@@ -0,0 +1,25 @@
+"""
+    기존 counting_log 행에 event_key(내용 기준 중복 방지 키) 채우기
+    - 감시를 시작하기 전에 리더 워커가 자동으로 실행하므로 보통은 따로 실행할 필요 없음
+    - id 순서로 청크 단위 조회/갱신, 청크마다 커밋 (테이블을 오래 잠그지 않음)
+    - 같은 내용의 중복 행은 가장 먼저 저장된 행만 키를 갖고 나머지는 NULL로 남김
+    실행: python scripts/backfill_event_keys.py [--chunk 5000]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.config import COUNTED_AT_MIGRATION_CHUNK
+from app.database import engine
+from app.migrations import backfill_event_keys
+
+parser = argparse.ArgumentParser(description="counting_log.event_key 채우기")
+parser.add_argument("--chunk", type=int, default=COUNTED_AT_MIGRATION_CHUNK, help="한 번에 갱신할 행 수")
+args = parser.parse_args()
+
+try:
+    filled = backfill_event_keys(engine, args.chunk)
+    print(f"🎉 event_key 채우기 완료: {filled}건")
+except Exception as e:
+    print("❌ 오류 발생:", e)
@@ -1,57 +1,145 @@
+import math
 import pandas as pd
-from io import BytesIO  
-from rapidfuzz import process, fuzz  
+from io import BytesIO
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from rapidfuzz import process, fuzz
 from sqlalchemy.orm import Session
-from app.models import Drug
+from app.config import STREAM_CHUNK_SIZE
+from scripts.match_index import MatchIndex, get_match_index, normalize, normalize_code
+from scripts.match_engine import match_queries, STAGE_FULL
 
-# 데이터 전처리
-def normalize(name: str) -> str:
-    if not name:
-        return ""
-    return name.lower().replace("정", "").replace("mg", "").replace(" ", "")
+# 업로드 행에서 약품명, 수량, 코드(있으면) 추출
+def extract_input_rows(df: pd.DataFrame) -> list:
+    rows = []
+    for _, row in df.iterrows():
+        input_name = row.get("약품명") or row.get("입력 약품명") or row.get("상품명")
+        input_qty = row.get("수량") or row.get("입력 수량")
+        input_code = normalize_code(row.get("표준코드") or row.get("품목일련번호"))
+
+        if not input_name or pd.isna(input_name):
+            continue
+        rows.append((input_name, input_qty, input_code))
+    return rows
+
+# JSON 직렬화가 가능한 값으로 변환 (numpy 스칼라, NaN, 날짜)
+def _jsonable(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):  # numpy 스칼라
+        return _jsonable(value.item())
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+def jsonable_row(row: dict) -> dict:
+    return {k: _jsonable(v) for k, v in row.items()}
+
+# 매핑 결과 딕셔너리 구성
+def build_result(input_name, input_qty, matched_drug, score, stage, memo: bool = False) -> dict:
+    return {
+        "입력 약품명": input_name,
+        "입력 수량": input_qty,
+        "매핑 약품명": matched_drug.drug_name if matched_drug else None,
+        "표준코드": matched_drug.standard_code if matched_drug else None,
+        "품목일련번호": matched_drug.product_code if matched_drug else None,
+        "제조사": matched_drug.manufacturer if matched_drug else None,
+        "약품 이미지": matched_drug.image_url if matched_drug else None,
+        "유사도 점수": int(score),
+        "매핑 여부": "O" if score >= 80 else "X",
+        "매칭 단계": stage,
+        "메모 재사용": "O" if memo else "X",  # 이전 업로드의 같은 행 매칭 결과를 그대로 사용
+    }
+
+def match_dataframe(df: pd.DataFrame, index: MatchIndex, batch: bool = True, verbose: bool = True) -> list:
+    # verbose=False: 단계별 건수를 출력하지 않음 (벤치마크 지연 측정처럼 여러 번 호출할 때)
+    # 헤더 정리
+    df.columns = df.columns.str.strip()
+
+    input_rows = extract_input_rows(df)
+    results = []
 
-def match_uploaded_file(file_or_df, db: Session, is_dataframe: bool = False) -> pd.DataFrame:
+    if batch:
+        # 코드 조회 → 후보군 → 전체 스캔 순으로 중복 제거된 입력을 한 번에 매칭
+        queries = [(normalize(name), code) for name, _, code in input_rows]
+        matches = match_queries(queries, index)
+        for (input_name, input_qty, _), query in zip(input_rows, queries):
+            idx, score, stage, memo = matches[query]
+            matched_drug = index.drugs[idx] if score >= 70 else None
+            results.append(build_result(input_name, input_qty, matched_drug, score, stage, memo))
+
+        if verbose:
+            stages = pd.Series([r["매칭 단계"] for r in results]).value_counts().to_dict()
+            print("🔎 매칭 단계별 건수:", stages)
+        return results
+
+    # 유사도 기반 매핑 반복 (행 단위)
+    for input_name, input_qty, _ in input_rows:
+        best, score, idx = process.extractOne(normalize(input_name), index.names, scorer=fuzz.ratio) # 가장 유사한 문자열 하나 추출
+        matched_drug = index.drugs[idx] if score >= 70 else None
+        results.append(build_result(input_name, input_qty, matched_drug, score, STAGE_FULL))
+
+    return results
+
+def match_uploaded_file(file_or_df, db: Session, is_dataframe: bool = False, batch: bool = True) -> pd.DataFrame:
     if is_dataframe:
         df = file_or_df
     else:
         df = pd.read_excel(file_or_df)
 
-    # 헤더 정리
-    df.columns = df.columns.str.strip()
+    # 공유 매칭 인덱스 (정규화된 약품명 + 약품 정보)
+    index = get_match_index(db)
+    results = match_dataframe(df, index, batch=batch)
 
-    # DB Drug 데이터 불러오기
-    drugs = db.query(Drug).all()
+    # 최종 DataFrame으로 변환
+    return pd.DataFrame(results)
 
-    results = []
+# 엑셀 파일을 chunk_size 행씩 DataFrame으로 읽기 (read_only 모드라 시트 전체를 메모리에 올리지 않음)
+def iter_excel_chunks(file, chunk_size: int = STREAM_CHUNK_SIZE):
+    try:
+        wb = load_workbook(file, read_only=True, data_only=True)
+    except InvalidFileException:
+        # .xls 등 openpyxl 미지원 형식은 pandas로 한 번에 읽은 뒤 나눠서 반환
+        file.seek(0)
+        df = pd.read_excel(file)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].copy()
+        return
 
-    # 유사도 기반 매핑 반복
-    for _, row in df.iterrows():
-        input_name = row.get("약품명") or row.get("입력 약품명") or row.get("상품명")
-        input_qty = row.get("수량") or row.get("입력 수량")
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
 
-        if not input_name:
-            continue
+        chunk = []
+        for values in rows:
+            if all(v is None for v in values):
+                continue
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        wb.close()
 
-        # 유사도 기반 후보군 생성
-        choices = [(normalize(d.drug_name), d) for d in drugs] # DB 약품명 정규화 후 이름, 객체 형태로 저장
-        names_only = [c[0] for c in choices] # 유사도 비교용 이름 리스트 추출
-
-        # 유사도 기반 매칭
-        best, score, idx = process.extractOne(normalize(input_name), names_only, scorer=fuzz.ratio) # 가장 유사한 문자열 하나 추출
-        matched_drug = choices[idx][1] if score >= 70 else None
-
-        # 매핑 결과 딕셔너리 구성 (리스트 형태로 저장)
-        results.append({
-            "입력 약품명": input_name,
-            "입력 수량": input_qty,
-            "매핑 약품명": matched_drug.drug_name if matched_drug else None,
-            "표준코드": matched_drug.standard_code if matched_drug else None,
-            "품목일련번호": matched_drug.product_code if matched_drug else None,
-            "제조사": matched_drug.manufacturer if matched_drug else None,
-            "약품 이미지": matched_drug.image_url if matched_drug else None,
-            "유사도 점수": int(score),
-            "매핑 여부": "O" if score >= 80 else "X"
-        })
+# 행(dict) 이터레이터를 chunk_size 행씩 DataFrame으로 묶기
+def iter_row_chunks(rows, chunk_size: int = STREAM_CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield pd.DataFrame(chunk)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk)
 
-    # 최종 DataFrame으로 변환
-    return pd.DataFrame(results) 
+# DataFrame 조각마다 매칭 결과(list[dict])를 바로 반환
+def iter_matched_chunks(chunks, index: MatchIndex):
+    for df in chunks:
+        results = match_dataframe(df, index)
+        if results:
+            yield results
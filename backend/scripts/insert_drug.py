@@ -3,9 +3,14 @@
     중복되지 않은 약품 데이터를 drug 테이블에 필터링 + 삽입하는 자동 스크립트
 """
 import os
+import sys
 import pandas as pd
 from sqlalchemy import create_engine
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models import bump_catalog_version
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(DATABASE_URL)
 
@@ -50,6 +55,9 @@ final = final[final["_merge"] == "left_only"].drop(columns=["_merge"])
 # 최종 삽입
 if not final.empty:
     final.to_sql("drug", engine, if_exists="append", index=False)
+    # ORM을 거치지 않으므로 매칭 인덱스 버전을 직접 올림
+    with engine.begin() as conn:
+        bump_catalog_version(conn)
     print(f"{len(final)} new records inserted into 'drug' table.")
 else:
     print("No new records to insert. All data already exists.")
@@ -0,0 +1,127 @@
+"""
+    배치 퍼지 매칭 엔진
+    - 중복 제거된 입력 약품명 전체를 카탈로그와 한 번에 점수 행렬(cdist)로 계산
+    - rapidfuzz 내부 스레드로 멀티코어 사용 (MATCH_WORKERS)
+    - 입력을 MATCH_CHUNK_SIZE 단위로 나눠 행렬 메모리 상한 유지
+    - 2단계 매칭: 코드 해시 조회 → bigram 후보군 퍼지 비교 → (기준 미만일 때만) 전체 스캔
+    - 행 단위 메모: 이미 매칭한 (이름, 코드)는 카탈로그 버전이 같으면 재사용
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+from rapidfuzz import process, fuzz
+from app.config import MATCH_WORKERS, MATCH_CHUNK_SIZE, MATCH_CANDIDATE_LIMIT, ROW_MEMO_SIZE
+from scripts.match_index import MatchIndex
+
+MATCH_THRESHOLD = 70  # file_mapping의 매핑 기준 점수와 동일
+
+# 매칭 단계 (응답의 "매칭 단계" 값)
+STAGE_CODE = "code"
+STAGE_CANDIDATE = "candidate"
+STAGE_FULL = "full"
+
+
+class RowMemo:
+    # (정규화된 이름, 코드) → (idx, 점수, 단계) LRU, 카탈로그 지문이 바뀌면 비움
+    def __init__(self, size: int):
+        self.size = size
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, version: str, queries) -> dict:
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+                return {}
+            found = {}
+            for query in queries:
+                if query in self.entries:
+                    self.entries.move_to_end(query)
+                    found[query] = self.entries[query]
+            return found
+
+    def clear(self):
+        with self.lock:
+            self.version = None
+            self.entries.clear()
+
+    def store(self, version: str, results: dict):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries.update(results)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+row_memo = RowMemo(ROW_MEMO_SIZE)
+
+
+def score_names(queries: list, index: MatchIndex, workers: int = MATCH_WORKERS, chunk_size: int = MATCH_CHUNK_SIZE) -> list:
+    # 각 입력(정규화된 이름)에 대해 (카탈로그 idx, 점수) 반환 - extractOne과 같은 결과
+    if not index.names:
+        return [(None, 0.0) for _ in queries]
+
+    results = []
+    for start in range(0, len(queries), chunk_size):
+        chunk = queries[start:start + chunk_size]
+        # float64: extractOne 점수와 int() 절삭 결과가 같도록 유지
+        matrix = process.cdist(chunk, index.names, scorer=fuzz.ratio, dtype=np.float64, workers=workers)
+        best_idx = matrix.argmax(axis=1)  # 동점이면 가장 앞의 약품 (extractOne과 동일)
+        best_scores = matrix[np.arange(len(chunk)), best_idx]
+        results.extend(zip(best_idx.tolist(), best_scores.tolist()))
+
+    return results
+
+
+def match_candidates(name: str, index: MatchIndex, limit: int = MATCH_CANDIDATE_LIMIT):
+    # bigram 후보군 안에서만 퍼지 비교: (idx, 점수), 후보가 없으면 None
+    candidate_ids = index.candidates(name, limit)
+    if len(candidate_ids) == 0:
+        return None
+
+    best, score, pos = process.extractOne(name, [index.names[i] for i in candidate_ids], scorer=fuzz.ratio)
+    return int(candidate_ids[pos]), score
+
+
+def match_queries(queries: list, index: MatchIndex, workers: int = MATCH_WORKERS, chunk_size: int = MATCH_CHUNK_SIZE) -> dict:
+    # queries: (정규화된 이름, 코드) 리스트 → {(이름, 코드): (idx, 점수, 단계, 메모 재사용 여부)}
+    # 메모에서 가져온 행도 처음 매칭된 단계를 그대로 유지
+    unique = list(dict.fromkeys(queries))
+    memoized = row_memo.lookup(index.version, unique)
+    computed = {}
+    pending = {}  # 이름 → 해당 이름을 쓰는 query 목록
+
+    # 1단계: 표준코드/품목일련번호 해시 조회
+    for query in unique:
+        if query in memoized:
+            continue
+        name, code = query
+        idx = index.find_code(code) if code else None
+        if idx is not None:
+            computed[query] = (idx, 100.0, STAGE_CODE)
+        else:
+            pending.setdefault(name, []).append(query)
+
+    # 2단계: bigram 후보군 퍼지 비교
+    fallback = []
+    for name, name_queries in pending.items():
+        found = match_candidates(name, index)
+        if found is None or found[1] < MATCH_THRESHOLD:
+            fallback.append(name)
+            continue
+        for query in name_queries:
+            computed[query] = (found[0], found[1], STAGE_CANDIDATE)
+
+    # 후보 점수가 기준 미만인 이름만 전체 스캔 (배치 점수 행렬)
+    for name, (idx, score) in zip(fallback, score_names(fallback, index, workers, chunk_size)):
+        for query in pending[name]:
+            computed[query] = (idx, score, STAGE_FULL)
+
+    # 새로 계산한 행만 메모에 저장 (파일 일부만 바뀌면 그 행만 다시 매칭)
+    row_memo.store(index.version, computed)
+    matches = {query: (*match, True) for query, match in memoized.items()}
+    matches.update((query, (*match, False)) for query, match in computed.items())
+    return matches
@@ -0,0 +1,175 @@
+"""
+    업로드 매칭(/match-json, /match-pdf)이 공유하는 프로세스 단위 약품명 인덱스
+    - drug 테이블을 한 번만 읽어 정규화된 이름 + 약품 정보 튜플로 보관
+    - 카탈로그 지문(DB 식별자 + drug_catalog_version + 약품 수/최대 id)이 바뀌면 다시 생성
+    - 표준코드/품목일련번호 해시 조회 + 문자 bigram 역색인 포함
+    - 생성된 인덱스는 CACHE_DIR에 지문별 pickle 파일로 저장 (재시작 시 재사용)
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import namedtuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import CACHE_DIR
+from app.models import Drug, DrugCatalogVersion
+
+INDEX_DIR = os.path.join(CACHE_DIR, "match_index")
+INDEX_FORMAT = 3  # MatchIndex 구조가 바뀌면 올려서 이전 캐시 파일 무시
+
+# 매칭 결과에 필요한 컬럼만 담는 가벼운 약품 정보
+DrugEntry = namedtuple(
+    "DrugEntry",
+    ["drug_name", "standard_code", "product_code", "manufacturer", "image_url"],
+)
+
+# 데이터 전처리
+def normalize(name: str) -> str:
+    if not name:
+        return ""
+    return name.lower().replace("정", "").replace("mg", "").replace("밀리그램", "").replace(" ", "")
+
+# 엑셀에서 숫자로 읽힌 코드(8801234567890.0 등)도 문자열 코드로 통일
+def normalize_code(code) -> str:
+    if code is None:
+        return ""
+    if isinstance(code, float):
+        if code != code:  # NaN
+            return ""
+        code = int(code)
+    return str(code).strip()
+
+# 문자 bigram 집합 (한 글자 이름은 그 자체를 사용)
+def ngrams(name: str) -> set:
+    if len(name) < 2:
+        return {name} if name else set()
+    return {name[i:i + 2] for i in range(len(name) - 1)}
+
+
+class MatchIndex:
+    def __init__(self, version: str, names: list, drugs: list):
+        self.version = version
+        self.names = names  # 정규화된 약품명 (drugs와 같은 순서)
+        self.drugs = drugs  # DrugEntry 리스트
+
+        # 표준코드/품목일련번호 → drugs idx (표준코드 우선)
+        self.codes = {}
+        for i, d in enumerate(drugs):
+            code = normalize_code(d.product_code)
+            if code:
+                self.codes.setdefault(code, i)
+        for i, d in enumerate(drugs):
+            code = normalize_code(d.standard_code)
+            if code:
+                self.codes[code] = i
+
+        # bigram → 해당 bigram을 포함한 drugs idx 배열
+        postings = {}
+        for i, name in enumerate(names):
+            for gram in ngrams(name):
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self):
+        return len(self.drugs)
+
+    def find_code(self, code):
+        return self.codes.get(normalize_code(code))
+
+    def candidates(self, name: str, limit: int) -> np.ndarray:
+        # 공유 bigram 수가 많은 순으로 후보 idx 추출 (원래 순서로 정렬해 동점 처리 유지)
+        lists = [self.postings[g] for g in ngrams(name) if g in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+
+        hits = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        hit_ids = np.flatnonzero(hits)
+        if len(hit_ids) > limit:
+            top = np.argpartition(-hits[hit_ids], limit - 1)[:limit]
+            hit_ids = hit_ids[top]
+        return np.sort(hit_ids)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_catalog_version(db: Session) -> str:
+    # 버전 카운터만으로는 DB를 바꾸거나(초기화/복원) 카운터를 올리지 않고 drug를 고친 경우를 구분할 수 없음
+    # → DB URL 해시 + 버전 + 약품 수/최대 id를 함께 지문으로 사용
+    version = db.query(DrugCatalogVersion.version).filter(DrugCatalogVersion.id == 1).scalar()
+    count, max_id = db.query(func.count(Drug.id), func.max(Drug.id)).one()
+    database = hashlib.sha256(str(db.get_bind().url).encode("utf-8")).hexdigest()[:12]
+    return f"{database}-v{version or 0}-n{count}-m{max_id or 0}"
+
+
+def build_match_index(db: Session, version: str) -> MatchIndex:
+    rows = db.query(
+        Drug.drug_name,
+        Drug.standard_code,
+        Drug.product_code,
+        Drug.manufacturer,
+        Drug.image_url,
+    ).order_by(Drug.id).all()
+
+    drugs = [DrugEntry(*row) for row in rows]
+    names = [normalize(d.drug_name) for d in drugs]
+    return MatchIndex(version, names, drugs)
+
+
+def _cache_path(version: str) -> str:
+    return os.path.join(INDEX_DIR, f"f{INDEX_FORMAT}-{version}.pkl")
+
+
+def _load_cached(version: str):
+    path = _cache_path(version)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            index = pickle.load(f)
+        return index if index.version == version else None
+    except Exception as e:
+        print("⚠️ 매칭 인덱스 캐시 로드 실패:", e)
+        return None
+
+
+def _save_cached(index: MatchIndex):
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        path = _cache_path(index.version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        # 이전 버전 캐시 파일 정리
+        for name in os.listdir(INDEX_DIR):
+            if name.endswith(".pkl") and name != os.path.basename(path):
+                os.remove(os.path.join(INDEX_DIR, name))
+    except OSError as e:
+        print("⚠️ 매칭 인덱스 캐시 저장 실패:", e)
+
+
+def get_match_index(db: Session) -> MatchIndex:
+    global _index
+
+    version = get_catalog_version(db)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _index is not None and _index.version == version:
+            return _index
+
+        index = _load_cached(version)
+        if index is None:
+            index = build_match_index(db, version)
+            _save_cached(index)
+            print(f"📚 매칭 인덱스 생성: {version}, {len(index)}건")
+
+        _index = index
+        return index
@@ -0,0 +1,26 @@
+"""
+    기존 counting_log 행에 counted_at(timestamp 문자열을 해석한 시각) 채우기
+    - 서버 시작 시에도 백그라운드로 실행되므로 보통은 따로 실행할 필요 없음
+    - id 순서로 청크 단위 갱신, 청크마다 커밋하고 잠깐 쉼 (수집/조회를 막지 않음)
+    - 해석할 수 없는 timestamp는 NULL로 남김 (/api/reports 목록에서 제외)
+    실행: python scripts/migrate_counted_at.py [--chunk 5000] [--pause 0.05]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from app.config import COUNTED_AT_MIGRATION_CHUNK, COUNTED_AT_MIGRATION_PAUSE
+from app.database import engine
+from app.migrations import backfill_counted_at
+
+parser = argparse.ArgumentParser(description="counting_log.counted_at 채우기")
+parser.add_argument("--chunk", type=int, default=COUNTED_AT_MIGRATION_CHUNK, help="한 번에 갱신할 행 수")
+parser.add_argument("--pause", type=float, default=COUNTED_AT_MIGRATION_PAUSE, help="청크 사이 대기(초)")
+args = parser.parse_args()
+
+try:
+    backfill_counted_at(engine, args.chunk, args.pause)
+    print("🎉 counted_at 채우기 완료")
+except Exception as e:
+    print("❌ 오류 발생:", e)
@@ -0,0 +1,128 @@
+"""
+    PDF 수집 단계
+    - 문서마다 첫 페이지로 PyMuPDF / pdfplumber 추출 속도를 비교해 빠른 쪽 사용
+    - PDF_PARALLEL_MIN_PAGES 이상일 때만 페이지 묶음(PDF_PAGE_BATCH) 단위로 프로세스 풀에서 병렬 추출
+      (풀은 처음 필요할 때 한 번 만들어 재사용: spawn 방식에서는 풀 시작 비용이 짧은 PDF의 추출 시간보다 큼)
+      (모든 OS에서 spawn으로 시작: 스레드가 도는 서버 프로세스를 fork하면 잠금/DB 커넥션을 물려받음)
+    - 동시에 처리 중인 묶음 수를 제한해 페이지 수와 관계없이 메모리 일정
+    - 페이지 순서대로 PdfRowParser에 넣어 완성된 행을 바로 yield
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pdfplumber
+from app.config import PDF_WORKERS, PDF_PAGE_BATCH, PDF_PARALLEL_MIN_PAGES
+from scripts.pdf_parser import PdfRowParser
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+
+def _pymupdf_pages(path: str, start: int, end: int) -> list:
+    with fitz.open(path) as doc:
+        return [doc[i].get_text() for i in range(start, end)]
+
+
+def _pdfplumber_pages(path: str, start: int, end: int) -> list:
+    # pdfplumber의 pages 인자는 1부터 시작
+    with pdfplumber.open(path, pages=list(range(start + 1, end + 1))) as pdf:
+        return [p.extract_text() or "" for p in pdf.pages]
+
+
+BACKENDS = {"pymupdf": _pymupdf_pages, "pdfplumber": _pdfplumber_pages}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    # 모든 업로드가 함께 쓰는 추출 풀 (처음 필요할 때 생성)
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def count_pages(path: str) -> int:
+    if fitz is not None:
+        with fitz.open(path) as doc:
+            return doc.page_count
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def choose_backend(path: str) -> str:
+    # 첫 페이지 추출 시간을 비교해 텍스트가 나오는 백엔드 중 빠른 쪽 선택
+    names = ["pymupdf", "pdfplumber"] if fitz is not None else ["pdfplumber"]
+    timings = []
+    for name in names:
+        started = time.perf_counter()
+        try:
+            texts = BACKENDS[name](path, 0, 1)
+        except Exception as e:
+            print(f"⚠️ PDF 백엔드 {name} 추출 실패:", e)
+            continue
+        if any(t.strip() for t in texts):
+            timings.append((time.perf_counter() - started, name))
+
+    return min(timings)[1] if timings else names[-1]
+
+
+def extract_page_batch(backend: str, path: str, start: int, end: int) -> list:
+    return BACKENDS[backend](path, start, end)
+
+
+def iter_page_texts(path: str, workers: int = PDF_WORKERS, batch: int = PDF_PAGE_BATCH):
+    # 페이지 텍스트를 순서대로 yield
+    page_count = count_pages(path)
+    if page_count == 0:
+        return
+
+    backend = choose_backend(path)
+    ranges = [(start, min(start + batch, page_count)) for start in range(0, page_count, batch)]
+    print(f"📄 PDF 추출: {page_count}페이지, backend={backend}")
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for start, end in ranges:
+            yield from extract_page_batch(backend, path, start, end)
+        return
+
+    pool = get_pool()
+    # 순서를 지키면서 최대 workers * 2개 묶음만 미리 제출
+    pending = []
+    next_range = iter(ranges)
+    try:
+        for start, end in next_range:
+            pending.append(pool.submit(extract_page_batch, backend, path, start, end))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            texts = pending.pop(0).result()
+            for start, end in next_range:
+                pending.append(pool.submit(extract_page_batch, backend, path, start, end))
+                break
+            yield from texts
+    finally:
+        # 중간에 소비를 멈추면 아직 시작하지 않은 묶음은 취소 (공유 풀이므로 다른 업로드에 양보)
+        for future in pending:
+            future.cancel()
+
+
+def iter_pdf_rows(path: str, parser: PdfRowParser, workers: int = PDF_WORKERS):
+    # 페이지 단위로 파싱된 행을 바로 yield (파싱 오류는 parser.errors에 누적)
+    for text in iter_page_texts(path, workers):
+        yield from parser.feed(text)
+    yield from parser.finish()
@@ -1,9 +1,4 @@
-from io import BytesIO
-import fitz  # PyMuPDF
 import re
-from sqlalchemy.orm import Session
-from app.models import Drug
-from rapidfuzz import process, fuzz
 
 # 정규표현식 패턴
 pattern_code = re.compile(r"^880\d{10}$")
@@ -11,11 +6,6 @@ pattern_qty = re.compile(r"^\d+$")
 pattern_spec = re.compile(r"\d+(mg|밀리그램)?")
 pattern_manu = re.compile(r".*(\(주\)|\(유\)).*")
 
-def normalize(name: str) -> str:
-    if not name:
-        return ""
-    return name.lower().replace("정", "").replace("mg", "").replace("밀리그램", "").replace(" ", "")
-
 def split_line_if_mixed(line: str):
     match = pattern_code.search(line)
     if match:
@@ -25,79 +15,86 @@ def split_line_if_mixed(line: str):
         return [name_part, code] + ([rest] if rest else [])
     return [line]
 
-def parse_pdf_text_to_rows(file_bytes: bytes, db: Session) -> dict:
-    doc = fitz.open(stream=file_bytes, filetype="pdf")
-    text = "\n".join(page.get_text() for page in doc)
+# 유연한 헤더 감지
+expected_aliases = {
+    "상품명": ["상품명", "약품명", "제품명"],
+    "표준코드": ["표준코드", "코드"],
+    "판매처": ["판매처", "제조사", "제조업체"],
+    "규격": ["규격"],
+    "총수량": ["총수량", "수량", "주문수량"]
+}
+
+HEADER_LINES = 5
 
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    for idx, line in enumerate(lines):
-        print(f"{idx}: {line}")
+# 페이지 텍스트를 순서대로 받아 완성된 행을 바로 반환하는 증분 파서
+class PdfRowParser:
+    def __init__(self):
+        self.header = []      # 헤더 판별 전까지 모아두는 앞 5줄
+        self.header_ok = None  # None: 판별 전, True/False: 판별 결과
+        self.current = {}
+        self.errors = []
+        self.row_count = 0
 
-    rows = []
-    errors = []
+    def feed(self, text: str) -> list:
+        rows = []
+        for raw in text.splitlines():
+            raw = raw.strip()
+            if not raw:
+                continue
 
-    if len(lines) < 5:
-        return {"rows": [], "errors": ["⚠️ PDF 데이터가 너무 적습니다."]}
+            if self.header_ok is None:
+                self.header.append(raw)
+                if len(self.header) == HEADER_LINES:
+                    self._check_header()
+                continue
+            if not self.header_ok:
+                continue
 
-    # 유연한 헤더 감지
-    expected_aliases = {
-        "상품명": ["상품명", "약품명", "제품명"],
-        "표준코드": ["표준코드", "코드"],
-        "판매처": ["판매처", "제조사", "제조업체"],
-        "규격": ["규격"],
-        "총수량": ["총수량", "수량", "주문수량"]
-    }
+            for line in split_line_if_mixed(raw):
+                row = self._feed_line(line)
+                if row:
+                    rows.append(row)
 
-    header_found = {key: False for key in expected_aliases}
-    for line in lines[:5]:
-        for field, aliases in expected_aliases.items():
-            if any(alias in line for alias in aliases):
-                header_found[field] = True
+        self.row_count += len(rows)
+        return rows
 
-    if not all(header_found.values()):
-        errors.append(f"⚠️ 헤더 형식이 맞지 않습니다: {lines[:5]}")
-        return {"rows": [], "errors": errors}
+    def finish(self) -> list:
+        if self.header_ok is None:
+            self.errors.append("⚠️ PDF 데이터가 너무 적습니다.")
+        return []
 
-    data_lines = lines[5:]
-    drugs = db.query(Drug).all()
-    choices = [(normalize(d.drug_name), d) for d in drugs]
-    names_only = [c[0] for c in choices]
+    def _check_header(self):
+        header_found = {key: False for key in expected_aliases}
+        for line in self.header:
+            for field, aliases in expected_aliases.items():
+                if any(alias in line for alias in aliases):
+                    header_found[field] = True
 
-    current = {}
-    for raw_line in data_lines:
-        for line in split_line_if_mixed(raw_line):
-            if "입력 약품명" not in current:
-                current["입력 약품명"] = line
-            elif pattern_code.match(line):
-                current["표준코드"] = line
-            elif pattern_manu.match(line):
-                current["제조사"] = line
-            elif pattern_spec.search(line):
-                current["규격"] = line
-            elif pattern_qty.match(line):
-                current["입력 수량"] = line
+        self.header_ok = all(header_found.values())
+        if not self.header_ok:
+            self.errors.append(f"⚠️ 헤더 형식이 맞지 않습니다: {self.header}")
 
-            if len(current) >= 3:  # 완전하지 않아도 3개 이상이면 시도
-                try:
-                    name_norm = normalize(current.get("입력 약품명", ""))
-                    best, score, idx = process.extractOne(name_norm, names_only, scorer=fuzz.ratio)
-                    matched = choices[idx][1] if score >= 70 else None
+    def _feed_line(self, line: str):
+        current = self.current
+        if "입력 약품명" not in current:
+            current["입력 약품명"] = line
+        elif pattern_code.match(line):
+            current["표준코드"] = line
+        elif pattern_manu.match(line):
+            current["제조사"] = line
+        elif pattern_spec.search(line):
+            current["규격"] = line
+        elif pattern_qty.match(line):
+            current["입력 수량"] = line
 
-                    rows.append({
-                        "입력 약품명": current.get("입력 약품명"),
-                        "입력 수량": current.get("입력 수량"),
-                        "매핑 약품명": matched.drug_name if matched else None,
-                        "표준코드": matched.standard_code if matched else current.get("표준코드"),
-                        "품목일련번호": matched.product_code if matched else None,
-                        "제조사": matched.manufacturer if matched else current.get("제조사"),
-                        "약품 이미지": matched.image_url if matched else None,
-                        "유사도 점수": int(score),
-                        "매핑 여부": "O" if score >= 80 else "X"
-                    })
-                    print(f"매핑 성공: {current.get('입력 약품명')} → {matched.drug_name if matched else 'X'} (score: {score})")
-                except Exception as e:
-                    errors.append(f"⚠️ row 매핑 실패: {current} → {e}")
-                finally:
-                    current = {}
+        if len(current) >= 3:  # 완전하지 않아도 3개 이상이면 한 행으로 처리
+            self.current = {}
+            return current
+        return None
 
-    return {"rows": rows, "errors": errors}
+# PDF 텍스트를 행 단위로 파싱 (약품 매칭은 file_mapping의 공유 인덱스에서 처리)
+def parse_pdf_text_to_rows(text: str):
+    parser = PdfRowParser()
+    rows = parser.feed(text)
+    rows += parser.finish()
+    return rows, parser.errors
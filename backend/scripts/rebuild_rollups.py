@@ -0,0 +1,164 @@
+"""
+    카운팅 집계 테이블(counting_rollup_hourly / counting_rollup_daily) 재계산
+    - counting_log를 CHUNK 단위 조회해 메모리에서 집계 (메모리는 행 수가 아니라 구간 x 약품 x 스테이션 수에 비례)
+      counted_at이 있는 행은 (counted_at, id) 인덱스로 기간 안만 읽고,
+      counted_at 채우기가 끝나지 않은 행(NULL)만 id 순서로 읽어 timestamp 문자열로 기간 확인
+    - 보관된 달(ARCHIVE_DIR/counting_log/YYYY-MM.parquet)도 함께 읽음 (DB에서 지워진 달의 집계가 사라지지 않도록)
+      pyarrow가 없는데 대상 기간에 보관 파일이 있으면 재계산하지 않음
+    - 집계가 끝나면 한 트랜잭션에서 대상 기간의 집계 행을 지우고 새로 넣음 (조회 쪽은 중간 상태를 보지 않음)
+    - 수집이 돌고 있는 중에는 현재 시간대를 포함하지 않는 과거 기간만 지정할 것
+      (재계산 도중 들어온 행은 수집 경로가 이미 더했으므로 같은 구간을 다시 쓰면 어긋날 수 있음)
+    실행: python scripts/rebuild_rollups.py [--from 2025-06-01] [--to 2025-06-30]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import delete, insert, and_, or_
+from app.archive import ArchivedKeys, archive_files, archived_months, archive_filter, iter_archive_chunks
+from app.config import BULK_CHUNK_SIZE
+from app.database import SessionLocal
+from app.models import CountingLog, CountingRollupHourly, CountingRollupDaily
+from app.rollups import aggregate_rows
+from app.utils.timestamps import parse_counting_timestamp
+
+CHUNK = 5000
+
+parser = argparse.ArgumentParser(description="카운팅 집계 테이블 재계산")
+parser.add_argument("--from", dest="date_from", type=date.fromisoformat, help="시작일 (포함)")
+parser.add_argument("--to", dest="date_to", type=date.fromisoformat, help="종료일 (포함)")
+args = parser.parse_args()
+
+start = datetime.combine(args.date_from, time.min) if args.date_from else None
+end = datetime.combine(args.date_to + timedelta(days=1), time.min) if args.date_to else None
+
+
+COLUMNS = (
+    CountingLog.id,
+    CountingLog.timestamp,
+    CountingLog.counted_at,
+    CountingLog.drug_standard_code,
+    CountingLog.station_id,
+    CountingLog.count_quantity,
+    CountingLog.event_key,
+)
+
+
+def in_range(row) -> bool:
+    # counted_at이 아직 채워지지 않은 행은 문자열에서 해석
+    counted_at = parse_counting_timestamp(row["timestamp"])
+    return counted_at is not None and (start is None or counted_at >= start) and (end is None or counted_at < end)
+
+
+def archive_chunks(months: list):
+    # 보관 파일의 행 (counted_at은 항상 있음)
+    names = [column.key for column in COLUMNS]
+    expr = archive_filter(args.date_from, args.date_to)
+    for rows in iter_archive_chunks(months, expr, names):
+        yield [dict(zip(names, row)) for row in rows]
+
+
+def typed_chunks(db, archived: ArchivedKeys):
+    # counted_at이 있는 행: 기간 조건을 SQL에 넣고 (counted_at, id) 키셋으로 조회
+    last = None
+    while True:
+        query = db.query(*COLUMNS).filter(CountingLog.counted_at.isnot(None))
+        if start is not None:
+            query = query.filter(CountingLog.counted_at >= start)
+        if end is not None:
+            query = query.filter(CountingLog.counted_at < end)
+        if last is not None:
+            query = query.filter(or_(
+                CountingLog.counted_at > last[0],
+                and_(CountingLog.counted_at == last[0], CountingLog.id > last[1]),
+            ))
+        logs = query.order_by(CountingLog.counted_at, CountingLog.id).limit(CHUNK).all()
+        if not logs:
+            return
+        last = (logs[-1].counted_at, logs[-1].id)
+        yield [log._asdict() for log in logs if not archived.contains(log.event_key, log.id, log.counted_at)]
+
+
+def untyped_chunks(db):
+    # counted_at이 NULL인 행 (채우기 진행 중이거나 해석 불가): id 순서로 읽어 문자열로 기간 확인
+    last_id = 0
+    while True:
+        logs = (
+            db.query(*COLUMNS)
+            .filter(CountingLog.counted_at.is_(None), CountingLog.id > last_id)
+            .order_by(CountingLog.id)
+            .limit(CHUNK)
+            .all()
+        )
+        if not logs:
+            return
+        last_id = logs[-1].id
+        yield [row for row in (log._asdict() for log in logs) if in_range(row)]
+
+
+def merge(totals: dict, rows: list):
+    for row in rows:
+        key = (row["bucket"], row["drug_standard_code"], row["station_id"])
+        entry = totals.setdefault(key, [0, 0])
+        entry[0] += row["event_count"]
+        entry[1] += row["total_quantity"]
+
+
+def to_rows(totals: dict) -> list:
+    return [
+        {"bucket": bucket, "drug_standard_code": code, "station_id": station,
+         "event_count": count, "total_quantity": quantity}
+        for (bucket, code, station), (count, quantity) in totals.items()
+    ]
+
+
+months = archived_months(args.date_from, args.date_to)
+if archive_files(args.date_from, args.date_to) != months:
+    print("❌ 대상 기간에 보관 파일이 있지만 pyarrow가 없어 읽을 수 없습니다: pip install pyarrow")
+    sys.exit(1)
+
+db = SessionLocal()
+scanned = 0
+hourly, daily = {}, {}
+
+try:
+    sources = (
+        ("archive", archive_chunks(months)),
+        ("counted_at", typed_chunks(db, ArchivedKeys(months))),
+        ("NULL counted_at", untyped_chunks(db)),
+    )
+    for source, chunks in sources:
+        for rows in chunks:
+            scanned += len(rows)
+            chunk_hourly, chunk_daily = aggregate_rows(rows)
+            merge(hourly, chunk_hourly)
+            merge(daily, chunk_daily)
+            print(f"📊 {source}: {scanned}건 집계")
+
+    # 대상 기간의 집계 행 교체 (한 트랜잭션)
+    for model, totals, lower, upper in (
+        (CountingRollupHourly, hourly, start, end),
+        (CountingRollupDaily, daily, start and start.date(), end and end.date()),
+    ):
+        stmt = delete(model)
+        if lower is not None:
+            stmt = stmt.where(model.bucket >= lower)
+        if upper is not None:
+            stmt = stmt.where(model.bucket < upper)
+        db.execute(stmt)
+
+        values = to_rows(totals)
+        for i in range(0, len(values), BULK_CHUNK_SIZE):
+            db.execute(insert(model), values[i:i + BULK_CHUNK_SIZE])
+    db.commit()
+
+    print(f"🎉 집계 재계산 완료: 시간 {len(hourly)}행, 일 {len(daily)}행 (원본 {scanned}건)")
+
+except Exception as e:
+    db.rollback()
+    print("❌ 오류 발생:", e)
+
+finally:
+    db.close()
@@ -0,0 +1,129 @@
+"""
+    업로드 매칭 결과 캐시
+    - 키: 업로드 종류 + 약품 카탈로그 지문(DB 식별자/버전/약품 수/최대 id) + 파일 SHA-256
+    - 메모리 LRU (크기 상한) → 디스크 gzip JSON (크기 상한, mtime 기준 LRU) 2단계
+    - 같은 파일을 다시 올리면 파싱/매칭 없이 바로 반환
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from app.config import RESULT_CACHE_DIR, RESULT_CACHE_MEMORY_MB, RESULT_CACHE_DISK_MB
+
+
+def sha256_file(f) -> str:
+    # 파일 객체를 블록 단위로 해시한 뒤 처음 위치로 되돌림
+    digest = hashlib.sha256()
+    for block in iter(lambda: f.read(1024 * 1024), b""):
+        digest.update(block)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def sha256_path(path: str) -> str:
+    with open(path, "rb") as f:
+        return sha256_file(f)
+
+
+def cache_key(kind: str, version: str, digest: str) -> str:
+    # version은 get_catalog_version()의 카탈로그 지문 → 다른 DB나 카운터 없이 바뀐 카탈로그의 결과를 재사용하지 않음
+    return f"{kind}-{version}-{digest}"
+
+
+class ResultCache:
+    def __init__(self, directory: str, memory_limit: int, disk_limit: int):
+        self.directory = directory
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+        self._memory = OrderedDict()  # key → (rows, size)
+        self._memory_size = 0
+        self._disk_size = None  # 첫 저장 시 디렉토리를 한 번 스캔해서 계산
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = f.read()
+            os.utime(path)  # 디스크 LRU 순서 갱신
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print("⚠️ 결과 캐시 읽기 실패:", e)
+            return None
+
+        rows = json.loads(data)
+        self._remember(key, rows, len(data))
+        return rows
+
+    def put(self, key: str, rows: list):
+        data = json.dumps(rows, ensure_ascii=False)
+        self._remember(key, rows, len(data))
+        try:
+            self._write_disk(key, data)
+        except OSError as e:
+            print("⚠️ 결과 캐시 저장 실패:", e)
+
+    def _remember(self, key: str, rows: list, size: int):
+        if size > self.memory_limit:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= self._memory.pop(key)[1]
+            self._memory[key] = (rows, size)
+            self._memory_size += size
+            while self._memory_size > self.memory_limit:
+                _, (_, old_size) = self._memory.popitem(last=False)
+                self._memory_size -= old_size
+
+    def _write_disk(self, key: str, data: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(data)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = sum(e.stat().st_size for e in os.scandir(self.directory) if e.name.endswith(".json.gz"))
+            else:
+                self._disk_size += size
+            if self._disk_size > self.disk_limit:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        # 가장 오래 사용되지 않은 파일부터 상한의 90%까지 삭제
+        entries = sorted(
+            (e for e in os.scandir(self.directory) if e.name.endswith(".json.gz")),
+            key=lambda e: e.stat().st_mtime,
+        )
+        total = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if total <= self.disk_limit * 0.9:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_size = total
+
+
+result_cache = ResultCache(
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_MEMORY_MB * 1024 * 1024,
+    RESULT_CACHE_DISK_MB * 1024 * 1024,
+)
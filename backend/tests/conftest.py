@@ -0,0 +1,67 @@
+"""
+    테스트 공통 설정
+    - app 모듈을 불러오기 전에 임시 SQLite DB / 캐시 / 보관 경로 지정 (벤치마크와 같은 방식)
+    - 테스트마다 테이블을 새로 만듦
+    실행 (backend 디렉토리에서): python -m pytest tests
+"""
+import json
+import os
+import sys
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="exion-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ["CACHE_DIR"] = os.path.join(WORKDIR, "cache")
+os.environ["ARCHIVE_DIR"] = os.path.join(WORKDIR, "archive")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import shutil
+import pytest
+
+
+@pytest.fixture
+def db():
+    from app.database import Base, engine, SessionLocal
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    shutil.rmtree(os.environ["ARCHIVE_DIR"], ignore_errors=True)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def writer(db):
+    # 브로드캐스트는 실행하지 않는 이벤트 루프에 예약만 됨
+    from app.ingest import CountingLogWriter
+    loop = asyncio.new_event_loop()
+    try:
+        yield CountingLogWriter(loop)
+    finally:
+        loop.close()
+
+
+def write_counting_file(directory, name: str, timestamp: str, code: str = "8806000000001",
+                        drug_name: str = "타이레놀정500mg", quantity: int = 30) -> str:
+    # 카운팅 기계가 남기는 결과 JSON 파일
+    path = os.path.join(str(directory), name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": timestamp,
+            "drug_name": drug_name,
+            "drug_standard_code": code,
+            "drug_refer_code": None,
+            "count_quantity": quantity,
+        }, f, ensure_ascii=False)
+    return path
+
+
+def ingest(writer, paths: list, station_id: str = None):
+    # 파싱 워커를 거치지 않고 writer에 한 배치로 넘김
+    from app.config import DEFAULT_STATION
+    from app.ingest import parse_counting_file, file_state
+    station_id = station_id or DEFAULT_STATION
+    writer.write([(parse_counting_file(path, station_id), file_state(path, station_id), None) for path in paths])
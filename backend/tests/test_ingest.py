@@ -0,0 +1,84 @@
+# 수집 중복 방지 (event_key / 보관 키) 및 업그레이드 직후 동작 (event_key 채우기, ledger 채우기)
+from app.config import DEFAULT_STATION
+from app.database import engine
+from app.ingest import SourceWorker, WatchSource, seed_ledger
+from app.migrations import backfill_event_keys
+from app.models import ArchivedEventKey, CountingLog, CountingRollupDaily, IngestLedger
+from conftest import ingest, write_counting_file
+
+
+def test_same_file_twice_is_stored_once(db, writer, tmp_path):
+    path = write_counting_file(tmp_path, "a.json", "2025-06-04-10-30-00")
+    ingest(writer, [path])
+    ingest(writer, [path])
+
+    assert db.query(CountingLog).count() == 1
+    assert db.query(CountingRollupDaily.event_count).scalar() == 1
+
+
+def test_same_content_under_another_name_is_stored_once(db, writer, tmp_path):
+    first = write_counting_file(tmp_path, "a.json", "2025-06-04-10-30-00")
+    second = write_counting_file(tmp_path, "b.json", "2025-06-04-10-30-00")
+    ingest(writer, [first, second])
+
+    assert db.query(CountingLog).count() == 1
+    assert db.query(IngestLedger).count() == 2
+
+
+def test_other_station_with_same_content_is_kept(db, writer, tmp_path):
+    path = write_counting_file(tmp_path, "a.json", "2025-06-04-10-30-00")
+    ingest(writer, [path])
+    ingest(writer, [path], station_id="station2")
+
+    assert db.query(CountingLog).count() == 2
+
+
+def test_archived_event_key_is_not_inserted_again(db, writer, tmp_path):
+    from app.ingest import parse_counting_file
+    path = write_counting_file(tmp_path, "a.json", "2025-01-15-09-00-00")
+    db.add(ArchivedEventKey(event_key=parse_counting_file(path)["event_key"]))
+    db.commit()
+
+    ingest(writer, [path])
+
+    assert db.query(CountingLog).count() == 0
+    assert db.query(CountingRollupDaily).count() == 0
+    assert db.query(IngestLedger.status).scalar() == "ok"
+
+
+def test_upgrade_backfills_keys_and_seeds_ledger(db, writer, tmp_path):
+    # 업그레이드 전 수집분: event_key / source_filename / station_id 없음, ledger 비어 있음
+    old = write_counting_file(tmp_path, "old.json", "2025-06-01-08-00-00", quantity=10)
+    new = write_counting_file(tmp_path, "new.json", "2025-06-02-08-00-00", quantity=20)
+    db.add(CountingLog(
+        timestamp="2025-06-01-08-00-00", drug_name="타이레놀정500mg ", drug_standard_code=" 8806000000001",
+        count_quantity=10,
+    ))
+    db.commit()
+
+    assert backfill_event_keys(engine) == 1
+    source = WatchSource(DEFAULT_STATION, str(tmp_path), False)
+    assert seed_ledger([source]) == 1
+
+    legacy = db.query(CountingLog).one()
+    assert legacy.event_key is not None
+    assert legacy.source_filename == "old.json"
+
+    # 첫 재동기화는 DB에 없는 파일만 대기열에 넣음
+    ledger = {name: (mtime_ns, size) for name, mtime_ns, size in db.query(
+        IngestLedger.source_filename, IngestLedger.mtime_ns, IngestLedger.size
+    )}
+    assert SourceWorker(source, writer).reconcile(ledger) == (2, 1)
+
+    # 옛 파일이 다시 들어와도 중복 저장되지 않음
+    ingest(writer, [old, new])
+    db.expire_all()
+    assert db.query(CountingLog).count() == 2
+
+
+def test_seed_ledger_skips_when_ledger_exists(db, writer, tmp_path):
+    path = write_counting_file(tmp_path, "a.json", "2025-06-04-10-30-00")
+    ingest(writer, [path])
+    write_counting_file(tmp_path, "b.json", "2025-06-05-10-30-00")
+
+    assert seed_ledger([WatchSource(DEFAULT_STATION, str(tmp_path), False)]) == 0
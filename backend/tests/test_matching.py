@@ -0,0 +1,59 @@
+# 배치 매칭(코드 조회 → 후보군 → 전체 스캔)과 기존 행 단위 extractOne 결과 비교
+import pytest
+from rapidfuzz import process, fuzz
+from benchmarks.synthetic import generate_catalog, generate_orders
+from scripts.match_engine import match_queries, score_names, row_memo, MATCH_THRESHOLD, STAGE_CODE, STAGE_FULL
+from scripts.match_index import DrugEntry, MatchIndex, normalize
+
+
+@pytest.fixture(scope="module")
+def index():
+    catalog = generate_catalog(2000)
+    drugs = [DrugEntry(**drug) for drug in catalog]
+    return MatchIndex("test", [normalize(d.drug_name) for d in drugs], drugs)
+
+
+@pytest.fixture(scope="module")
+def orders(index):
+    catalog = [d._asdict() for d in index.drugs]
+    return generate_orders(catalog, 300, noise=0.5, code_ratio=0.3)
+
+
+def test_normalize_strips_units_and_forms():
+    assert normalize("타이레놀정 500밀리그램") == normalize("타이레놀500mg") == "타이레놀500"
+
+
+def test_score_names_matches_extract_one(index, orders):
+    queries = [normalize(name) for name, _, _, _ in orders]
+    for query, (idx, score) in zip(queries, score_names(queries, index, workers=1, chunk_size=64)):
+        _, expected_score, expected_idx = process.extractOne(query, index.names, scorer=fuzz.ratio)
+        assert (idx, int(score)) == (expected_idx, int(expected_score))
+
+
+def test_match_queries_agrees_with_extract_one(index, orders):
+    row_memo.clear()
+    queries = [(normalize(name), code or "") for name, _, code, _ in orders]
+    matches = match_queries(queries, index, workers=1)
+
+    for query in queries:
+        idx, score, stage, _ = matches[query]
+        name, code = query
+        if stage == STAGE_CODE:
+            assert index.drugs[idx].standard_code == code
+            continue
+        _, expected_score, expected_idx = process.extractOne(name, index.names, scorer=fuzz.ratio)
+        if stage == STAGE_FULL:
+            assert (idx, int(score)) == (expected_idx, int(expected_score))
+        # 후보군 단계도 매핑 여부(기준 점수)는 전체 extractOne과 같아야 함
+        assert (score >= MATCH_THRESHOLD) == (expected_score >= MATCH_THRESHOLD)
+        assert score <= expected_score
+
+
+def test_memo_keeps_original_stage(index, orders):
+    row_memo.clear()
+    queries = [(normalize(name), code or "") for name, _, code, _ in orders[:50]]
+    first = match_queries(queries, index, workers=1)
+    second = match_queries(queries, index, workers=1)
+    for query in queries:
+        assert second[query][:3] == first[query][:3]
+        assert second[query][3] is True
@@ -0,0 +1,86 @@
+# /api/reports 키셋 페이지네이션: DB + 보관(Parquet) 계층을 함께 넘기는 커서, 중복/누락 없음
+from datetime import date
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from fastapi import Response
+from app.archive import ArchivedKeys, archive_month
+from app.ingest import parse_counting_file
+from app.models import CountingLog, CountingRollupDaily
+from app.routers.reports import NEXT_CURSOR_HEADER, get_all_logs
+from conftest import ingest, write_counting_file
+
+
+def read_pages(db, limit: int, **filters) -> list:
+    # X-Next-Cursor를 따라 끝까지 읽은 행 목록
+    params = {"date_from": None, "date_to": None, "drug_code": None, "station": None, **filters}
+    rows, cursor = [], None
+    while True:
+        response = Response()
+        page = get_all_logs(response, cursor=cursor, limit=limit, db=db, **params)
+        assert len(page) <= limit
+        rows.extend(page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return rows
+
+
+@pytest.fixture
+def logs(db, writer, tmp_path):
+    # 1월(보관 대상) 5건, 6월 5건, 시각을 해석할 수 없는 1건
+    january = [write_counting_file(tmp_path, f"jan{i}.json", f"2025-01-{10 + i:02d}-09-00-00", quantity=i + 1) for i in range(5)]
+    june = [write_counting_file(tmp_path, f"jun{i}.json", f"2025-06-{10 + i:02d}-09-00-00", quantity=i + 1) for i in range(5)]
+    untimed = write_counting_file(tmp_path, "untimed.json", "unknown")
+    ingest(writer, january + june + [untimed])
+    return {"january": january, "june": june, "untimed": untimed}
+
+
+def keys(rows: list) -> list:
+    return [row["event_key"] for row in rows]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 20])
+def test_pages_cross_archive_without_gaps_or_duplicates(db, logs, limit):
+    expected = keys(read_pages(db, 100))
+    assert archive_month(date(2025, 1, 1)) == 5
+    assert db.query(CountingLog).count() == 6
+
+    rows = read_pages(db, limit)
+    assert keys(rows) == expected
+    assert len(set(keys(rows))) == 11
+    # 시각 있는 행은 최신순, 시각을 해석할 수 없는 행은 맨 뒤
+    timed = [(row["counted_at"], row["id"]) for row in rows if row["counted_at"] is not None]
+    assert timed == sorted(timed, reverse=True)
+    assert rows[-1]["counted_at"] is None
+
+
+def test_date_range_reads_archive_only_month(db, logs):
+    archive_month(date(2025, 1, 1))
+    rows = read_pages(db, 2, date_from=date(2025, 1, 1), date_to=date(2025, 1, 31))
+    assert [row["count_quantity"] for row in rows] == [5, 4, 3, 2, 1]
+
+
+def test_row_in_both_tiers_is_listed_once(db, logs):
+    # 보관 후 같은 행이 다른 id로 DB에 남아 있어도(삭제 전 중단, id 재사용) event_key로 한 번만
+    archive_month(date(2025, 1, 1))
+    row = parse_counting_file(logs["january"][0])
+    log = CountingLog(**row)
+    db.add(log)
+    db.commit()
+
+    rows = read_pages(db, 3)
+    assert len(rows) == 11
+    assert keys(rows).count(row["event_key"]) == 1
+    assert ArchivedKeys([date(2025, 1, 1)]).contains(row["event_key"], log.id, row["counted_at"])
+
+
+def test_redelivered_archived_file_is_not_counted_again(db, writer, logs):
+    archive_month(date(2025, 1, 1))
+    before = sorted(db.query(CountingRollupDaily.bucket, CountingRollupDaily.event_count).all())
+
+    ingest(writer, logs["january"])
+
+    db.expire_all()
+    assert db.query(CountingLog).count() == 6
+    assert sorted(db.query(CountingRollupDaily.bucket, CountingRollupDaily.event_count).all()) == before
@@ -0,0 +1,63 @@
+# 집계 테이블(수집 경로의 증분 반영)과 원본 counting_log 합계 비교
+from collections import Counter
+from datetime import date
+from app.models import CountingLog, CountingRollupDaily, CountingRollupHourly
+from app.rollups import aggregate_rows
+from app.routers.reports import get_summary
+from conftest import ingest, write_counting_file
+
+
+def raw_totals(db) -> tuple:
+    rows = [
+        {"timestamp": log.timestamp, "counted_at": log.counted_at, "drug_standard_code": log.drug_standard_code,
+         "station_id": log.station_id, "count_quantity": log.count_quantity}
+        for log in db.query(CountingLog)
+    ]
+    return aggregate_rows(rows)
+
+
+def table_totals(db, model) -> Counter:
+    return Counter({
+        (row.bucket, row.drug_standard_code, row.station_id): (row.event_count, row.total_quantity)
+        for row in db.query(model)
+    })
+
+
+def as_counter(rows: list) -> Counter:
+    return Counter({
+        (row["bucket"], row["drug_standard_code"], row["station_id"]): (row["event_count"], row["total_quantity"])
+        for row in rows
+    })
+
+
+def test_rollups_match_raw_rows(db, writer, tmp_path):
+    # 여러 배치 + 배치 안/배치 사이 중복 + 스테이션 두 곳
+    codes = ["8806000000001", "8806000000002", "8806000000003"]
+    paths = [
+        write_counting_file(tmp_path, f"{i}.json", f"2025-06-{1 + i % 3:02d}-{8 + i % 5:02d}-{i % 60:02d}-00",
+                            code=codes[i % 3], quantity=i + 1)
+        for i in range(30)
+    ]
+    ingest(writer, paths[:20])
+    ingest(writer, paths[10:] + paths[:5])
+    ingest(writer, paths[:10], station_id="station2")
+
+    hourly, daily = raw_totals(db)
+    assert db.query(CountingLog).count() == 40
+    assert table_totals(db, CountingRollupHourly) == as_counter(hourly)
+    assert table_totals(db, CountingRollupDaily) == as_counter(daily)
+
+
+def test_summary_totals_match_raw_rows(db, writer, tmp_path):
+    paths = [
+        write_counting_file(tmp_path, f"{i}.json", f"2025-06-{1 + i:02d}-10-00-00", quantity=10 * (i + 1))
+        for i in range(7)
+    ]
+    ingest(writer, paths)
+
+    summary = get_summary(
+        date_from=date(2025, 6, 1), date_to=date(2025, 6, 30), granularity="week",
+        group_by="drug,station", drug_code=None, station=None, db=db,
+    )
+    assert summary["totals"] == {"event_count": 7, "total_quantity": sum(10 * (i + 1) for i in range(7))}
+    assert sum(row["event_count"] for row in summary["rows"]) == db.query(CountingLog).count()
@@ -6,6 +6,9 @@ import { tokens } from '../../theme';
 //import { mockDataInvoices } from "../../data/mockData";
 import Header from '../../components/Header';
 
+// /inventory는 offset/limit 페이지 단위로 응답 (전체 건수는 X-Total-Count 헤더)
+const PAGE_SIZE_OPTIONS = [25, 50, 100];
+
 /*
    TODO: Pill Counter 카운팅 정보 수신
    - 실시간 데이터 수신 방법: WebSocket, API Polling
@@ -15,23 +18,37 @@ const Inventory = () => {
   const theme = useTheme();
   const colors = tokens(theme.palette.mode);
   const [rows, setRows] = useState([]);
+  const [rowCount, setRowCount] = useState(0);
+  const [loading, setLoading] = useState(false);
+  const [paginationModel, setPaginationModel] = useState({ page: 0, pageSize: PAGE_SIZE_OPTIONS[0] });
 
+  // 페이지를 넘길 때마다 그 페이지만 서버에서 조회
   useEffect(() => {
+    setLoading(true);
     axios
-      .get('http://localhost:8000/api/inventory')
-      .then((res) => setRows(res.data))
-      .catch((err) => console.error('재고 데이터를 불러오는 중 오류 발생:', err));
-  }, []);
+      .get('http://localhost:8000/api/inventory', {
+        params: {
+          offset: paginationModel.page * paginationModel.pageSize,
+          limit: paginationModel.pageSize,
+        },
+      })
+      .then((res) => {
+        setRows(res.data);
+        setRowCount(Number(res.headers['x-total-count'] ?? res.data.length));
+      })
+      .catch((err) => console.error('재고 데이터를 불러오는 중 오류 발생:', err))
+      .finally(() => setLoading(false));
+  }, [paginationModel]);
 
   const columns = [
     { field: 'id', headerName: 'ID', flex: 0.3 },
     { field: 'drug_name', headerName: '약품명', flex: 1 },
-    { field: 'barcode', headerName: '바코드', flex: 1 },
+    { field: 'standard_code', headerName: '바코드', flex: 1 },
     { field: 'quantity', headerName: '수량', flex: 0.5 },
     { field: 'unit', headerName: '단위', flex: 0.5 },
     { field: 'cabinet', headerName: '선반', flex: 0.5 },
     { field: 'row', headerName: '줄', flex: 0.5 },
-    { field: 'column', headerName: '칸', flex: 0.5 },
+    { field: 'position', headerName: '칸', flex: 0.5 },
   ];
 
   return (
@@ -66,7 +83,18 @@ const Inventory = () => {
           },
         }}
       >
-        <DataGrid checkboxSelection rows={rows} columns={columns} getRowId={(row) => row.id} />
+        <DataGrid
+          checkboxSelection
+          rows={rows}
+          columns={columns}
+          getRowId={(row) => row.id}
+          loading={loading}
+          paginationMode="server"
+          rowCount={rowCount}
+          paginationModel={paginationModel}
+          onPaginationModelChange={setPaginationModel}
+          pageSizeOptions={PAGE_SIZE_OPTIONS}
+        />
       </Box>
     </Box>
   );
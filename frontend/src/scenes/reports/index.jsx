@@ -16,7 +16,6 @@ import { DataGrid } from '@mui/x-data-grid';
 import DownloadIcon from '@mui/icons-material/Download';
 import ReplayIcon from '@mui/icons-material/Replay';
 import CircleIcon from '@mui/icons-material/Circle';
-import * as XLSX from 'xlsx';
 import { tokens } from '../../theme';
 import '../../index.css';
 
@@ -24,6 +23,7 @@ import '../../index.css';
 // 외부 접속 허용 API
 const API_KEY = 'http://172.30.1.13:8000';
 const WS_URL = `${API_KEY.replace(/^http/, 'ws')}`;
+const PAGE_SIZE = 500; // /api/reports 한 번에 불러올 행 수 (다음 페이지는 X-Next-Cursor)
 
 const extractDateTime = (timestamp) => {
   const date = `${timestamp.slice(0, 4)}-${timestamp.slice(4, 6)}-${timestamp.slice(6, 8)}`;
@@ -31,6 +31,17 @@ const extractDateTime = (timestamp) => {
   return [date, time];
 };
 
+const formatLog = (item) => {
+  const [date, timeRaw] = extractDateTime(item.timestamp);
+  return {
+    ...item,
+    date,
+    time: formatTime(timeRaw),
+    isNew: false,
+    id: item.id,
+  };
+};
+
 const formatTime = (timeStr) => {
   const [hh, mm] = timeStr.split(':');
   const hour = parseInt(hh);
@@ -50,28 +61,28 @@ const Reports = () => {
   const [showCard, setShowCard] = useState(false);
   const [selectedRow, setSelectedRow] = useState(null);
   const [selectionModel, setSelectionModel] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [backfillPending, setBackfillPending] = useState(false); // 과거 기록 시각 변환 중 (일부 기록이 아직 안 보임)
 
   const wsRef = useRef(null);
+  const lastIdRef = useRef(null); // 마지막으로 받은 카운팅 로그 id (재연결 시 놓친 이벤트만 요청)
   const colors = tokens('light');
 
   const fetchLogs = () => {
-    fetch(`${API_KEY}/api/reports`)
+    fetch(`${API_KEY}/api/reports?limit=${PAGE_SIZE}`)
       .then((res) => {
         if (!res.ok) throw new Error('응답 오류');
+        setNextCursor(res.headers.get('X-Next-Cursor'));
+        setBackfillPending(res.headers.has('X-Backfill-Pending'));
         return res.json();
       })
       .then((data) => {
-        const formatted = data.map((item) => {
-          const [date, timeRaw] = extractDateTime(item.timestamp);
-          return {
-            ...item,
-            date,
-            time: formatTime(timeRaw),
-            isNew: false,
-            id: item.id,
-          };
-        });
+        const formatted = data.map(formatLog);
         setLogs(formatted);
+        if (formatted.length > 0) {
+          lastIdRef.current = Math.max(lastIdRef.current ?? 0, ...formatted.map((log) => log.id));
+        }
         setFetchError(false);
       })
       .catch((err) => {
@@ -84,6 +95,26 @@ const Reports = () => {
       });
   };
 
+  // 다음 페이지 (이전 페이지의 마지막 행 이후부터)
+  const fetchMoreLogs = () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    fetch(`${API_KEY}/api/reports?limit=${PAGE_SIZE}&cursor=${encodeURIComponent(nextCursor)}`)
+      .then((res) => {
+        if (!res.ok) throw new Error('응답 오류');
+        setNextCursor(res.headers.get('X-Next-Cursor'));
+        return res.json();
+      })
+      .then((data) => {
+        setLogs((prev) => {
+          const seen = new Set(prev.map((log) => log.id));
+          return [...prev, ...data.map(formatLog).filter((log) => !seen.has(log.id))];
+        });
+      })
+      .catch((err) => console.error('서버 응답 실패:', err.message))
+      .finally(() => setLoadingMore(false));
+  };
+
   const connectWebSocket = () => {
     if (wsRef.current && wsRef.current.readyState <= 1) return;
 
@@ -91,9 +122,14 @@ const Reports = () => {
     wsRef.current = ws;
 
     ws.onopen = () => {
+      // 카운팅 이벤트만 묶음 프레임으로 구독 (업로드 작업 진행률 등은 서버에서 거름)
+      // 이전에 받은 id가 있으면 끊긴 동안의 이벤트만 다시 받고, 처음 연결이면 전체 조회
+      const subscription = { action: 'subscribe', types: ['counting'], batch: true };
+      if (lastIdRef.current !== null) subscription.last_id = lastIdRef.current;
+      ws.send(JSON.stringify(subscription));
       setIsConnected(true);
       setIsConnecting(false);
-      fetchLogs();
+      if (lastIdRef.current === null) fetchLogs();
     };
 
     ws.onclose = () => {
@@ -103,35 +139,48 @@ const Reports = () => {
     };
 
     ws.onmessage = (event) => {
-      const raw = JSON.parse(event.data);
-      setDrugInfo(raw);
-      setShowCard(true);
-
-      const [date, timeRaw] = extractDateTime(raw.timestamp);
-      const formattedTime = formatTime(timeRaw);
-      const newRowId = raw.id;
-
-      setLogs((prev) => {
-        const cleaned = prev.map((log) => ({ ...log, isNew: false }));
-        const newLog = {
-          ...raw,
-          date,
-          time: formattedTime,
-          isNew: true,
-          id: newRowId,
-        };
-        return [newLog, ...cleaned.filter((log) => log.id !== newRowId)].slice(0, 50);
-      });
-
-      setTimeout(() => {
-        setLogs((prev) =>
-          prev.map((log) => (log.id === newRowId ? { ...log, isNew: false } : log))
-        );
-        setShowCard(false);
-      }, 9000);
+      const data = JSON.parse(event.data);
+      if (data.type === 'batch') {
+        data.events.forEach(handleCountingEvent);
+      } else if (data.type === 'replay') {
+        // 버퍼보다 오래 끊겨 있었으면 전체 재조회
+        if (data.complete) data.events.forEach(handleCountingEvent);
+        else fetchLogs();
+      } else if (!data.type || data.type === 'counting') {
+        handleCountingEvent(data);
+      }
     };
   };
 
+  const handleCountingEvent = (raw) => {
+    lastIdRef.current = Math.max(lastIdRef.current ?? 0, raw.id);
+    setDrugInfo(raw);
+    setShowCard(true);
+
+    const [date, timeRaw] = extractDateTime(raw.timestamp);
+    const formattedTime = formatTime(timeRaw);
+    const newRowId = raw.id;
+
+    setLogs((prev) => {
+      const cleaned = prev.map((log) => ({ ...log, isNew: false }));
+      const newLog = {
+        ...raw,
+        date,
+        time: formattedTime,
+        isNew: true,
+        id: newRowId,
+      };
+      return [newLog, ...cleaned.filter((log) => log.id !== newRowId)].slice(0, 50);
+    });
+
+    setTimeout(() => {
+      setLogs((prev) =>
+        prev.map((log) => (log.id === newRowId ? { ...log, isNew: false } : log))
+      );
+      setShowCard(false);
+    }, 9000);
+  };
+
   useEffect(() => {
     fetchLogs();
     connectWebSocket();
@@ -150,11 +199,9 @@ const Reports = () => {
     log.drug_name?.toLowerCase().includes(search.toLowerCase())
   );
 
+  // 불러온 페이지만이 아니라 전체 이력을 서버에서 스트리밍으로 내려받음
   const handleExcelDownload = () => {
-    const worksheet = XLSX.utils.json_to_sheet(logs);
-    const workbook = XLSX.utils.book_new();
-    XLSX.utils.book_append_sheet(workbook, worksheet, 'Reports');
-    XLSX.writeFile(workbook, 'counting_logs.xlsx');
+    window.location.href = `${API_KEY}/api/reports/export?format=xlsx`;
   };
 
   const columns = [
@@ -267,7 +314,7 @@ const Reports = () => {
                     [
                       'Snapshot',
                       <img
-                        src={`${API_KEY}/images/${drugInfo.timestamp}.png`}
+                        src={`${API_KEY}/api/images/${drugInfo.timestamp}.png?variant=thumb`}
                         alt="drug"
                         style={{ maxWidth: '100%', borderRadius: 8 }}
                         onError={(e) => (e.target.style.display = 'none')}
@@ -359,7 +406,7 @@ const Reports = () => {
             }}
           >
             <img
-              src={`${API_KEY}/images/${selectedRow.timestamp}.png`}
+              src={`${API_KEY}/api/images/${selectedRow.timestamp}.png?variant=webp`}
               alt="drug"
               style={{
                 width: '100%',
@@ -439,6 +486,12 @@ const Reports = () => {
         </Box>
       )}
       {/* 서버 연결 끊겼을 때 알림 메세지 */}
+      {backfillPending && !loading && (
+        <Alert severity="info" sx={{ mb: 3 }}>
+          과거 기록의 시각 정보를 변환하는 중입니다. 완료될 때까지 일부 이전 기록은 목록 맨 뒤에 표시되고, 기간 조회에는 나타나지 않을 수 있습니다.
+        </Alert>
+      )}
+
       {fetchError && !loading && (
         <Alert
           severity="error"
@@ -497,6 +550,13 @@ const Reports = () => {
             >
               Download
             </Button>
+            <Button
+              variant="outlined"
+              disabled={!nextCursor || loadingMore}
+              onClick={fetchMoreLogs}
+            >
+              {loadingMore ? 'Loading...' : 'Load More'}
+            </Button>
           </Stack>
 
           <Box